@@ -0,0 +1,95 @@
+"""
+Benchmark del cierre de caja de muchos días atrasados de una vez.
+
+    python -m app.benchmarks.bench_cierre --dias 365 --movs-dia 300
+
+Genera --dias días de movimientos de caja sin cerrar y mide
+cerrar_rango() para todo el período (una consulta agrupada, saldos
+encadenados en memoria, un solo INSERT). Objetivo: un año en bastante
+menos de 1 s. Luego compara cada cierre con obtener_saldo() (suma de todo
+el histórico) y sale con código 1 si alguno no cuadra o si se pasa de
+--presupuesto-ms. Usa una base temporal (INVENTARIO_DB), nunca
+app_data/inventario.db.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--movs-dia", type=int, default=300)
+    parser.add_argument("--presupuesto-ms", type=float, default=1000.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from sqlalchemy import insert
+
+        from app.db.cash_repo import cerrar_rango, dias_pendientes, obtener_saldo
+        from app.db.database import SessionLocal, get_engine, init_db
+        from app.db.models import CashMovement
+
+        init_db()
+        rnd = random.Random(1)
+        inicio = date(2024, 1, 1)
+        fin = inicio + timedelta(days=args.dias - 1)
+
+        t0 = time.perf_counter()
+        with SessionLocal() as db:
+            for dia in range(args.dias):
+                base = datetime.combine(inicio + timedelta(days=dia), dtime(7, 0))
+                db.execute(
+                    insert(CashMovement.__table__),
+                    [
+                        {
+                            "tipo": "INGRESO" if rnd.random() < 0.7 else "EGRESO",
+                            "concepto": "bench",
+                            "monto": Decimal(rnd.randint(100, 500_000))
+                            + Decimal(rnd.randint(0, 99)) / 100,
+                            "fecha": base + timedelta(seconds=n * 40),
+                        }
+                        for n in range(args.movs_dia)
+                    ],
+                )
+            db.commit()
+        print(
+            f"caja: {args.dias} días x {args.movs_dia} movimientos "
+            f"({time.perf_counter() - t0:.1f} s de carga)"
+        )
+
+        pendientes = dias_pendientes(fin)
+        t0 = time.perf_counter()
+        cierres = cerrar_rango(inicio, fin, cerrado_por="bench")
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"cerrar_rango(): {len(cierres)} días en {ms:8.1f} ms")
+
+        # Cada cierre contra la suma de todo el histórico hasta ese día
+        errores = 0
+        for c in cierres:
+            esperado = obtener_saldo(hasta=datetime.combine(c.fecha, dtime.max))
+            encadenado = c.saldo_inicial + c.total_ingresos - c.total_egresos
+            if c.saldo_final != esperado or encadenado != c.saldo_final:
+                errores += 1
+        completos = len(cierres) == len(pendientes) == args.dias and not dias_pendientes(fin)
+        ok = errores == 0 and completos and ms <= args.presupuesto_ms
+        print(
+            f"saldos vs histórico: {errores} diferencias, "
+            f"presupuesto {args.presupuesto_ms:.0f} ms  {'OK' if ok else 'FALLA'}"
+        )
+
+        get_engine().dispose()
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Sumas de dinero a escala: centavos enteros vs float.
+
+    python -m app.benchmarks.bench_dinero --movimientos 300000 --semillas 5
+
+Por cada semilla genera montos COP aleatorios (con centavos) y verifica:
+- sum(Dinero) == suma exacta en Decimal, en cualquier orden;
+- obtener_saldo() (SUM en SQLite) == la misma suma exacta;
+- resumen_del_dia() cuadra con los movimientos del día.
+También muestra cuánto se desvía la suma en float. Usa una base temporal
+(INVENTARIO_DB), nunca app_data/inventario.db. Sale con código 1 si falla.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+
+def generar_montos(rnd: random.Random, n: int) -> list[Decimal]:
+    # Mezcla de montos chicos y grandes, como una caja real
+    montos = []
+    for _ in range(n):
+        pesos = rnd.choice((rnd.randint(100, 99_999), rnd.randint(100_000, 9_999_999)))
+        montos.append(Decimal(pesos) + Decimal(rnd.randint(0, 99)) / 100)
+    return montos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--movimientos", type=int, default=300_000)
+    parser.add_argument("--semillas", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from sqlalchemy import insert
+
+        from app.db.cash_repo import obtener_saldo, resumen_del_dia
+        from app.db.database import SessionLocal, get_engine, init_db
+        from app.db.models import CashMovement
+        from app.utils.dinero import Dinero
+
+        init_db()
+        ok = True
+        base = datetime(2024, 1, 1, 8, 0)
+
+        for semilla in range(1, args.semillas + 1):
+            rnd = random.Random(semilla)
+            montos = generar_montos(rnd, args.movimientos)
+            exacto = sum(montos, Decimal(0))
+
+            # Propiedad 1: la suma no depende del orden
+            dineros = [Dinero(m) for m in montos]
+            suma = sum(dineros, Dinero())
+            rnd.shuffle(dineros)
+            suma_mezclada = sum(dineros, Dinero())
+            deriva_float = abs(sum(float(m) for m in montos) - float(exacto))
+
+            # Propiedad 2: el SUM de la base da lo mismo
+            with SessionLocal() as db:
+                db.execute(CashMovement.__table__.delete())
+                db.execute(
+                    insert(CashMovement.__table__),
+                    [
+                        {
+                            "tipo": "INGRESO",
+                            "concepto": "bench",
+                            "monto": m,
+                            "fecha": base + timedelta(minutes=i),
+                        }
+                        for i, m in enumerate(montos)
+                    ],
+                )
+                db.commit()
+
+            t0 = time.perf_counter()
+            saldo = obtener_saldo()
+            ms_sum = (time.perf_counter() - t0) * 1000
+
+            # Propiedad 3: el resumen de un día cuadra con sus movimientos
+            dia = base.date()
+            minutos_dia = 24 * 60 - (base.hour * 60 + base.minute)
+            del_dia = sum(montos[:minutos_dia], Decimal(0))
+            resumen = resumen_del_dia(dia)
+
+            bien = (
+                suma.pesos == exacto
+                and suma_mezclada == suma
+                and saldo.pesos == exacto
+                and resumen["ingresos"].pesos == del_dia
+            )
+            ok &= bien
+            print(
+                f"semilla={semilla} n={len(montos):>8} exacto={exacto:>18,} "
+                f"deriva_float={deriva_float:.6f} SUM={ms_sum:7.1f} ms  "
+                f"{'OK' if bien else 'FALLA'}"
+            )
+
+        get_engine().dispose()
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark del import masivo de entradas (líneas/segundo).
+
+    python -m app.benchmarks.bench_import_entradas --lineas 50000
+
+Usa una base temporal (INVENTARIO_DB), nunca app_data/inventario.db.
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.benchmarks.bench_import_productos import generar_csv as generar_catalogo
+
+
+def generar_csv(
+    ruta: Path, lineas: int, productos: int, por_factura: int, seed: int = 1
+) -> None:
+    rnd = random.Random(seed)
+    inicio = date.today() - timedelta(days=365)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Factura", "NIT", "Fecha", "Código", "Cantidad", "Precio compra"])
+        for i in range(lineas):
+            factura = i // por_factura
+            w.writerow(
+                [
+                    f"F{factura:06d}",
+                    "900000001",
+                    (inicio + timedelta(days=factura % 365)).isoformat(),
+                    f"SKU{rnd.randrange(productos):07d}",
+                    rnd.randint(1, 50),
+                    rnd.randint(500, 90_000),
+                ]
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lineas", type=int, default=50_000)
+    parser.add_argument("--productos", type=int, default=5000)
+    parser.add_argument("--por-factura", type=int, default=40)
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from app.db.database import init_db, get_engine
+        from app.db.entries_import import importar_entradas
+        from app.db.products_import import importar_productos
+        from app.db.suppliers_repo import crear_proveedor
+
+        init_db()
+        catalogo = Path(tmp) / "catalogo.csv"
+        generar_catalogo(catalogo, args.productos)
+        importar_productos(catalogo)
+        crear_proveedor("Proveedor bench", nit="900000001")
+
+        ruta = Path(tmp) / "entradas.csv"
+        generar_csv(ruta, args.lineas, args.productos, args.por_factura)
+
+        r = importar_entradas(ruta, lote=args.lote)
+        print(
+            f"lineas={r.lineas:>8} entradas={r.entradas:>6} "
+            f"errores={len(r.errores):>4} {r.segundos:7.2f} s  "
+            f"{r.filas_por_segundo:>10,.0f} líneas/s"
+        )
+
+        get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
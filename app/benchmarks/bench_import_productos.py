@@ -0,0 +1,62 @@
+"""
+Benchmark del import masivo de productos (filas/segundo).
+
+    python -m app.benchmarks.bench_import_productos --filas 30000
+
+Usa una base temporal (INVENTARIO_DB), nunca app_data/inventario.db.
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+from pathlib import Path
+
+
+def generar_csv(ruta: Path, filas: int, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    with open(ruta, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Código", "Nombre", "Unidad", "Precio venta", "Stock mínimo"])
+        for i in range(filas):
+            w.writerow(
+                [
+                    f"SKU{i:07d}",
+                    f"Producto {i}",
+                    rnd.choice(["und", "kg", "lb", "caja"]),
+                    f"{rnd.randint(500, 250_000)},{rnd.randint(0, 99):02d}",
+                    rnd.randint(0, 20),
+                ]
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=30_000)
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from app.db.database import init_db, get_engine
+        from app.db.products_import import importar_productos
+
+        init_db()
+        ruta = Path(tmp) / "catalogo.csv"
+        generar_csv(ruta, args.filas)
+
+        for etapa in ("insertar", "actualizar"):
+            r = importar_productos(ruta, lote=args.lote)
+            print(
+                f"{etapa:<11} filas={r.filas:>8} nuevos={r.insertados:>8} "
+                f"actualizados={r.actualizados:>8} errores={len(r.errores):>4} "
+                f"{r.segundos:7.2f} s  {r.filas_por_segundo:>10,.0f} filas/s"
+            )
+
+        get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
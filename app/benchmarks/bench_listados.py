@@ -0,0 +1,137 @@
+"""
+Benchmark de listados largos: entidades ORM contra tuplas por columnas.
+
+    python -m app.benchmarks.bench_listados --filas 100000
+
+Carga --filas movimientos de caja, productos y ventas y compara cada
+listar_* (entidades ORM) con su listar_*_filas (solo las columnas de la
+grilla en NamedTuple). Por caso: mínimo de --rondas en ms y pico de
+memoria de una llamada (tracemalloc, en una corrida aparte porque
+tracemalloc hace todo más lento).
+Usa una base temporal (configurar_db), nunca app_data/inventario.db.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def _cargar(n: int) -> None:
+    from sqlalchemy import insert
+
+    from app.db.database import SessionLocal
+    from app.db.models import CashMovement, Product, Sale
+
+    rnd = random.Random(1)
+    inicio = datetime(2024, 1, 1, 8, 0)
+    with SessionLocal() as db:
+        db.execute(
+            insert(Product.__table__),
+            [
+                {
+                    "codigo": f"SKU{i:07d}",
+                    "nombre": f"Producto {i}",
+                    "unidad": "und",
+                    "precio_venta": rnd.randint(1_000, 90_000) * 100,
+                    "stock_minimo": 5.0,
+                    "stock_actual": float(rnd.randint(0, 200)),
+                    "activo": True,
+                }
+                for i in range(n)
+            ],
+        )
+        db.execute(
+            insert(Sale.__table__),
+            [
+                {
+                    "fecha": inicio + timedelta(minutes=i),
+                    "total": rnd.randint(1_000, 500_000) * 100,
+                    "anulada": rnd.random() < 0.02,
+                }
+                for i in range(n)
+            ],
+        )
+        db.execute(
+            insert(CashMovement.__table__),
+            [
+                {
+                    "tipo": "INGRESO" if i % 4 else "EGRESO",
+                    "concepto": f"Venta #{i}" if i % 4 else "Pago proveedor",
+                    "monto": rnd.randint(1_000, 500_000) * 100,
+                    "fecha": inicio + timedelta(minutes=i),
+                    "referencia": f"Venta #{i}" if i % 4 else None,
+                }
+                for i in range(n)
+            ],
+        )
+        db.commit()
+
+
+def _medir(fn, rondas: int) -> tuple[float, float, int]:
+    """(mín ms, pico MB, filas)"""
+    filas = len(fn())  # calentamiento
+    tiempos = []
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tiempos), pico / 2**20, filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--rondas", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from app.db.cash_repo import listar_movimientos, listar_movimientos_filas
+    from app.db.database import configurar_db, init_db
+    from app.db.products_repo import listar_productos, listar_productos_filas
+    from app.db.sales_repo import listar_ventas, listar_ventas_filas
+
+    n = args.filas
+    with tempfile.TemporaryDirectory() as tmp:
+        configurar_db(Path(tmp) / "bench.db")
+        init_db()
+        t0 = time.perf_counter()
+        _cargar(n)
+        print(f"{n:,} filas por tabla ({time.perf_counter() - t0:.1f} s de carga)")
+
+        pares = [
+            (
+                "movimientos",
+                lambda: listar_movimientos(n),
+                lambda: listar_movimientos_filas(n),
+            ),
+            ("productos", listar_productos, listar_productos_filas),
+            ("ventas", lambda: listar_ventas(n), lambda: listar_ventas_filas(n)),
+        ]
+        print(
+            f"\n{'listado':<12} {'filas':>8} {'ORM ms':>9} {'tuplas ms':>10} "
+            f"{'x':>5} {'ORM MB':>8} {'tuplas MB':>10} {'x':>5}"
+        )
+        for nombre, orm, tuplas in pares:
+            ms_orm, mb_orm, filas = _medir(orm, args.rondas)
+            ms_tup, mb_tup, _ = _medir(tuplas, args.rondas)
+            print(
+                f"{nombre:<12} {filas:>8,} {ms_orm:9.1f} {ms_tup:10.1f} "
+                f"{ms_orm / ms_tup:5.1f} {mb_orm:8.1f} {mb_tup:10.1f} "
+                f"{mb_orm / mb_tup:5.1f}"
+            )
+
+        configurar_db(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark del pronóstico de demanda (promedio móvil + suavizado exponencial).
+
+    python -m app.benchmarks.bench_pronostico --productos 50000 --dias 730
+
+Genera --dias días de ventas para todo el catálogo y mide:
+- el cálculo inicial (todo el histórico menos la última semana);
+- el avance incremental, un día por vez, para esa última semana;
+- pronosticos() y sugerencias_por_proveedor() sobre todo el catálogo.
+Al final compara el estado incremental con un recálculo completo y sale
+con código 1 si difieren. Usa una base temporal (INVENTARIO_DB), nunca
+app_data/inventario.db.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--productos", type=int, default=50_000)
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument("--lineas-dia", type=int, default=2000)
+    parser.add_argument("--proveedores", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from sqlalchemy import insert, select
+
+        from app.db import forecast_repo
+        from app.db.database import SessionLocal, get_engine, init_db
+        from app.db.models import (
+            DemandaProducto,
+            Entry,
+            EntryDetail,
+            Product,
+            ProductSupplierPrice,
+            Sale,
+            SaleDetail,
+            Supplier,
+        )
+
+        init_db()
+        rnd = random.Random(1)
+        inicio = datetime(2023, 1, 1, 8, 0)
+        por_venta = 5
+
+        t0 = time.perf_counter()
+        with SessionLocal() as db:
+            db.execute(
+                insert(Product.__table__),
+                [
+                    {
+                        "codigo": f"SKU{i:07d}",
+                        "nombre": f"Producto {i}",
+                        "activo": True,
+                        "stock_actual": rnd.randint(0, 200),
+                        "stock_minimo": rnd.randint(0, 20),
+                    }
+                    for i in range(args.productos)
+                ],
+            )
+            db.execute(
+                insert(Supplier.__table__),
+                [{"nombre": f"Proveedor {i}"} for i in range(args.proveedores)],
+            )
+            # Una compra previa por producto: define su último proveedor
+            db.execute(
+                insert(Entry.__table__),
+                [
+                    {"supplier_id": i % args.proveedores + 1, "fecha": inicio, "total": 0}
+                    for i in range(args.proveedores)
+                ],
+            )
+            compras = [
+                {
+                    "entry_id": rnd.randint(1, args.proveedores),
+                    "product_id": pid,
+                    "cantidad": 10,
+                    "precio_compra": 1000,
+                    "subtotal": 10_000,
+                }
+                for pid in range(1, args.productos + 1)
+            ]
+            db.execute(insert(EntryDetail.__table__), compras)
+            # Lo que entries_repo acumula al guardar cada entrada
+            db.execute(
+                insert(ProductSupplierPrice.__table__),
+                [
+                    {
+                        "product_id": c["product_id"],
+                        "supplier_id": (c["entry_id"] - 1) % args.proveedores + 1,
+                        "ultimo_precio": c["precio_compra"],
+                        "primera_compra": inicio,
+                        "ultima_compra": inicio,
+                        "compras": 1,
+                        "cantidad_total": c["cantidad"],
+                        "valor_total": c["subtotal"],
+                    }
+                    for c in compras
+                ],
+            )
+
+            sale_id = 0
+            for dia in range(args.dias):
+                fecha = inicio + timedelta(days=dia)
+                ventas, detalles = [], []
+                for n in range(args.lineas_dia // por_venta):
+                    sale_id += 1
+                    ventas.append(
+                        {
+                            "id": sale_id,
+                            "fecha": fecha + timedelta(seconds=n * 20),
+                            "total": 0,
+                            "anulada": False,
+                        }
+                    )
+                    for _ in range(por_venta):
+                        # Demanda sesgada: pocos productos venden mucho
+                        pid = int(args.productos * rnd.random() ** 3) + 1
+                        detalles.append(
+                            {
+                                "sale_id": sale_id,
+                                "product_id": pid,
+                                "cantidad": rnd.randint(1, 5),
+                            }
+                        )
+                db.execute(insert(Sale.__table__), ventas)
+                db.execute(insert(SaleDetail.__table__), detalles)
+            db.commit()
+        print(
+            f"ventas: {args.dias} días x {args.lineas_dia:,} líneas "
+            f"({time.perf_counter() - t0:.1f} s de carga)"
+        )
+
+        ultimo = (inicio + timedelta(days=args.dias - 1)).date()
+        t0 = time.perf_counter()
+        forecast_repo.actualizar_pronostico(ultimo - timedelta(days=7))
+        print(f"cálculo inicial ({args.dias - 7} días): {time.perf_counter() - t0:8.2f} s")
+
+        for dia in range(6, -1, -1):
+            t0 = time.perf_counter()
+            forecast_repo.actualizar_pronostico(ultimo - timedelta(days=dia))
+            ms = (time.perf_counter() - t0) * 1000
+            print(f"avance {ultimo - timedelta(days=dia)}: {ms:8.1f} ms")
+
+        t0 = time.perf_counter()
+        forecast_repo.actualizar_pronostico(ultimo)
+        print(f"ya al día: {(time.perf_counter() - t0) * 1000:8.1f} ms")
+
+        t0 = time.perf_counter()
+        todos = forecast_repo.pronosticos(actualizar=False)
+        print(
+            f"pronosticos(): {len(todos):,} productos "
+            f"{(time.perf_counter() - t0) * 1000:8.1f} ms"
+        )
+        t0 = time.perf_counter()
+        grupos = forecast_repo.sugerencias_por_proveedor(actualizar=False)
+        lineas = sum(len(v) for v in grupos.values())
+        print(
+            f"sugerencias_por_proveedor(): {len(grupos)} proveedores, "
+            f"{lineas:,} líneas {(time.perf_counter() - t0) * 1000:8.1f} ms"
+        )
+
+        # Incremental == recálculo completo
+        dem = DemandaProducto.__table__
+        with SessionLocal() as db:
+            incremental = {
+                pid: (s, v) for pid, s, v in db.execute(select(dem)).all()
+            }
+        forecast_repo.actualizar_pronostico(ultimo, recalcular=True)
+        with SessionLocal() as db:
+            completo = {pid: (s, v) for pid, s, v in db.execute(select(dem)).all()}
+        error = max(
+            (
+                max(abs(s - completo[pid][0]), abs(v - completo[pid][1]))
+                for pid, (s, v) in incremental.items()
+            ),
+            default=0.0,
+        )
+        ok = incremental.keys() == completo.keys() and error < 1e-6
+        print(f"incremental vs recálculo: error máx {error:.2e}  {'OK' if ok else 'FALLA'}")
+
+        get_engine().dispose()
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark de valoración de inventario a una fecha (snapshots + kardex).
+
+    python -m app.benchmarks.bench_valoracion --productos 50000 --dias 365
+
+Genera un kardex sintético (entradas y ventas diarias), deja un snapshot
+cada --snapshot-cada días (1 = como cerrar_dia; 30 = días sin cerrar) y
+mide valoracion_a_fecha() para todo el catálogo en fechas al azar.
+Objetivo: < 1 s con 50k productos.
+Usa una base temporal (INVENTARIO_DB), nunca app_data/inventario.db.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--productos", type=int, default=50_000)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--movs-dia", type=int, default=2000)
+    parser.add_argument("--snapshot-cada", type=int, default=30)
+    parser.add_argument("--consultas", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["INVENTARIO_DB"] = str(Path(tmp) / "bench.db")
+
+        from sqlalchemy import insert
+
+        from app.db.database import SessionLocal, get_engine, init_db
+        from app.db.inventory_repo import crear_checkpoints, valoracion_a_fecha
+        from app.db.models import InventoryMovement, Product
+
+        init_db()
+        rnd = random.Random(1)
+        inicio = datetime(2024, 1, 1, 8, 0)
+
+        with SessionLocal() as db:
+            db.execute(
+                insert(Product.__table__),
+                [
+                    {"codigo": f"SKU{i:07d}", "nombre": f"Producto {i}", "activo": True}
+                    for i in range(args.productos)
+                ],
+            )
+            db.commit()
+
+        t0 = time.perf_counter()
+        snapshots = 0
+        for dia in range(args.dias):
+            fecha = inicio + timedelta(days=dia)
+            movs = []
+            for n in range(args.movs_dia):
+                pid = rnd.randint(1, args.productos)
+                entra = rnd.random() < 0.3
+                movs.append(
+                    {
+                        "product_id": pid,
+                        "fecha": fecha + timedelta(seconds=n * 20),
+                        "delta": rnd.randint(5, 50) if entra else -rnd.randint(1, 5),
+                        "origen": "ENTRADA" if entra else "VENTA",
+                        "costo_unitario": rnd.randint(500, 90_000),
+                    }
+                )
+            with SessionLocal() as db:
+                db.execute(insert(InventoryMovement.__table__), movs)
+                db.commit()
+
+            if (dia + 1) % args.snapshot_cada == 0:
+                snapshots += crear_checkpoints(fecha.replace(hour=23, minute=59))
+        total_movs = args.dias * args.movs_dia
+        print(
+            f"kardex: {total_movs:,} movimientos, {snapshots:,} snapshots "
+            f"({time.perf_counter() - t0:.1f} s de carga)"
+        )
+
+        for _ in range(args.consultas):
+            fecha = inicio + timedelta(days=rnd.randint(0, args.dias), hours=12)
+            t0 = time.perf_counter()
+            valores = valoracion_a_fecha(fecha)
+            ms = (time.perf_counter() - t0) * 1000
+            total = sum((v.valor for v in valores), 0)
+            print(
+                f"{fecha:%Y-%m-%d}  productos={len(valores):>7,}  "
+                f"valor={float(total):>20,.2f}  {ms:8.1f} ms"
+            )
+
+        get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+"""
+Generador determinístico de datos sintéticos para pruebas de carga.
+
+    python -m app.benchmarks.generador --db /tmp/carga.db --escala 100k
+
+Llena una base nueva con productos, proveedores, entradas, ventas,
+anulaciones y movimientos de caja a lo largo de --anios años (terminando
+ayer), con la misma forma que dejan los repos: detalles, kardex, precios
+por proveedor, stock y costo promedio, caja y cierres diarios. La misma
+semilla y fecha final dan exactamente los mismos datos.
+
+Se simula día por día en memoria (stock y costo promedio de cada
+producto) y se escribe con executemany por lotes de días, sin pasar por
+crear_venta/crear_entrada fila por fila. Las ventas nunca dejan stock
+negativo y el costo promedio usa la misma fórmula que entries_repo, así
+que conciliar_stock() y la valoración por kardex cuadran con products.
+
+--escala fija la cantidad de ventas (10k, 100k, 1m); las demás cantidades
+se derivan de ella salvo que se indiquen.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ESCALAS = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+METODOS = ("Efectivo", "Efectivo", "Efectivo", "Tarjeta", "Transferencia")
+UNIDADES = ("und", "und", "und", "kg", "lt", "caja", "paquete")
+GASTOS = ("Pago transporte", "Servicios públicos", "Aseo", "Papelería", "Almuerzos")
+APORTES = ("Aporte de caja", "Base del día", "Abono cliente")
+
+
+@dataclass
+class Volumen:
+    ventas: int = 10_000
+    productos: int = 1_000
+    proveedores: int = 40
+    anios: float = 1.0
+    lineas_venta: float = 3.0  # promedio por venta
+    entradas_dia: float = 2.0
+    anulaciones: float = 0.01  # fracción de ventas anuladas
+    movimientos_dia: float = 2.0  # gastos/aportes manuales de caja
+
+    @classmethod
+    def de_escala(cls, ventas: int, anios: float = 2.0) -> Volumen:
+        productos = min(max(ventas // 20, 500), 50_000)
+        return cls(
+            ventas=ventas,
+            productos=productos,
+            proveedores=max(productos // 50, 20),
+            anios=anios,
+            entradas_dia=max(ventas / 365 / anios / 25, 1.0),
+        )
+
+
+@dataclass
+class Generado:
+    productos: int = 0
+    proveedores: int = 0
+    entradas: int = 0
+    lineas_entrada: int = 0
+    ventas: int = 0
+    lineas_venta: int = 0
+    anuladas: int = 0
+    movimientos_caja: int = 0
+    cierres: int = 0
+    desde: date | None = None
+    hasta: date | None = None
+    segundos: float = 0.0
+
+
+def _redondear(x: float) -> int:
+    """Como ROUND() de SQLite: mitad lejos de cero."""
+    return int(x + 0.5) if x >= 0 else -int(-x + 0.5)
+
+
+def _cuantos(rnd: random.Random, promedio: float) -> int:
+    """Entero con ese promedio (parte entera + fracción al azar)."""
+    base = int(promedio)
+    return base + (1 if rnd.random() < promedio - base else 0)
+
+
+def generar(
+    volumen: Volumen,
+    seed: int = 1,
+    hasta: date | None = None,
+    cerrar: bool = True,
+    dias_por_lote: int = 15,
+    progreso=None,
+) -> Generado:
+    """
+    Llena la base de INVENTARIO_DB (debe estar vacía). `hasta` = último día
+    con datos (por defecto ayer). Con cerrar=True deja cerrados todos los
+    días menos el último. progreso(etiqueta, hechos, total) como en
+    las migraciones.
+    """
+    from sqlalchemy import bindparam, func, insert, select, update
+
+    from app.db.cash_repo import cerrar_rango
+    from app.db.database import SessionLocal, init_db
+    from app.db.models import (
+        CashMovement,
+        Entry,
+        EntryDetail,
+        InventoryMovement,
+        Product,
+        Sale,
+        SaleDetail,
+        Supplier,
+    )
+    from app.db.purchase_orders_repo import registrar_precios_compra
+    from app.utils.dinero import Dinero
+
+    init_db()
+    t_inicio = time.perf_counter()
+    rnd = random.Random(seed)
+    hasta = hasta or date.today() - timedelta(days=1)
+    dias = max(int(round(volumen.anios * 365)), 1)
+    desde = hasta - timedelta(days=dias - 1)
+    res = Generado(desde=desde, hasta=hasta)
+    dinero = Dinero.de_centavos
+
+    with SessionLocal() as db:
+        if db.execute(select(func.count()).select_from(Product.__table__)).scalar():
+            raise ValueError("La base ya tiene productos: se necesita una base vacía.")
+
+    # -------- Catálogo --------
+    n_prod, n_prov = volumen.productos, volumen.proveedores
+    # Costos en centavos ($500 a $90.000)
+    costo_base = [0] + [rnd.randint(5, 900) * 10_000 for _ in range(n_prod)]
+    margen = [0.0] + [rnd.uniform(1.2, 1.8) for _ in range(n_prod)]
+    minimo = [0] + [rnd.choice((0, 0, 5, 10, 20)) for _ in range(n_prod)]
+    # Proveedor habitual y, para algunos, uno alterno (precios que compiten)
+    principal = [0] + [(pid - 1) % n_prov + 1 for pid in range(1, n_prod + 1)]
+    alterno = [0] + [
+        rnd.randint(1, n_prov) if rnd.random() < 0.3 else 0 for _ in range(n_prod)
+    ]
+    por_proveedor: dict[int, list[int]] = defaultdict(list)
+    for pid in range(1, n_prod + 1):
+        por_proveedor[principal[pid]].append(pid)
+    # Precio de venta redondeado a $50
+    precio = [0] + [
+        _redondear(costo_base[pid] * margen[pid] / 5000) * 5000
+        for pid in range(1, n_prod + 1)
+    ]
+
+    with SessionLocal() as db:
+        db.execute(
+            insert(Supplier.__table__),
+            [
+                {
+                    "id": s,
+                    "nombre": f"Proveedor {s:04d}",
+                    "nit": f"900{s:06d}",
+                    "activo": True,
+                }
+                for s in range(1, n_prov + 1)
+            ],
+        )
+        db.execute(
+            insert(Product.__table__),
+            [
+                {
+                    "id": pid,
+                    "codigo": f"SKU{pid:07d}",
+                    "nombre": f"Producto {pid}",
+                    "unidad": rnd.choice(UNIDADES),
+                    "precio_venta": dinero(precio[pid]),
+                    "stock_minimo": float(minimo[pid]),
+                    "stock_actual": 0.0,
+                    "activo": True,
+                    "costo_promedio": dinero(0),
+                    "created_at": datetime.combine(desde, datetime.min.time()),
+                }
+                for pid in range(1, n_prod + 1)
+            ],
+        )
+        db.commit()
+    res.productos, res.proveedores = n_prod, n_prov
+
+    # -------- Simulación día por día --------
+    stock = [0.0] * (n_prod + 1)
+    costo = [0] * (n_prod + 1)
+    vendido = [0.0] * (n_prod + 1)  # desde la última compra
+    pendientes: dict[int, set[int]] = defaultdict(set)  # proveedor -> a reponer
+    ventas_dia = volumen.ventas / dias
+    entry_id = sale_id = 0
+    capital = 0
+
+    lote = _Lote()
+    for n_dia in range(dias):
+        dia = desde + timedelta(days=n_dia)
+        apertura = datetime.combine(dia, datetime.min.time())
+        inflacion = 1.0 + 0.08 * n_dia / 365
+
+        # Entradas a primera hora: el primer día todo el catálogo,
+        # después lo que quedó bajo el mínimo (más algo al azar)
+        if n_dia == 0:
+            pedidos = [(s, list(pids)) for s, pids in sorted(por_proveedor.items())]
+        else:
+            pedidos = []
+            candidatos = sorted(pendientes, key=lambda s: -len(pendientes[s]))
+            for s in candidatos[: _cuantos(rnd, volumen.entradas_dia)]:
+                pids = sorted(pendientes.pop(s))[:60]
+                extra = rnd.sample(por_proveedor[s], min(3, len(por_proveedor[s])))
+                pedidos.append((s, sorted(set(pids) | set(extra))))
+
+        for n_ent, (s, pids) in enumerate(pedidos):
+            entry_id += 1
+            fecha = apertura.replace(hour=7) + timedelta(seconds=n_ent * 7)
+            # A veces se le compra al proveedor alterno del primer producto
+            if n_dia and alterno[pids[0]] and rnd.random() < 0.3:
+                s = alterno[pids[0]]
+            total = 0
+            compras = []
+            for pid in pids:
+                cant = float(
+                    math.ceil(vendido[pid] * 1.1) + minimo[pid] + rnd.randint(0, 10)
+                    if n_dia
+                    else rnd.randint(20, 200)
+                )
+                variacion = inflacion * rnd.uniform(0.95, 1.05)
+                unit = _redondear(costo_base[pid] * variacion / 100) * 100
+                sub = _redondear(unit * cant)
+                total += sub
+                lote.entry_details.append(
+                    {
+                        "entry_id": entry_id,
+                        "product_id": pid,
+                        "cantidad": cant,
+                        "precio_compra": dinero(unit),
+                        "subtotal": dinero(sub),
+                    }
+                )
+                lote.kardex.append(
+                    {
+                        "product_id": pid,
+                        "fecha": fecha,
+                        "delta": cant,
+                        "origen": "ENTRADA",
+                        "documento_id": entry_id,
+                        "costo_unitario": dinero(unit),
+                    }
+                )
+                compras.append(
+                    {
+                        "product_id": pid,
+                        "supplier_id": s,
+                        "entry_id": entry_id,
+                        "fecha": fecha,
+                        "cantidad": cant,
+                        "precio_compra": dinero(unit),
+                        "subtotal": dinero(sub),
+                    }
+                )
+                # Misma fórmula que entries_repo._aplicar_deltas_stock
+                previo = max(stock[pid], 0.0)
+                valor = previo * costo[pid] + unit * cant
+                costo[pid] = _redondear(valor / (previo + cant))
+                stock[pid] += cant
+                vendido[pid] = 0.0
+                pendientes[principal[pid]].discard(pid)
+            lote.compras.extend(compras)
+            lote.entries.append(
+                {"id": entry_id, "supplier_id": s, "fecha": fecha, "total": dinero(total)}
+            )
+            if rnd.random() < 0.85:  # pagada de contado
+                lote.caja.append(
+                    {
+                        "tipo": "EGRESO",
+                        "concepto": f"Compra (Entrada #{entry_id}) - Proveedor {s:04d}",
+                        "monto": dinero(total),
+                        "fecha": fecha,
+                        "referencia": f"Entrada {entry_id}",
+                        "observacion": "Método: Efectivo",
+                        "metodo_pago": "Efectivo",
+                    }
+                )
+            if n_dia == 0:
+                capital += total
+            res.entradas += 1
+            res.lineas_entrada += len(pids)
+
+        if n_dia == 0:
+            # El inventario inicial se paga con un aporte de capital
+            lote.caja.append(
+                {
+                    "tipo": "INGRESO",
+                    "concepto": "Aporte de capital",
+                    "monto": dinero(capital),
+                    "fecha": apertura.replace(hour=6),
+                    "referencia": None,
+                    "observacion": None,
+                    "metodo_pago": None,
+                }
+            )
+
+        # Ventas de 8:00 a 20:00; las más vendidas son pocas (sesgo cúbico)
+        n_ventas = _cuantos(rnd, ventas_dia) if n_dia else 0
+        segundos = sorted(rnd.randrange(8 * 3600, 20 * 3600) for _ in range(n_ventas))
+        anuladas = []
+        for seg in segundos:
+            fecha = apertura + timedelta(seconds=seg)
+            lineas = {}
+            n_lineas = _cuantos(rnd, volumen.lineas_venta * rnd.uniform(0.3, 1.7))
+            for _ in range(max(n_lineas, 1)):
+                for _intento in range(5):
+                    pid = int(n_prod * rnd.random() ** 3) + 1
+                    cant = float(rnd.randint(1, 5))
+                    if pid not in lineas and stock[pid] >= cant:
+                        lineas[pid] = cant
+                        break
+            if not lineas:
+                continue
+
+            sale_id += 1
+            total = 0
+            metodo = rnd.choice(METODOS)
+            for pid, cant in lineas.items():
+                sub = precio[pid] * int(cant)
+                total += sub
+                stock[pid] -= cant
+                vendido[pid] += cant
+                if stock[pid] <= minimo[pid] or stock[pid] < 5:
+                    pendientes[principal[pid]].add(pid)
+                lote.sale_details.append(
+                    {
+                        "sale_id": sale_id,
+                        "product_id": pid,
+                        "cantidad": cant,
+                        "precio_venta": dinero(precio[pid]),
+                        "subtotal": dinero(sub),
+                    }
+                )
+                lote.kardex.append(
+                    {
+                        "product_id": pid,
+                        "fecha": fecha,
+                        "delta": -cant,
+                        "origen": "VENTA",
+                        "documento_id": sale_id,
+                        "costo_unitario": dinero(costo[pid]),
+                    }
+                )
+            venta = {
+                "id": sale_id,
+                "fecha": fecha,
+                "total": dinero(total),
+                "anulada": False,
+                "motivo_anulacion": None,
+                "anulada_en": None,
+                "metodo_pago": metodo,
+            }
+            lote.sales.append(venta)
+            lote.caja.append(
+                {
+                    "tipo": "INGRESO",
+                    "concepto": "Venta",
+                    "monto": dinero(total),
+                    "fecha": fecha,
+                    "referencia": f"Venta #{sale_id}",
+                    "observacion": f"Método: {metodo}",
+                    "metodo_pago": metodo,
+                }
+            )
+            res.ventas += 1
+            res.lineas_venta += len(lineas)
+            if total and rnd.random() < volumen.anulaciones:
+                anuladas.append((venta, lineas, metodo))
+
+        # Anulaciones al final del día: el stock vuelve al costo vigente
+        for venta, lineas, metodo in anuladas:
+            cuando = venta["fecha"] + timedelta(minutes=rnd.randint(5, 60))
+            venta.update(
+                anulada=True, motivo_anulacion="Error en la venta", anulada_en=cuando
+            )
+            for pid, cant in lineas.items():
+                stock[pid] += cant
+                vendido[pid] -= cant
+                lote.kardex.append(
+                    {
+                        "product_id": pid,
+                        "fecha": cuando,
+                        "delta": cant,
+                        "origen": "ANULACION",
+                        "documento_id": venta["id"],
+                        "costo_unitario": dinero(costo[pid]),
+                    }
+                )
+            lote.caja.append(
+                {
+                    "tipo": "EGRESO",
+                    "concepto": "Anulación de venta",
+                    "monto": venta["total"],
+                    "fecha": cuando,
+                    "referencia": f"Venta #{venta['id']}",
+                    "observacion": f"Método: {metodo} | Motivo: Error en la venta",
+                    "metodo_pago": metodo,
+                }
+            )
+            res.anuladas += 1
+
+        # Gastos y aportes manuales
+        for _ in range(_cuantos(rnd, volumen.movimientos_dia)):
+            ingreso = rnd.random() < 0.3
+            lote.caja.append(
+                {
+                    "tipo": "INGRESO" if ingreso else "EGRESO",
+                    "concepto": rnd.choice(APORTES if ingreso else GASTOS),
+                    "monto": dinero(rnd.randint(5, 500) * 100_00),
+                    "fecha": apertura
+                    + timedelta(seconds=rnd.randrange(7 * 3600, 21 * 3600)),
+                    "referencia": None,
+                    "observacion": None,
+                    "metodo_pago": None,
+                }
+            )
+
+        if (n_dia + 1) % dias_por_lote == 0 or n_dia == dias - 1:
+            res.movimientos_caja += len(lote.caja)
+            lote.escribir(
+                db_factory=SessionLocal,
+                tablas=(
+                    Entry,
+                    EntryDetail,
+                    Sale,
+                    SaleDetail,
+                    InventoryMovement,
+                    CashMovement,
+                ),
+                registrar_precios=registrar_precios_compra,
+            )
+            lote = _Lote()
+            if progreso is not None:
+                progreso("Días generados", n_dia + 1, dias)
+
+    # -------- Estado final de productos (los triggers arman stock_bajo) --------
+    with SessionLocal() as db:
+        t = Product.__table__
+        db.execute(
+            update(t)
+            .where(t.c.id == bindparam("p_id"))
+            .values(stock_actual=bindparam("stock"), costo_promedio=bindparam("costo")),
+            [
+                {"p_id": pid, "stock": stock[pid], "costo": dinero(costo[pid])}
+                for pid in range(1, n_prod + 1)
+            ],
+        )
+        db.commit()
+
+    if cerrar and dias > 1:
+        cierres = cerrar_rango(desde, hasta - timedelta(days=1), cerrado_por="generador")
+        res.cierres = len(cierres)
+
+    res.segundos = time.perf_counter() - t_inicio
+    return res
+
+
+class _Lote:
+    """Filas acumuladas de varios días; se escriben en una transacción."""
+
+    def __init__(self):
+        self.entries, self.entry_details, self.compras = [], [], []
+        self.sales, self.sale_details = [], []
+        self.kardex, self.caja = [], []
+
+    def escribir(self, db_factory, tablas, registrar_precios) -> None:
+        from sqlalchemy import insert
+
+        entry, entry_detail, sale, sale_detail, kardex, caja = tablas
+        with db_factory() as db:
+            try:
+                for modelo, filas in (
+                    (entry, self.entries),
+                    (entry_detail, self.entry_details),
+                    (sale, self.sales),
+                    (sale_detail, self.sale_details),
+                    (kardex, self.kardex),
+                    (caja, self.caja),
+                ):
+                    if filas:
+                        db.execute(insert(modelo.__table__), filas)
+                registrar_precios(db, self.compras)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", required=True, help="archivo .db nuevo (no app_data/)")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="10k")
+    parser.add_argument("--anios", type=float, default=2.0)
+    parser.add_argument("--productos", type=int)
+    parser.add_argument("--proveedores", type=int)
+    parser.add_argument("--anulaciones", type=float)
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument(
+        "--hasta", type=date.fromisoformat, help="último día (AAAA-MM-DD)"
+    )
+    parser.add_argument("--sin-cierres", action="store_true")
+    args = parser.parse_args(argv)
+
+    ruta = Path(args.db)
+    if ruta.exists():
+        raise SystemExit(f"{ruta} ya existe: el generador crea una base nueva.")
+    from app.db.database import configurar_db
+
+    configurar_db(ruta)
+
+    volumen = Volumen.de_escala(ESCALAS[args.escala], anios=args.anios)
+    for campo in ("productos", "proveedores", "anulaciones"):
+        if getattr(args, campo) is not None:
+            setattr(volumen, campo, getattr(args, campo))
+
+    def _progreso(etiqueta, hechos, total):
+        if hechos == total or hechos % 60 == 0:
+            print(f"{etiqueta}: {hechos}/{total}")
+
+    res = generar(
+        volumen,
+        seed=args.semilla,
+        hasta=args.hasta,
+        cerrar=not args.sin_cierres,
+        progreso=_progreso,
+    )
+    print(
+        f"{res.desde} a {res.hasta}: {res.productos:,} productos, "
+        f"{res.proveedores:,} proveedores, {res.entradas:,} entradas "
+        f"({res.lineas_entrada:,} líneas), {res.ventas:,} ventas "
+        f"({res.lineas_venta:,} líneas, {res.anuladas:,} anuladas), "
+        f"{res.movimientos_caja:,} movimientos de caja, {res.cierres:,} cierres "
+        f"en {res.segundos:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Suite de benchmarks de los puntos de entrada de los repos, al estilo
+pytest-benchmark (sin dependencias nuevas).
+
+    python -m app.benchmarks.suite --escala 10k --escala 100k
+    python -m app.benchmarks.suite --escala 100k --guardar
+    python -m app.benchmarks.suite --escala 1m --datos /tmp/carga
+    python -m app.benchmarks.suite --escala 100k --en-memoria
+
+Por cada escala arma una base con app/benchmarks/generador.py (con
+--datos DIR la genera una sola vez y la reutiliza), la copia a un
+directorio temporal y corre cada caso --rondas veces después de una
+ronda de calentamiento: mín / mediana / media / máx en ms. Con
+--en-memoria la copia va a una base en memoria (configurar_db(MEMORIA)):
+mide el código sin el disco, y varios procesos pueden correr a la vez
+cada uno con su base.
+
+--guardar escribe los mínimos como línea base (--baseline, por defecto
+app_data/bench_baseline.json; es de cada máquina, no se versiona). Sin
+--guardar compara contra ella y sale con código 1 si algún caso quedó
+más de --tolerancia veces más lento. Se compara el mínimo: es lo más
+estable entre corridas (el ruido de la máquina solo suma tiempo).
+Nunca toca app_data/inventario.db.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from app.benchmarks.generador import ESCALAS
+
+_RAIZ = Path(__file__).resolve().parents[2]
+BASELINE_DEFAULT = _RAIZ / "app_data" / "bench_baseline.json"
+
+
+@dataclass
+class Medicion:
+    caso: str
+    tiempos_ms: list[float]
+
+    @property
+    def minimo(self) -> float:
+        return min(self.tiempos_ms)
+
+    @property
+    def mediana(self) -> float:
+        return statistics.median(self.tiempos_ms)
+
+    @property
+    def media(self) -> float:
+        return statistics.fmean(self.tiempos_ms)
+
+    @property
+    def maximo(self) -> float:
+        return max(self.tiempos_ms)
+
+
+def _casos(hasta: date) -> list[tuple[str, object]]:
+    """[(nombre, función sin argumentos)] sobre la base ya generada."""
+    from sqlalchemy import select
+
+    from app.db.cash_repo import (
+        listar_movimientos,
+        listar_movimientos_filas,
+        obtener_saldo,
+        resumen_rango,
+    )
+    from app.db.database import SessionLocal
+    from app.db.entries_repo import crear_entrada
+    from app.db.models import Product, Supplier
+    from app.db.products_repo import listar_productos, listar_productos_filas
+    from app.db.sales_repo import crear_venta, listar_ventas_pagina, totales_ventas
+
+    p, s = Product.__table__, Supplier.__table__
+    with SessionLocal() as db:
+        con_stock = db.execute(
+            select(p.c.id, p.c.precio_venta)
+            .where(p.c.stock_actual >= 10)
+            .order_by(p.c.stock_actual.desc())
+            .limit(300)
+        ).all()
+        productos = (
+            db.execute(select(p.c.id).order_by(p.c.id).limit(500)).scalars().all()
+        )
+        proveedor = db.execute(select(s.c.id).order_by(s.c.id).limit(1)).scalar()
+
+    turno = {"venta": 0, "entrada": 0}
+
+    def _venta():
+        i = turno["venta"]
+        turno["venta"] += 3
+        items = [
+            {"product_id": pid, "cantidad": 1, "precio_venta": precio}
+            for pid, precio in (con_stock[(i + k) % len(con_stock)] for k in range(3))
+        ]
+        crear_venta(items, metodo_pago="Efectivo")
+
+    def _entrada():
+        i = turno["entrada"]
+        turno["entrada"] += 25
+        items = [
+            {
+                "product_id": productos[(i + k) % len(productos)],
+                "cantidad": 10,
+                "precio_compra": 1500,
+            }
+            for k in range(25)
+        ]
+        crear_entrada(proveedor, items, pagado=True)
+
+    mes = hasta - timedelta(days=30)
+    anio = hasta - timedelta(days=365)
+    return [
+        ("obtener_saldo", obtener_saldo),
+        ("resumen_rango (mes)", lambda: resumen_rango(mes, hasta)),
+        ("resumen_rango (año)", lambda: resumen_rango(anio, hasta)),
+        ("listar_movimientos", listar_movimientos),
+        (
+            "listar_movimientos (mes, texto)",
+            lambda: listar_movimientos(
+                300, fecha_desde=mes, fecha_hasta=hasta, q="Venta"
+            ),
+        ),
+        ("listar_movimientos_filas (1000)", lambda: listar_movimientos_filas(1000)),
+        ("listar_productos", listar_productos),
+        ("listar_productos_filas", listar_productos_filas),
+        ("listar_productos (texto)", lambda: listar_productos("Producto 12")),
+        (
+            "listar_ventas_pagina (mes)",
+            lambda: listar_ventas_pagina(fecha_desde=mes, fecha_hasta=hasta),
+        ),
+        ("totales_ventas (mes)", lambda: totales_ventas(mes, hasta)),
+        ("crear_venta (3 líneas)", _venta),
+        ("crear_entrada (25 líneas)", _entrada),
+    ]
+
+
+def medir(fn, rondas: int) -> list[float]:
+    fn()  # calentamiento: imports perezosos, caché de sentencias
+    tiempos = []
+    for _ in range(rondas):
+        t0 = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return tiempos
+
+
+def _preparar_base(escala: str, destino: Path, datos: Path | None, hasta: date) -> None:
+    """Deja en `destino` una base de esa escala (generada o copiada de --datos)."""
+    from app.benchmarks.generador import Volumen, generar
+
+    from app.db.database import configurar_db
+
+    fuente = datos / f"carga_{escala}.db" if datos else destino
+    if not fuente.exists():
+        configurar_db(fuente)
+        res = generar(Volumen.de_escala(ESCALAS[escala]), hasta=hasta)
+        print(
+            f"[{escala}] generada: {res.ventas:,} ventas, {res.lineas_venta:,} líneas, "
+            f"{res.movimientos_caja:,} movimientos de caja en {res.segundos:.1f} s"
+        )
+    if fuente != destino:
+        _copiar(fuente, destino)
+
+
+def _copiar(fuente: Path, destino: Path) -> None:
+    """
+    Copia consistente con la API de backup de SQLite: incluye lo que sigue
+    en el -wal (un copy2 del archivo lo perdía si el engine que generó la
+    base seguía abierto).
+    """
+    origen = sqlite3.connect(fuente)
+    copia = sqlite3.connect(destino)
+    try:
+        origen.backup(copia)
+    finally:
+        copia.close()
+        origen.close()
+
+
+def _a_memoria(archivo: Path) -> None:
+    """Copia `archivo` a una base en memoria nueva y deja el proceso en ella."""
+    from app.db.database import MEMORIA, configurar_db
+
+    con = configurar_db(MEMORIA).raw_connection()
+    origen = sqlite3.connect(archivo)
+    try:
+        origen.backup(con.driver_connection)
+    finally:
+        origen.close()
+        con.close()
+
+
+def correr_escala(
+    escala: str, rondas: int, datos: Path | None, en_memoria: bool = False
+) -> list[Medicion]:
+    from app.db.database import configurar_db, init_db
+
+    hasta = date.today() - timedelta(days=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        destino = Path(tmp) / "bench.db"
+        _preparar_base(escala, destino, datos, hasta)
+        if en_memoria:
+            _a_memoria(destino)
+        else:
+            configurar_db(destino)
+
+        init_db()
+        mediciones = [
+            Medicion(nombre, medir(fn, rondas)) for nombre, fn in _casos(hasta)
+        ]
+        configurar_db(None)
+    return mediciones
+
+
+def _cargar_baseline(ruta: Path) -> dict:
+    if ruta.exists():
+        return json.loads(ruta.read_text(encoding="utf-8"))
+    return {"escalas": {}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--escala", action="append", choices=sorted(ESCALAS), help="repetible"
+    )
+    parser.add_argument("--rondas", type=int, default=10)
+    parser.add_argument("--datos", type=Path, help="carpeta para reutilizar las bases")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_DEFAULT)
+    parser.add_argument("--guardar", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=2.0)
+    parser.add_argument("--en-memoria", action="store_true")
+    args = parser.parse_args(argv)
+
+    escalas = args.escala or ["10k"]
+    if args.datos:
+        args.datos.mkdir(parents=True, exist_ok=True)
+    baseline = _cargar_baseline(args.baseline)
+    regresiones = []
+
+    for escala in escalas:
+        mediciones = correr_escala(escala, args.rondas, args.datos, args.en_memoria)
+        base = baseline["escalas"].get(escala, {})
+        print(
+            f"\n[{escala}] {'caso':<32} {'mín':>9} {'mediana':>9} {'media':>9} "
+            f"{'máx':>9} {'base':>9} {'x':>6}"
+        )
+        for m in mediciones:
+            ref = base.get(m.caso)
+            razon = m.minimo / ref if ref else None
+            marca = ""
+            if razon is not None and razon > args.tolerancia:
+                marca = "  <-- más lento"
+                regresiones.append((escala, m.caso, razon))
+            print(
+                f"[{escala}] {m.caso:<32} {m.minimo:9.2f} {m.mediana:9.2f} "
+                f"{m.media:9.2f} {m.maximo:9.2f} {ref or float('nan'):9.2f} "
+                f"{razon or float('nan'):6.2f}{marca}"
+            )
+        if args.guardar:
+            baseline["escalas"][escala] = {m.caso: round(m.minimo, 3) for m in mediciones}
+
+    if args.guardar:
+        baseline["maquina"] = platform.node()
+        baseline["python"] = platform.python_version()
+        baseline["guardada"] = date.today().isoformat()
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(baseline, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"\nLínea base guardada en {args.baseline}")
+        return
+
+    if regresiones:
+        print(
+            f"\n{len(regresiones)} casos más de {args.tolerancia}x "
+            "más lentos que la línea base."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+"""
+Línea de comandos para correr cierres, reportes y mantenimiento sin la
+interfaz gráfica (no importa PySide6; sirve en un servidor sin pantalla y
+en tareas programadas).
+
+    python -m app.cli cierre [--fecha 2026-03-01] [--desde F] [--por NOMBRE] [--pendientes]
+    python -m app.cli reabrir FECHA [--por NOMBRE] [--motivo TEXTO] | reabrir --listar
+    python -m app.cli resumen-caja [--desde F] [--hasta F] [--movimientos N]
+    python -m app.cli exportar {caja,productos,valoracion} [-o archivo.csv]
+    python -m app.cli backup [--listar]
+    python -m app.cli restaurar ARCHIVO
+    python -m app.cli conciliar-stock [--corregir]
+    python -m app.cli conciliar-caja [--corregir [--incluir-cerrados]]
+    python -m app.cli reindex
+    python -m app.cli vacuum
+    python -m app.cli tareas [--todas | --listar]
+
+La base es la de siempre (app_data/inventario.db), la de INVENTARIO_DB o
+la de --db (antes del comando: python -m app.cli --db otra.db cierre).
+--perfil deja en stderr, al terminar, los tiempos por función de repo y
+por consulta SQL y las consultas lentas con su plan (app/db/instrumentacion.py);
+--perfil-json ARCHIVO guarda lo mismo en JSON.
+Cada comando imprime su duración en stderr ("cli: cierre 0.42 s, código 0")
+para poder seguir los tiempos de los trabajos programados.
+Códigos de salida: 0 = ok, 1 = error (o diferencias sin corregir en
+conciliar-stock / conciliar-caja), 2 = argumentos inválidos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from datetime import date, datetime
+
+# Los repositorios (SQLAlchemy) se importan dentro de cada comando: --help
+# y los errores de argumentos responden sin cargarlos.
+
+
+def _fecha(value: str) -> date:
+    from app.utils.formatters import parse_fecha
+
+    try:
+        return parse_fecha(value).date()
+    except (ValueError, AttributeError):
+        raise argparse.ArgumentTypeError(f"Fecha inválida: {value!r} (AAAA-MM-DD)")
+
+
+def _pesos(value) -> str:
+    return f"{value:,.2f}"
+
+
+def _imprimir_resumen(data: dict) -> None:
+    print(f"Saldo inicial: {_pesos(data['saldo_inicial']):>18}")
+    print(f"Ingresos:      {_pesos(data['ingresos']):>18}")
+    print(f"Egresos:       {_pesos(data['egresos']):>18}")
+    print(f"Saldo final:   {_pesos(data['saldo_final']):>18}")
+    por_metodo = data.get("por_metodo")
+    if por_metodo:
+        print(f"\n{'Método':<15} {'Ingresos':>15} {'Egresos':>15} {'Neto':>15}")
+        for metodo, s in por_metodo.items():
+            print(
+                f"{metodo or 'Sin método':<15} {_pesos(s['ingresos']):>15} "
+                f"{_pesos(s['egresos']):>15} {_pesos(s['neto']):>15}"
+            )
+
+
+# ----------------------------
+# Caja
+# ----------------------------
+def cmd_cierre(args) -> int:
+    from app.db.cash_repo import (
+        cerrar_dia,
+        cerrar_dias_pendientes,
+        cerrar_rango,
+        dias_reabiertos,
+    )
+
+    if args.pendientes:
+        cierres = cerrar_dias_pendientes(hasta=args.fecha, cerrado_por=args.por)
+        for c in cierres:
+            print(f"Día {c.fecha} cerrado. Saldo final: {_pesos(c.saldo_final)}")
+        if not cierres:
+            print("No hay días pendientes de cierre.")
+        reabiertos = dias_reabiertos(args.fecha)
+        if reabiertos:
+            print(
+                "Reabiertos sin cerrar (no se cierran solos): "
+                + ", ".join(str(d) for d in reabiertos)
+            )
+        return 0
+
+    if args.desde:
+        hasta = args.fecha or date.today()
+        cierres = cerrar_rango(args.desde, hasta, cerrado_por=args.por)
+        print(f"{len(cierres)} días cerrados.")
+        if cierres:
+            ultimo = cierres[-1]
+            print(f"Saldo final al {ultimo.fecha}: {_pesos(ultimo.saldo_final)}")
+        return 0
+
+    d = args.fecha or date.today()
+    c = cerrar_dia(d, cerrado_por=args.por)
+    print(f"Día {d} cerrado.")
+    _imprimir_resumen(
+        {
+            "saldo_inicial": c.saldo_inicial,
+            "ingresos": c.total_ingresos,
+            "egresos": c.total_egresos,
+            "saldo_final": c.saldo_final,
+        }
+    )
+    return 0
+
+
+def cmd_reabrir(args) -> int:
+    from app.db.cash_repo import dias_reabiertos, listar_reaperturas, reabrir_dia
+
+    if args.listar:
+        reaperturas = listar_reaperturas()
+        for r in reaperturas:
+            print(
+                f"{r.reabierto_en:%Y-%m-%d %H:%M}  día {r.fecha}  "
+                f"saldo final {_pesos(r.saldo_final):>15}  "
+                f"ajuste {_pesos(r.ajuste):>12} ({r.cierres_ajustados} cierres)  "
+                f"{r.reabierto_por or '-'}: {r.motivo or ''}".rstrip()
+            )
+        if not reaperturas:
+            print("No hay días reabiertos.")
+        reabiertos = dias_reabiertos(date.today())
+        if reabiertos:
+            print("Siguen sin cerrar: " + ", ".join(str(d) for d in reabiertos))
+        return 0
+
+    if args.fecha is None:
+        print("Falta la fecha a reabrir.", file=sys.stderr)
+        return 2
+    r = reabrir_dia(args.fecha, reabierto_por=args.por, motivo=args.motivo)
+    print(f"Día {r.fecha} reabierto (saldo final era {_pesos(r.saldo_final)}).")
+    if r.cierres_ajustados:
+        print(
+            f"{r.cierres_ajustados} cierres posteriores ajustados en {_pesos(r.ajuste)}."
+        )
+    return 0
+
+
+def cmd_resumen_caja(args) -> int:
+    from app.db.cash_repo import (
+        esta_cerrado,
+        listar_movimientos_filas,
+        obtener_saldo,
+        resumen_del_dia,
+        resumen_rango,
+    )
+
+    d1 = args.desde or args.hasta or date.today()
+    d2 = args.hasta or d1
+    if d1 == d2:
+        estado = "CERRADO" if esta_cerrado(d1) else "ABIERTO"
+        print(f"Día {d1} ({estado})")
+        _imprimir_resumen(resumen_del_dia(d1))
+    else:
+        print(f"Rango {min(d1, d2)} a {max(d1, d2)}")
+        _imprimir_resumen(resumen_rango(d1, d2))
+    print(f"Saldo actual:  {_pesos(obtener_saldo()):>18}")
+
+    if args.movimientos:
+        print()
+        for m in listar_movimientos_filas(
+            args.movimientos, fecha_desde=min(d1, d2), fecha_hasta=max(d1, d2)
+        ):
+            print(
+                f"{m.id:>7}  {m.fecha:%Y-%m-%d %H:%M}  {m.tipo:<7} "
+                f"{_pesos(m.monto):>15}  {m.concepto}"
+                + (f" ({m.referencia})" if m.referencia else "")
+            )
+    return 0
+
+
+# ----------------------------
+# Exportaciones (CSV)
+# ----------------------------
+def _filas_caja(args):
+    from app.db.cash_repo import listar_movimientos_filas
+
+    d1 = args.desde or args.hasta or date.today()
+    d2 = args.hasta or d1
+    movs = listar_movimientos_filas(
+        sys.maxsize, fecha_desde=min(d1, d2), fecha_hasta=max(d1, d2)
+    )
+    yield ["id", "fecha", "tipo", "concepto", "monto", "referencia", "observacion"]
+    for m in reversed(movs):
+        yield [
+            m.id,
+            m.fecha.isoformat(sep=" ", timespec="seconds"),
+            m.tipo,
+            m.concepto,
+            m.monto,
+            m.referencia or "",
+            m.observacion or "",
+        ]
+
+
+def _filas_productos(args):
+    from sqlalchemy import select
+
+    from app.db.database import SessionLocal
+    from app.db.models import Product
+
+    p = Product.__table__
+    with SessionLocal() as db:
+        filas = db.execute(
+            select(
+                p.c.id,
+                p.c.codigo,
+                p.c.nombre,
+                p.c.unidad,
+                p.c.precio_venta,
+                p.c.costo_promedio,
+                p.c.stock_actual,
+                p.c.stock_minimo,
+                p.c.activo,
+            ).order_by(p.c.codigo)
+        ).all()
+    yield [
+        "id",
+        "codigo",
+        "nombre",
+        "unidad",
+        "precio_venta",
+        "costo_promedio",
+        "stock_actual",
+        "stock_minimo",
+        "activo",
+    ]
+    for pid, codigo, nombre, unidad, precio, costo, stock, minimo, activo in filas:
+        yield [
+            pid,
+            codigo,
+            nombre,
+            unidad or "",
+            precio,
+            costo,
+            stock or 0.0,
+            minimo or 0.0,
+            1 if activo or activo is None else 0,
+        ]
+
+
+def _filas_valoracion(args):
+    from datetime import time as dtime
+
+    from app.db.inventory_repo import valoracion_a_fecha
+
+    d = args.hasta or date.today()
+    yield ["id", "codigo", "nombre", "stock", "costo_promedio", "valor"]
+    for v in valoracion_a_fecha(datetime.combine(d, dtime.max)):
+        yield [v.product_id, v.codigo, v.nombre, v.stock, v.costo_promedio, v.valor]
+
+
+_EXPORTACIONES = {
+    "caja": _filas_caja,
+    "productos": _filas_productos,
+    "valoracion": _filas_valoracion,
+}
+
+
+def cmd_exportar(args) -> int:
+    filas = _EXPORTACIONES[args.que](args)
+    if args.salida in (None, "-"):
+        n = _escribir_csv(filas, sys.stdout)
+    else:
+        # utf-8-sig: Excel reconoce las tildes al abrirlo
+        with open(args.salida, "w", newline="", encoding="utf-8-sig") as f:
+            n = _escribir_csv(filas, f)
+        print(f"{n} filas exportadas a {args.salida}", file=sys.stderr)
+    return 0
+
+
+def _escribir_csv(filas, f) -> int:
+    w = csv.writer(f)
+    n = -1  # sin contar el encabezado
+    for fila in filas:
+        w.writerow(fila)
+        n += 1
+    return n
+
+
+# ----------------------------
+# Backups
+# ----------------------------
+def cmd_backup(args) -> int:
+    from app.db.database import get_db_path
+    from app.utils.backup import crear_backup, listar_backups
+
+    if args.listar:
+        for ruta in listar_backups(str(get_db_path())):
+            print(ruta)
+        return 0
+    print(crear_backup(str(get_db_path()), max_backups=args.max))
+    return 0
+
+
+def cmd_restaurar(args) -> int:
+    from app.db.database import get_db_path
+    from app.utils.backup import restaurar_backup
+
+    anterior = restaurar_backup(args.archivo, str(get_db_path()))
+    if anterior:
+        print(f"Base anterior respaldada en: {anterior}")
+    print(f"Base restaurada desde: {args.archivo}")
+    return 0
+
+
+# ----------------------------
+# Mantenimiento
+# ----------------------------
+def cmd_conciliar_stock(args) -> int:
+    from app.db.inventory_repo import conciliar_stock
+
+    diferencias = conciliar_stock(corregir=args.corregir)
+    for d in diferencias:
+        print(
+            f"{d.codigo:<15} {d.nombre[:40]:<40} "
+            f"actual {d.stock_actual:>12,.2f}  kardex {d.stock_kardex:>12,.2f}"
+        )
+    if not diferencias:
+        print("El stock cuadra con el kardex.")
+        return 0
+    if args.corregir:
+        print(f"{len(diferencias)} productos corregidos.")
+        return 0
+    print(f"{len(diferencias)} productos no cuadran (usa --corregir).")
+    return 1
+
+
+def cmd_conciliar_caja(args) -> int:
+    from app.db.cash_repo import conciliar_caja
+
+    duplicados = conciliar_caja(
+        corregir=args.corregir, incluir_cerrados=args.incluir_cerrados
+    )
+    for d in duplicados:
+        sobran = ", ".join(f"#{i}" for i in d.sobrantes)
+        cerrado = f"  días cerrados: {', '.join(map(str, d.dias_cerrados))}"
+        print(
+            f"{d.referencia:<15} {d.tipo:<7} {_pesos(d.monto):>15}  "
+            f"conserva #{d.conservado_id}, sobran {sobran}"
+            + (cerrado if d.dias_cerrados else "")
+            + ("  (corregido)" if d.corregido else "")
+        )
+    if not duplicados:
+        print("No hay movimientos de caja duplicados.")
+        return 0
+    pendientes = [d for d in duplicados if not d.corregido]
+    if args.corregir:
+        print(f"{len(duplicados) - len(pendientes)} documentos corregidos.")
+        if pendientes:
+            print(f"{len(pendientes)} en días cerrados (usa --incluir-cerrados).")
+        return 1 if pendientes else 0
+    print(f"{len(duplicados)} documentos con movimientos repetidos (usa --corregir).")
+    return 1
+
+
+def cmd_reindex(args) -> int:
+    from app.db.maintenance import reindexar
+
+    reindexar()
+    print("Índices reconstruidos y estadísticas actualizadas.")
+    return 0
+
+
+def cmd_vacuum(args) -> int:
+    from app.db.maintenance import compactar
+
+    antes, despues = compactar()
+    print(f"{antes / 1e6:,.1f} MB -> {despues / 1e6:,.1f} MB")
+    return 0
+
+
+def cmd_tareas(args) -> int:
+    from app.db import jobs
+
+    if args.listar:
+        ultimas = jobs.ultimas_ejecuciones()
+        for t in jobs.TAREAS:
+            u = ultimas.get(t.nombre)
+            if u is None:
+                print(f"{t.nombre:<18} nunca")
+                continue
+            print(
+                f"{t.nombre:<18} {u.ultima_ejecucion:%Y-%m-%d %H:%M}  "
+                f"{u.duracion_ms:>9.0f} ms  {'ok' if u.ok else 'ERROR'}  "
+                f"{u.mensaje or ''}"
+            )
+        return 0
+
+    resultados = jobs.ejecutar_vencidas(todas=args.todas)
+    for r in resultados:
+        print(
+            f"{r.nombre:<18} {r.duracion_ms:>9.0f} ms  "
+            f"{'ok' if r.ok else 'ERROR'}  {r.mensaje or ''}"
+        )
+    if not resultados:
+        print("Ninguna tarea vencida.")
+    return 0 if all(r.ok for r in resultados) else 1
+
+
+# ----------------------------
+# Entrada
+# ----------------------------
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli",
+        description="Cierres, reportes y mantenimiento sin interfaz gráfica.",
+    )
+    parser.add_argument("--db", help="archivo de la base (por defecto INVENTARIO_DB o app_data)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="reporta tiempos por función y por consulta en stderr")
+    parser.add_argument("--perfil-json", metavar="ARCHIVO",
+                        help="guarda los tiempos por función y por consulta en JSON")
+    sub = parser.add_subparsers(dest="comando", required=True, metavar="COMANDO")
+
+    p = sub.add_parser("cierre", help="cierra la caja de un día (por defecto hoy)")
+    p.add_argument("--fecha", type=_fecha)
+    p.add_argument("--por", help="quién cierra")
+    p.add_argument("--desde", type=_fecha,
+                   help="cierra los días abiertos de --desde a --fecha de una vez")
+    p.add_argument("--pendientes", action="store_true",
+                   help="cierra en orden los días anteriores que quedaron "
+                        "abiertos (hasta --fecha, por defecto ayer)")
+    p.set_defaults(fn=cmd_cierre, usa_db=True)
+
+    p = sub.add_parser("reabrir", help="reabre un día cerrado (queda registrado)")
+    p.add_argument("fecha", type=_fecha, nargs="?")
+    p.add_argument("--por", help="quién reabre")
+    p.add_argument("--motivo")
+    p.add_argument("--listar", action="store_true", help="últimas reaperturas")
+    p.set_defaults(fn=cmd_reabrir, usa_db=True)
+
+    p = sub.add_parser("resumen-caja", help="saldos de un día o de un rango")
+    p.add_argument("--desde", type=_fecha)
+    p.add_argument("--hasta", type=_fecha)
+    p.add_argument("--movimientos", type=int, default=0, metavar="N",
+                   help="lista además los últimos N movimientos")
+    p.set_defaults(fn=cmd_resumen_caja, usa_db=True)
+
+    p = sub.add_parser("exportar", help="exporta a CSV")
+    p.add_argument("que", choices=sorted(_EXPORTACIONES))
+    p.add_argument("--desde", type=_fecha, help="caja: desde (por defecto hoy)")
+    p.add_argument("--hasta", type=_fecha,
+                   help="caja: hasta; valoracion: fecha de corte (por defecto hoy)")
+    p.add_argument("-o", "--salida", help="archivo .csv (por defecto stdout)")
+    p.set_defaults(fn=cmd_exportar, usa_db=True)
+
+    p = sub.add_parser("backup", help="copia la base a app_data/backups/")
+    p.add_argument("--max", type=int, default=10, help="backups a conservar")
+    p.add_argument("--listar", action="store_true", help="solo lista los backups")
+    p.set_defaults(fn=cmd_backup, usa_db=False)
+
+    p = sub.add_parser("restaurar", help="reemplaza la base por un backup")
+    p.add_argument("archivo")
+    p.set_defaults(fn=cmd_restaurar, usa_db=False)
+
+    p = sub.add_parser("conciliar-stock", help="compara el stock con el kardex")
+    p.add_argument("--corregir", action="store_true")
+    p.set_defaults(fn=cmd_conciliar_stock, usa_db=True)
+
+    p = sub.add_parser(
+        "conciliar-caja", help="busca movimientos de caja duplicados por documento"
+    )
+    p.add_argument("--corregir", action="store_true")
+    p.add_argument(
+        "--incluir-cerrados",
+        action="store_true",
+        help="corrige también días cerrados (ajusta sus cierres)",
+    )
+    p.set_defaults(fn=cmd_conciliar_caja, usa_db=True)
+
+    p = sub.add_parser("reindex", help="REINDEX + ANALYZE")
+    p.set_defaults(fn=cmd_reindex, usa_db=True)
+
+    p = sub.add_parser("vacuum", help="compacta el archivo de la base")
+    p.set_defaults(fn=cmd_vacuum, usa_db=True)
+
+    p = sub.add_parser("tareas", help="corre las tareas automáticas vencidas")
+    p.add_argument("--todas", action="store_true", help="aunque no estén vencidas")
+    p.add_argument("--listar", action="store_true", help="última corrida de cada una")
+    p.set_defaults(fn=cmd_tareas, usa_db=True)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _parser().parse_args(argv)
+
+    perfil = args.perfil or args.perfil_json
+    if perfil:
+        from app.db import instrumentacion
+
+        instrumentacion.activar()
+
+    t0 = time.perf_counter()
+    try:
+        if args.db:
+            from app.db.database import configurar_db
+
+            configurar_db(args.db)
+        if args.usa_db:
+            from app.db.database import init_db
+
+            init_db()
+        codigo = args.fn(args)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        codigo = 1
+
+    print(
+        f"cli: {args.comando} {time.perf_counter() - t0:.2f} s, código {codigo}",
+        file=sys.stderr,
+    )
+    if args.perfil:
+        print(instrumentacion.reporte(), file=sys.stderr)
+    if args.perfil_json:
+        instrumentacion.volcar_json(args.perfil_json)
+    return codigo
+
+
+if __name__ == "__main__":
+    sys.exit(main())
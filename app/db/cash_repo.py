@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, date, time, timedelta
+from typing import NamedTuple
 
-from sqlalchemy import func, or_
+from sqlalchemy import case, delete, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
-from app.db.database import SessionLocal
-from app.db.models import CashMovement, CashClosure
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.models import CashMovement, CashClosure, ReaperturaCaja, VersionCache
+from app.db.events import encolar, MovimientoCajaAgregado, DiaCerrado, DiaReabierto
+from app.db.inventory_repo import guardar_checkpoints
+from app.utils.dinero import Dinero
 
 
 def _today_date() -> date:
@@ -21,50 +29,153 @@ def _dt_range(d: date):
 # ----------------------------
 # Cierres
 # ----------------------------
-def esta_cerrado(d: date) -> bool:
-    with SessionLocal() as db:
-        c = db.query(CashClosure).filter(CashClosure.fecha == d).first()
-        return c is not None
+# Días cerrados en memoria: (engine, versión, días). Se consultan en cada
+# movimiento y casi nunca cambian. cache_versiones['cierres'] la suben
+# triggers con cada alta/baja de cierre (también de otro proceso): leer esa
+# fila alcanza para saber si el conjunto sigue vigente.
+_cierres: tuple[object, int, frozenset[date]] | None = None
+
+_VERSION_CIERRES = select(VersionCache.version).where(VersionCache.nombre == "cierres")
+
+
+def _dias_cerrados(db, verificar: bool = True) -> frozenset[date]:
+    """verificar=False: sin ir a la base si ya está cargado (camino de escritura)."""
+    global _cierres
+    motor = db.get_bind()
+    cache = _cierres
+    if cache is not None and cache[0] is motor and not verificar:
+        return cache[2]
+    # primero la versión: si otro cierra en el medio, solo se recarga de más
+    version = db.execute(_VERSION_CIERRES).scalar() or 0
+    if cache is None or cache[0] is not motor or cache[1] != version:
+        dias = frozenset(db.execute(select(CashClosure.fecha)).scalars())
+        cache = _cierres = (motor, version, dias)
+    return cache[2]
+
+
+def invalidar_cierres() -> None:
+    """Para quien cierre o reabra días: la próxima consulta recarga."""
+    global _cierres
+    _cierres = None
+
+
+def _verificar_abierto(db, dia: date) -> None:
+    # Abierto según memoria: sin consulta (si otro proceso lo cerró, lo ataja
+    # el trigger trg_caja_dia_cerrado). Cerrado: se confirma con la versión,
+    # por si otro proceso lo reabrió.
+    if dia in _dias_cerrados(db, verificar=False) and dia in _dias_cerrados(db):
+        raise ValueError(
+            f"El día {dia} está cerrado. No se pueden registrar movimientos."
+        )
+
+
+@medido
+def esta_cerrado(d: date, *, db: Session | None = None) -> bool:
+    with sesion(db) as db:
+        return d in _dias_cerrados(db)
+
+
+@medido
+def dias_cerrados(*, db: Session | None = None) -> frozenset[date]:
+    with sesion(db) as db:
+        return _dias_cerrados(db)
+
 
+@medido
+def obtener_movimiento(
+    mov_id: int,
+    *,
+    db: Session | None = None,
+) -> CashMovement | None:
+    with sesion(db) as db:
+        return db.query(CashMovement).filter(CashMovement.id == int(mov_id)).first()
 
-def obtener_cierre(d: date) -> CashClosure | None:
-    with SessionLocal() as db:
+
+@medido
+def obtener_cierre(d: date, *, db: Session | None = None) -> CashClosure | None:
+    with sesion(db) as db:
         return db.query(CashClosure).filter(CashClosure.fecha == d).first()
 
 
 # ----------------------------
 # Saldos / Listados
 # ----------------------------
-def obtener_saldo(hasta: datetime | None = None) -> float:
+def _suma_tipo(tipo: str):
+    return func.coalesce(
+        func.sum(case((CashMovement.tipo == tipo, CashMovement.monto))), 0
+    )
+
+
+def _sumas_por_tipo(db, desde: datetime | None, hasta: datetime | None):
+    """(ingresos, egresos) en UNA consulta; sumas enteras en centavos."""
+    q = db.query(_suma_tipo("INGRESO"), _suma_tipo("EGRESO"))
+    if desde is not None:
+        q = q.filter(CashMovement.fecha >= desde)
+    if hasta is not None:
+        q = q.filter(CashMovement.fecha <= hasta)
+    ingresos, egresos = q.one()
+    return ingresos or Dinero(), egresos or Dinero()
+
+
+def _sumas_por_metodo(db, desde: datetime, hasta: datetime) -> dict:
+    """{metodo_pago: (ingresos, egresos)} en UNA consulta agrupada."""
+    filas = (
+        db.query(CashMovement.metodo_pago, _suma_tipo("INGRESO"), _suma_tipo("EGRESO"))
+        .filter(CashMovement.fecha >= desde, CashMovement.fecha <= hasta)
+        .group_by(CashMovement.metodo_pago)
+        .all()
+    )
+    return {metodo: (ing or Dinero(), egr or Dinero()) for metodo, ing, egr in filas}
+
+
+def _saldo_antes_de(db, d: date) -> Dinero:
     """
-    Saldo = sum(INGRESO) - sum(EGRESO).
-    Si hasta viene, calcula saldo acumulado hasta esa fecha/hora (incluye <= hasta).
+    Saldo al final del día anterior a `d`. Parte del saldo_final del último
+    cierre previo y suma solo los movimientos posteriores a él (sin cierres,
+    recorre todo el histórico).
     """
-    with SessionLocal() as db:
-        q = db.query(CashMovement)
-        if hasta is not None:
-            q = q.filter(CashMovement.fecha <= hasta)
+    cierre = (
+        db.query(CashClosure.fecha, CashClosure.saldo_final)
+        .filter(CashClosure.fecha < d)
+        .order_by(CashClosure.fecha.desc())
+        .first()
+    )
+    desde, base = None, Dinero()
+    if cierre is not None:
+        desde = datetime.combine(cierre.fecha + timedelta(days=1), time.min)
+        base = cierre.saldo_final or Dinero()
+    if desde is not None and desde.date() >= d:
+        return base
+    ingresos, egresos = _sumas_por_tipo(
+        db, desde, datetime.combine(d - timedelta(days=1), time.max)
+    )
+    return base + ingresos - egresos
 
-        ingresos = (
-            q.filter(CashMovement.tipo == "INGRESO")
-            .with_entities(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .scalar()
-        )
-        egresos = (
-            q.filter(CashMovement.tipo == "EGRESO")
-            .with_entities(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .scalar()
-        )
 
-        return float(ingresos or 0.0) - float(egresos or 0.0)
+@medido
+def obtener_saldo(
+    hasta: datetime | None = None,
+    *,
+    db: Session | None = None,
+) -> Dinero:
+    """
+    Saldo = sum(INGRESO) - sum(EGRESO).
+    Si hasta viene, calcula saldo acumulado hasta esa fecha/hora (incluye <= hasta).
+    """
+    with sesion(db) as db:
+        ingresos, egresos = _sumas_por_tipo(db, None, hasta)
+        return ingresos - egresos
 
 
+@medido
 def listar_movimientos(
     limit: int = 300,
     fecha_desde: date | None = None,
     fecha_hasta: date | None = None,
     tipo: str | None = None,
     q: str | None = None,
+    *,
+    db: Session | None = None,
 ) -> list[CashMovement]:
     """
     Lista movimientos con filtros:
@@ -72,73 +183,101 @@ def listar_movimientos(
     - tipo: INGRESO/EGRESO
     - q: texto que busca en concepto/referencia/observacion
     """
-    with SessionLocal() as db:
-        query = db.query(CashMovement)
+    with sesion(db) as db:
+        return (
+            db.query(CashMovement)
+            .filter(*_filtros_movimientos(fecha_desde, fecha_hasta, tipo, q))
+            .order_by(CashMovement.id.desc())
+            .limit(limit)
+            .all()
+        )
 
-        if fecha_desde:
-            query = query.filter(
-                CashMovement.fecha >= datetime.combine(fecha_desde, time.min)
-            )
-        if fecha_hasta:
-            query = query.filter(
-                CashMovement.fecha <= datetime.combine(fecha_hasta, time.max)
-            )
 
-        if tipo and tipo.strip():
-            query = query.filter(CashMovement.tipo == tipo.strip().upper())
+class FilaMovimiento(NamedTuple):
+    """Movimiento para listados: solo lectura, sin sesión ni identity map."""
 
-        if q and q.strip():
-            term = f"%{q.strip()}%"
-            query = query.filter(
-                or_(
-                    CashMovement.concepto.ilike(term),
-                    CashMovement.referencia.ilike(term),
-                    CashMovement.observacion.ilike(term),
-                )
-            )
+    id: int
+    tipo: str
+    concepto: str | None
+    monto: Dinero
+    fecha: datetime
+    referencia: str | None
+    observacion: str | None
+
+
+_COLS_MOVIMIENTO = [CashMovement.__table__.c[f] for f in FilaMovimiento._fields]
 
-        return query.order_by(CashMovement.id.desc()).limit(limit).all()
+
+@medido
+def listar_movimientos_filas(
+    limit: int = 300,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    tipo: str | None = None,
+    q: str | None = None,
+    *,
+    db: Session | None = None,
+) -> list[FilaMovimiento]:
+    """
+    Como listar_movimientos, pero solo las columnas de la grilla en tuplas:
+    sin armar entidades ORM (más rápido y mucho menos memoria en listas
+    largas). Para editar un movimiento, obtener_movimiento(id).
+    """
+    stmt = (
+        select(*_COLS_MOVIMIENTO)
+        .where(*_filtros_movimientos(fecha_desde, fecha_hasta, tipo, q))
+        .order_by(CashMovement.id.desc())
+        .limit(limit)
+    )
+    with sesion(db) as db:
+        return [FilaMovimiento._make(r) for r in db.execute(stmt)]
+
+
+def _filtros_movimientos(fecha_desde, fecha_hasta, tipo, q) -> list:
+    filtros = []
+    if fecha_desde:
+        filtros.append(CashMovement.fecha >= datetime.combine(fecha_desde, time.min))
+    if fecha_hasta:
+        filtros.append(CashMovement.fecha <= datetime.combine(fecha_hasta, time.max))
+
+    if tipo and tipo.strip():
+        filtros.append(CashMovement.tipo == tipo.strip().upper())
+
+    if q and q.strip():
+        term = f"%{q.strip()}%"
+        filtros.append(
+            or_(
+                CashMovement.concepto.ilike(term),
+                CashMovement.referencia.ilike(term),
+                CashMovement.observacion.ilike(term),
+            )
+        )
+    return filtros
 
 
 # ----------------------------
 # Registrar movimiento (transacción propia)
 # ----------------------------
+@medido
 def registrar_movimiento(
     tipo: str,
     concepto: str,
-    monto: float,
+    monto: Dinero | float,
     referencia: str | None = None,
     observacion: str | None = None,
     fecha: datetime | None = None,
+    metodo_pago: str | None = None,
+    *,
+    db: Session | None = None,
 ) -> CashMovement:
     """
     Registra movimiento en caja (transacción propia).
     BLOQUEA si el día está cerrado.
     """
-    tipo = (tipo or "").strip().upper()
-    if tipo not in ("INGRESO", "EGRESO"):
-        raise ValueError("Tipo inválido. Use INGRESO o EGRESO.")
-    if float(monto or 0) <= 0:
-        raise ValueError("Monto debe ser > 0.")
-
-    fecha = fecha or datetime.now()
-    dia = fecha.date()
-
-    if esta_cerrado(dia):
-        raise ValueError(
-            f"El día {dia} está cerrado. No se pueden registrar movimientos."
-        )
-
-    with SessionLocal() as db:
-        mov = CashMovement(
-            tipo=tipo,
-            concepto=(concepto or "").strip() or ("Movimiento " + tipo),
-            monto=float(monto),
-            referencia=(referencia or "").strip() or None,
-            observacion=(observacion or "").strip() or None,
-            fecha=fecha,
+    with sesion(db) as db:
+        mov = registrar_movimiento_en_db(
+            db, tipo, concepto, monto, referencia, observacion, fecha, metodo_pago
         )
-        db.add(mov)
         db.commit()
         db.refresh(mov)
         return mov
@@ -151,10 +290,11 @@ def registrar_movimiento_en_db(
     db,
     tipo: str,
     concepto: str,
-    monto: float,
+    monto: Dinero | float,
     referencia: str | None = None,
     observacion: str | None = None,
     fecha: datetime | None = None,
+    metodo_pago: str | None = None,
 ) -> CashMovement:
     """
     Registra movimiento usando el mismo 'db' (misma transacción).
@@ -163,98 +303,394 @@ def registrar_movimiento_en_db(
     tipo = (tipo or "").strip().upper()
     if tipo not in ("INGRESO", "EGRESO"):
         raise ValueError("Tipo inválido. Use INGRESO o EGRESO.")
-    if float(monto or 0) <= 0:
+    monto = Dinero(monto)
+    if monto <= 0:
         raise ValueError("Monto debe ser > 0.")
 
     fecha = fecha or datetime.now()
     dia = fecha.date()
-
-    c = db.query(CashClosure).filter(CashClosure.fecha == dia).first()
-    if c:
-        raise ValueError(
-            f"El día {dia} está cerrado. No se pueden registrar movimientos."
-        )
+    _verificar_abierto(db, dia)
 
     mov = CashMovement(
         tipo=tipo,
         concepto=(concepto or "").strip() or ("Movimiento " + tipo),
-        monto=float(monto),
+        monto=monto,
         referencia=(referencia or "").strip() or None,
         observacion=(observacion or "").strip() or None,
         fecha=fecha,
+        metodo_pago=(metodo_pago or "").strip() or None,
     )
     db.add(mov)
+    try:
+        db.flush()  # id para el evento
+    except IntegrityError as e:
+        if "DIA_CERRADO" not in str(e):
+            raise
+        invalidar_cierres()
+        raise ValueError(
+            f"El día {dia} está cerrado. No se pueden registrar movimientos."
+        ) from e
+    encolar(db, _evento_movimiento(mov))
     return mov
 
 
+def _evento_movimiento(mov: CashMovement) -> MovimientoCajaAgregado:
+    return MovimientoCajaAgregado(
+        movimiento_id=mov.id,
+        tipo=mov.tipo,
+        monto=mov.monto,
+        fecha=mov.fecha,
+    )
+
+
 # ----------------------------
 # Resumen + Cierre diario
 # ----------------------------
-def resumen_del_dia(d: date) -> dict:
+@medido
+def resumen_del_dia(d: date, *, db: Session | None = None) -> dict:
     """
     Retorna:
     - ingresos, egresos del día
     - saldo_inicial (saldo hasta el día anterior 23:59:59)
     - saldo_final (saldo_inicial + ingresos - egresos)
+    - por_metodo: {metodo_pago: {"ingresos", "egresos", "neto"}} para
+      cuadrar cada medio de pago (None = movimientos sin método)
     """
     start, end = _dt_range(d)
 
-    with SessionLocal() as db:
-        ingresos = (
-            db.query(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .filter(CashMovement.tipo == "INGRESO")
-            .filter(CashMovement.fecha >= start, CashMovement.fecha <= end)
-            .scalar()
-        )
-        egresos = (
-            db.query(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .filter(CashMovement.tipo == "EGRESO")
-            .filter(CashMovement.fecha >= start, CashMovement.fecha <= end)
-            .scalar()
-        )
+    with sesion(db) as db:
+        # Los totales salen de la misma consulta agrupada por método
+        sumas = _sumas_por_metodo(db, start, end)
+        # saldo inicial: saldo hasta el día anterior (desde el último cierre)
+        saldo_inicial = _saldo_antes_de(db, d)
 
-    # saldo inicial: saldo hasta el día anterior
-    saldo_inicial = obtener_saldo(
-        hasta=datetime.combine(d, time.min) - timedelta(seconds=1)
-    )
-    ingresos = float(ingresos or 0.0)
-    egresos = float(egresos or 0.0)
-    saldo_final = float(saldo_inicial) + ingresos - egresos
+    ingresos = sum((ing for ing, _ in sumas.values()), Dinero())
+    egresos = sum((egr for _, egr in sumas.values()), Dinero())
+    saldo_final = saldo_inicial + ingresos - egresos
 
     return {
         "fecha": d,
         "ingresos": ingresos,
         "egresos": egresos,
-        "saldo_inicial": float(saldo_inicial),
-        "saldo_final": float(saldo_final),
+        "saldo_inicial": saldo_inicial,
+        "saldo_final": saldo_final,
+        "por_metodo": {
+            metodo: {"ingresos": ing, "egresos": egr, "neto": ing - egr}
+            for metodo, (ing, egr) in sorted(
+                sumas.items(), key=lambda kv: (kv[0] is None, kv[0] or "")
+            )
+        },
     }
 
 
-def cerrar_dia(d: date, cerrado_por: str | None = None) -> CashClosure:
+@medido
+def cerrar_dia(
+    d: date,
+    cerrado_por: str | None = None,
+    *,
+    db: Session | None = None,
+) -> CashClosure:
     """
     Crea un cierre diario. Si ya existe, error.
+    También deja el snapshot de stock/valoración de ese día.
     """
-    if esta_cerrado(d):
+    if esta_cerrado(d, db=db):
         raise ValueError(f"El día {d} ya está cerrado.")
 
-    data = resumen_del_dia(d)
+    cierres = cerrar_rango(d, d, cerrado_por=cerrado_por, db=db)
+    if not cierres:
+        # Lo cerró otro (p. ej. el cierre automático) entre la consulta y aquí
+        raise ValueError(f"El día {d} ya está cerrado.")
+    return cierres[0]
+
 
-    with SessionLocal() as db:
-        c = CashClosure(
-            fecha=d,
-            total_ingresos=data["ingresos"],
-            total_egresos=data["egresos"],
-            saldo_inicial=data["saldo_inicial"],
-            saldo_final=data["saldo_final"],
-            cerrado_por=(cerrado_por or "").strip() or None,
+@medido
+def cerrar_rango(
+    d1: date,
+    d2: date,
+    cerrado_por: str | None = None,
+    *,
+    db: Session | None = None,
+) -> list[CashClosure]:
+    """
+    Cierra todos los días abiertos de [d1, d2] en una sola transacción:
+    - ingresos/egresos de cada día con UNA consulta agrupada por día;
+    - saldo_inicial -> saldo_final encadenados en memoria, partiendo del
+      saldo antes de d1 (los días ya cerrados del rango se respetan y su
+      saldo_final sigue la cadena);
+    - un solo INSERT (executemany) para todos los cierres;
+    - si hay cierres después de d2 (se cerró un día reabierto), su saldo se
+      corre con un solo UPDATE (ver _propagar_saldo).
+    El snapshot de stock/valoración se deja al final del último día cerrado,
+    en la misma transacción (las consultas a fechas intermedias re-aplican
+    el kardex desde ahí).
+    Retorna los cierres creados, en orden.
+    """
+    if d2 < d1:
+        d1, d2 = d2, d1
+    start = datetime.combine(d1, time.min)
+    end = datetime.combine(d2, time.max)
+    dia = func.date(CashMovement.fecha)
+
+    with sesion(db) as db:
+        try:
+            saldo = _saldo_antes_de(db, d1)
+            cerrados = dict(
+                db.query(CashClosure.fecha, CashClosure.saldo_final).filter(
+                    CashClosure.fecha >= d1, CashClosure.fecha <= d2
+                )
+            )
+            sumas = {
+                date.fromisoformat(d): (ingresos or Dinero(), egresos or Dinero())
+                for d, ingresos, egresos in db.query(
+                    dia, _suma_tipo("INGRESO"), _suma_tipo("EGRESO")
+                )
+                .filter(CashMovement.fecha >= start, CashMovement.fecha <= end)
+                .group_by(dia)
+            }
+
+            quien = (cerrado_por or "").strip() or None
+            filas = []
+            d = d1
+            while d <= d2:
+                if d in cerrados:
+                    saldo = cerrados[d] or Dinero()
+                else:
+                    ingresos, egresos = sumas.get(d, (Dinero(), Dinero()))
+                    final = saldo + ingresos - egresos
+                    filas.append(
+                        {
+                            "fecha": d,
+                            "total_ingresos": ingresos,
+                            "total_egresos": egresos,
+                            "saldo_inicial": saldo,
+                            "saldo_final": final,
+                            "cerrado_por": quien,
+                        }
+                    )
+                    saldo = final
+                d += timedelta(days=1)
+
+            if not filas:
+                return []
+            db.execute(insert(CashClosure.__table__), filas)
+            _propagar_saldo(db, d2)
+            # Snapshot de stock y valoración al cierre (consultas a fecha / kardex)
+            guardar_checkpoints(db, datetime.combine(filas[-1]["fecha"], time.max))
+            encolar(db, *(DiaCerrado(f["fecha"]) for f in filas))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            invalidar_cierres()
+
+        nuevos = {f["fecha"] for f in filas}
+        cierres = [
+            c
+            for c in db.query(CashClosure)
+            .filter(CashClosure.fecha >= d1, CashClosure.fecha <= d2)
+            .order_by(CashClosure.fecha)
+            if c.fecha in nuevos
+        ]
+    return cierres
+
+
+@medido
+def dias_pendientes(
+    hasta: date | None = None,
+    *,
+    db: Session | None = None,
+) -> list[date]:
+    """
+    Días sin cierre desde el primer movimiento de caja hasta `hasta`
+    (por defecto ayer: hoy todavía está abierto), en orden. Los que están
+    reabiertos (ver dias_reabiertos) no cuentan: quedan abiertos hasta que
+    alguien los cierre. Un día reabierto y vuelto a cerrar deja de serlo.
+    """
+    hasta = hasta or _today_date() - timedelta(days=1)
+
+    with sesion(db) as db:
+        primera = db.query(func.min(CashMovement.fecha)).scalar()
+        if primera is None:
+            return []
+        cerrados = {
+            f
+            for (f,) in db.query(CashClosure.fecha).filter(
+                CashClosure.fecha >= primera.date(), CashClosure.fecha <= hasta
+            )
+        }
+        cerrados.update(dias_reabiertos(hasta, db=db))
+
+    pendientes = []
+    d = primera.date()
+    while d <= hasta:
+        if d not in cerrados:
+            pendientes.append(d)
+        d += timedelta(days=1)
+    return pendientes
+
+
+@medido
+def dias_reabiertos(
+    hasta: date | None = None,
+    *,
+    db: Session | None = None,
+) -> list[date]:
+    """
+    Días reabiertos con reabrir_dia que siguen sin cierre (la última
+    reapertura no tiene un cierre posterior), hasta `hasta` (por defecto
+    ayer), en orden. El cierre automático no los toca: se avisan.
+    """
+    hasta = hasta or _today_date() - timedelta(days=1)
+
+    with sesion(db) as db:
+        return list(
+            db.execute(
+                select(ReaperturaCaja.fecha)
+                .where(
+                    ReaperturaCaja.fecha <= hasta,
+                    ~select(CashClosure.id)
+                    .where(CashClosure.fecha == ReaperturaCaja.fecha)
+                    .exists(),
+                )
+                .distinct()
+                .order_by(ReaperturaCaja.fecha)
+            ).scalars()
         )
-        db.add(c)
-        db.commit()
-        db.refresh(c)
-        return c
 
 
-def resumen_rango(d1: date, d2: date) -> dict:
+@medido
+def cerrar_dias_pendientes(
+    hasta: date | None = None,
+    cerrado_por: str | None = "Automático",
+    *,
+    db: Session | None = None,
+) -> list[CashClosure]:
+    """
+    Cierra los días pasados que quedaron abiertos (ver dias_pendientes)
+    con un cerrar_rango por tramo seguido (casi siempre uno): cada cierre
+    parte del saldo_final del anterior, sin recorrer el histórico de caja
+    por cada día. Los huecos entre tramos (días reabiertos) no se tocan.
+    """
+    pendientes = dias_pendientes(hasta, db=db)
+    tramos = []
+    for d in pendientes:
+        if tramos and d - tramos[-1][1] == timedelta(days=1):
+            tramos[-1][1] = d
+        else:
+            tramos.append([d, d])
+    cierres = []
+    for d1, d2 in tramos:
+        cierres.extend(cerrar_rango(d1, d2, cerrado_por=cerrado_por, db=db))
+    return cierres
+
+
+# ----------------------------
+# Reapertura
+# ----------------------------
+@medido
+def reabrir_dia(
+    d: date,
+    reabierto_por: str | None = None,
+    motivo: str | None = None,
+    *,
+    db: Session | None = None,
+) -> ReaperturaCaja:
+    """
+    Borra el cierre de `d` (el día vuelve a aceptar movimientos) y deja
+    constancia en cash_reaperturas, con la copia del cierre borrado.
+
+    Los cierres posteriores encadenan su saldo desde ese cierre: si no
+    cuadraba con los movimientos del día (se corrigieron después de
+    cerrar), la diferencia se corre solo a esos cierres con un UPDATE.
+    Al volver a cerrar el día, cerrar_rango hace lo mismo con lo que se
+    haya movido mientras estuvo abierto.
+    """
+    with sesion(db) as db:
+        cierre = db.query(CashClosure).filter(CashClosure.fecha == d).first()
+        if cierre is None:
+            raise ValueError(f"El día {d} no está cerrado.")
+
+        try:
+            registro = ReaperturaCaja(
+                fecha=d,
+                reabierto_por=(reabierto_por or "").strip() or None,
+                motivo=(motivo or "").strip() or None,
+                total_ingresos=cierre.total_ingresos,
+                total_egresos=cierre.total_egresos,
+                saldo_inicial=cierre.saldo_inicial,
+                saldo_final=cierre.saldo_final,
+                cerrado_en=cierre.creado_en,
+                cerrado_por=cierre.cerrado_por,
+            )
+            db.delete(cierre)
+            db.flush()
+            registro.cierres_ajustados, registro.ajuste = _propagar_saldo(db, d)
+            db.add(registro)
+            encolar(db, DiaReabierto(d))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            invalidar_cierres()
+
+        db.refresh(registro)
+        return registro
+
+
+@medido
+def listar_reaperturas(
+    limit: int = 50,
+    *,
+    db: Session | None = None,
+) -> list[ReaperturaCaja]:
+    with sesion(db) as db:
+        return (
+            db.query(ReaperturaCaja)
+            .order_by(ReaperturaCaja.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+
+def _propagar_saldo(db, despues_de: date) -> tuple[int, Dinero]:
+    """
+    Alinea los cierres posteriores a `despues_de` con el saldo real: toma
+    el primero, compara su saldo_inicial con _saldo_antes_de (último
+    cierre previo + movimientos desde ahí) y suma la diferencia a todos
+    los siguientes en un UPDATE. Retorna (cierres ajustados, ajuste).
+    """
+    siguiente = (
+        db.query(CashClosure.fecha, CashClosure.saldo_inicial)
+        .filter(CashClosure.fecha > despues_de)
+        .order_by(CashClosure.fecha)
+        .first()
+    )
+    if siguiente is None:
+        return 0, Dinero()
+    ajuste = _saldo_antes_de(db, siguiente.fecha) - (
+        siguiente.saldo_inicial or Dinero()
+    )
+    if not ajuste:
+        return 0, Dinero()
+    n = (
+        db.query(CashClosure)
+        .filter(CashClosure.fecha >= siguiente.fecha)
+        .update(
+            {
+                CashClosure.saldo_inicial: CashClosure.saldo_inicial + ajuste,
+                CashClosure.saldo_final: CashClosure.saldo_final + ajuste,
+            },
+            synchronize_session=False,
+        )
+    )
+    return n, ajuste
+
+
+@medido
+def resumen_rango(d1: date, d2: date, *, db: Session | None = None) -> dict:
     """
     Resumen de un rango de fechas (incluye días completos).
     - saldo_inicial: saldo justo antes de d1
@@ -267,30 +703,139 @@ def resumen_rango(d1: date, d2: date) -> dict:
     start = datetime.combine(d1, time.min)
     end = datetime.combine(d2, time.max)
 
-    with SessionLocal() as db:
-        ingresos = (
-            db.query(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .filter(CashMovement.tipo == "INGRESO")
-            .filter(CashMovement.fecha >= start, CashMovement.fecha <= end)
-            .scalar()
-        )
-        egresos = (
-            db.query(func.coalesce(func.sum(CashMovement.monto), 0.0))
-            .filter(CashMovement.tipo == "EGRESO")
-            .filter(CashMovement.fecha >= start, CashMovement.fecha <= end)
-            .scalar()
-        )
+    with sesion(db) as db:
+        ingresos, egresos = _sumas_por_tipo(db, start, end)
+        saldo_inicial = _saldo_antes_de(db, d1)
 
-    saldo_inicial = obtener_saldo(hasta=start - timedelta(seconds=1))
-    ingresos = float(ingresos or 0.0)
-    egresos = float(egresos or 0.0)
-    saldo_final = float(saldo_inicial) + ingresos - egresos
+    saldo_final = saldo_inicial + ingresos - egresos
 
     return {
         "desde": d1,
         "hasta": d2,
         "ingresos": ingresos,
         "egresos": egresos,
-        "saldo_inicial": float(saldo_inicial),
-        "saldo_final": float(saldo_final),
+        "saldo_inicial": saldo_inicial,
+        "saldo_final": saldo_final,
     }
+
+
+# ----------------------------
+# Conciliación: movimientos de documento duplicados
+# ----------------------------
+@dataclass
+class MovimientoDuplicado:
+    referencia: str
+    tipo: str
+    monto: Dinero
+    conservado_id: int  # el primero (el de la transacción del documento)
+    sobrantes: list[int]
+    # días cerrados donde cae algún sobrante (su cierre cambia si se borra)
+    dias_cerrados: list[date] = field(default_factory=list)
+    corregido: bool = False
+
+
+# Referencias que escriben los repos: cada documento mueve la caja una vez
+# por tipo (la venta: INGRESO y, si se anula, EGRESO)
+_REFERENCIAS_DOC = ("Entrada %", "Venta #%")
+
+
+@medido
+def conciliar_caja(
+    corregir: bool = False,
+    incluir_cerrados: bool = False,
+    *,
+    db: Session | None = None,
+) -> list[MovimientoDuplicado]:
+    """
+    Busca movimientos de documento repetidos (misma referencia, tipo y
+    monto) en UNA consulta agrupada sobre cash_movements. Así quedaron las
+    compras pagadas que la ventana de Entradas registraba dos veces.
+
+    corregir=True borra los sobrantes (se conserva el de menor id), todo en
+    una transacción. Los que caen en días cerrados solo se borran con
+    incluir_cerrados=True; entonces se corrigen también los cierres: los
+    totales de ese día y los saldos de ese día en adelante.
+    """
+    q = (
+        select(
+            CashMovement.referencia,
+            CashMovement.tipo,
+            CashMovement.monto,
+            func.group_concat(CashMovement.id),
+        )
+        .where(or_(*(CashMovement.referencia.like(r) for r in _REFERENCIAS_DOC)))
+        .group_by(CashMovement.referencia, CashMovement.tipo, CashMovement.monto)
+        .having(func.count() > 1)
+    )
+
+    with sesion(db) as db:
+        duplicados = []
+        for referencia, tipo, monto, ids in db.execute(q):
+            ids = sorted(int(i) for i in ids.split(","))
+            duplicados.append(
+                MovimientoDuplicado(referencia, tipo, monto, ids[0], ids[1:])
+            )
+        if not duplicados:
+            return []
+
+        sobrantes = [i for d in duplicados for i in d.sobrantes]
+        fechas = dict(
+            db.execute(
+                select(CashMovement.id, CashMovement.fecha).where(
+                    CashMovement.id.in_(sobrantes)
+                )
+            ).all()
+        )
+        cerrados = set(
+            db.execute(
+                select(CashClosure.fecha).where(
+                    CashClosure.fecha.in_({f.date() for f in fechas.values()})
+                )
+            ).scalars()
+        )
+        for d in duplicados:
+            d.dias_cerrados = sorted(
+                {fechas[i].date() for i in d.sobrantes} & cerrados
+            )
+
+        if not corregir:
+            return duplicados
+
+        try:
+            borrar = []
+            for d in duplicados:
+                if d.dias_cerrados and not incluir_cerrados:
+                    continue
+                for i in d.sobrantes:
+                    if fechas[i].date() in cerrados:
+                        _descontar_de_cierres(db, fechas[i].date(), d.tipo, d.monto)
+                borrar.extend(d.sobrantes)
+                d.corregido = True
+            if borrar:
+                db.execute(delete(CashMovement).where(CashMovement.id.in_(borrar)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return duplicados
+
+
+def _descontar_de_cierres(db, dia: date, tipo: str, monto: Dinero) -> None:
+    """Quita un movimiento de `dia` de los cierres ya guardados."""
+    if tipo == "EGRESO":
+        # sin un EGRESO el saldo sube
+        total, ajuste = CashClosure.total_egresos, monto
+    else:
+        total, ajuste = CashClosure.total_ingresos, -monto
+    db.query(CashClosure).filter(CashClosure.fecha == dia).update(
+        {total: total - monto}, synchronize_session=False
+    )
+    db.query(CashClosure).filter(CashClosure.fecha > dia).update(
+        {CashClosure.saldo_inicial: CashClosure.saldo_inicial + ajuste},
+        synchronize_session=False,
+    )
+    db.query(CashClosure).filter(CashClosure.fecha >= dia).update(
+        {CashClosure.saldo_final: CashClosure.saldo_final + ajuste},
+        synchronize_session=False,
+    )
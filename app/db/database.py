@@ -1,10 +1,32 @@
+"""
+Engine y sesiones de la base SQLite.
+
+La base es app_data/inventario.db salvo que se configure otra:
+- INVENTARIO_DB=<ruta>     otro archivo (pruebas, benchmarks, otra tienda)
+- INVENTARIO_DB=:memory:   base en memoria (cache compartido entre las
+                           conexiones del engine; se pierde al cerrarlo)
+- configurar_db(destino)   lo mismo desde código, cambiando el engine del
+                           proceso (también acepta una URL sqlite://...)
+
+Las funciones de los repos aceptan `db=` para trabajar sobre una sesión
+ya abierta (la de quien llama, o una de otro engine); sin `db=` abren una
+propia con SessionLocal. Con la sesión inyectada siguen haciendo commit,
+pero no la cierran.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
-from app.db.models import Base
-from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import Engine, make_url
 
-from pathlib import Path
+from app.db.instrumentacion import ConexionMedida
 
 
 def get_app_data_dir() -> Path:
@@ -15,17 +37,128 @@ def get_app_data_dir() -> Path:
     return data_dir
 
 
-def get_engine():
-    db_path = get_app_data_dir() / "inventario.db"
+# Destino elegido con configurar_db() (None = INVENTARIO_DB o app_data/)
+_destino: str | None = None
+
+
+def get_db_path() -> Path:
+    """
+    Ruta del archivo SQLite.
+    configurar_db() o la variable de entorno INVENTARIO_DB permiten apuntar
+    a otra base (pruebas, benchmarks, otra tienda) sin tocar app_data/.
+    """
+    ruta = _destino or os.environ.get("INVENTARIO_DB")
+    if ruta:
+        if "://" in ruta:
+            return Path(make_url(ruta).database or MEMORIA)
+        return Path(ruta)
+    return get_app_data_dir() / "inventario.db"
+
+
+MEMORIA = ":memory:"
+
+_bases_en_memoria = itertools.count(1)
+
+
+def _engine_en_memoria() -> Engine:
+    """
+    Base en memoria con nombre propio y cache compartido: todas las
+    conexiones del engine (una por hilo) ven los mismos datos, y cada
+    engine nuevo es una base distinta. Una conexión ancla la mantiene viva
+    hasta el dispose() del engine.
+    """
+    nombre = f"inventario_{os.getpid()}_{next(_bases_en_memoria)}"
+    uri = f"file:{nombre}?mode=memory&cache=shared"
+    ancla = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    engine = create_engine(
+        "sqlite://",
+        creator=lambda: sqlite3.connect(
+            uri, uri=True, check_same_thread=False, factory=ConexionMedida
+        ),
+        future=True,
+    )
+    event.listen(engine, "engine_disposed", lambda _engine: ancla.close())
+    return engine
+
+
+def crear_engine(destino: str | Path | None = None) -> Engine:
+    """
+    Engine para `destino`: ruta de archivo, MEMORIA (":memory:") o URL
+    sqlite://...; None = get_db_path(). No cambia el engine del proceso
+    (ver configurar_db).
+    """
+    destino = str(destino if destino is not None else get_db_path())
+    if destino == MEMORIA:
+        return _engine_en_memoria()
+    url = destino if "://" in destino else f"sqlite:///{Path(destino).as_posix()}"
     return create_engine(
-        f"sqlite:///{db_path.as_posix()}",
-        connect_args={"check_same_thread": False},
+        url,
+        # ConexionMedida: filas por consulta con la instrumentación prendida
+        connect_args={"check_same_thread": False, "factory": ConexionMedida},
         future=True,
     )
 
 
-engine = get_engine()
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+_engine: Engine | None = None
+
+# Versión de esquema ya verificada en este proceso (None = sin verificar)
+_version_esquema: int | None = None
+
+
+def get_engine() -> Engine:
+    """El engine se crea en el primer uso, no al importar el módulo."""
+    global _engine
+    if _engine is None:
+        _engine = crear_engine()
+    return _engine
+
+
+def configurar_db(destino: str | Path | None = None) -> Engine:
+    """
+    Cambia la base del proceso: cierra el engine actual y el próximo uso
+    de SessionLocal/get_engine() va a `destino` (ver crear_engine), y
+    get_db_path() (backups) también. None vuelve a INVENTARIO_DB/app_data.
+    Hay que volver a llamar a init_db() para crear o migrar el esquema.
+    """
+    global _engine, _version_esquema, _destino
+    if _engine is not None:
+        _engine.dispose()
+    _destino = str(destino) if destino is not None else None
+    _engine = crear_engine(destino)
+    _version_esquema = None
+    return _engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker que se enlaza al engine recién al abrir la primera sesión."""
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autoflush=False, autocommit=False, future=True)
+
+
+@contextmanager
+def sesion(db: Session | None = None) -> Iterator[Session]:
+    """
+    `with sesion(db) as db:` en los repos: usa la sesión inyectada tal cual
+    (quien la abrió la cierra) o abre y cierra una de SessionLocal.
+    """
+    if db is not None:
+        yield db
+        return
+    with SessionLocal() as nueva:
+        yield nueva
+
+
+def __getattr__(name: str):
+    # Compatibilidad: `from app.db.database import engine`
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @event.listens_for(Engine, "connect")
@@ -37,5 +170,17 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor.close()
 
 
-def init_db():
-    Base.metadata.create_all(engine)
+def init_db(progreso=None) -> int:
+    """
+    Crea/actualiza el esquema con las migraciones versionadas.
+    Solo la primera llamada del proceso consulta la base (una lectura de
+    versión si ya está al día); las siguientes usan el valor cacheado.
+    """
+    global _version_esquema
+    if _version_esquema is not None:
+        return _version_esquema
+
+    from app.db.migrations import migrar
+
+    _version_esquema = migrar(get_engine(), progreso=progreso)
+    return _version_esquema
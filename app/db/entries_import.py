@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.cash_repo import dias_cerrados
+from app.db.entries_repo import crear_entradas_lote
+from app.db.models import Product, Supplier
+from app.db.products_import import ErrorFila, leer_filas
+from app.utils.formatters import parse_fecha, parse_numero
+
+LOTE_DEFAULT = 5000  # líneas por transacción
+
+# Encabezados aceptados (normalizados: minúsculas, sin tildes ni espacios extra)
+_ALIAS = {
+    "documento": "documento",
+    "factura": "documento",
+    "no factura": "documento",
+    "numero factura": "documento",
+    "proveedor": "proveedor",
+    "nit": "proveedor",
+    "nit proveedor": "proveedor",
+    "fecha": "fecha",
+    "codigo": "codigo",
+    "cod": "codigo",
+    "sku": "codigo",
+    "cantidad": "cantidad",
+    "cant": "cantidad",
+    "precio": "precio_compra",
+    "precio compra": "precio_compra",
+    "precio_compra": "precio_compra",
+    "costo": "precio_compra",
+    "pagado": "pagado",
+    "metodo": "metodo_pago",
+    "metodo pago": "metodo_pago",
+    "metodo_pago": "metodo_pago",
+}
+
+_SI = {"si", "sí", "s", "x", "1", "true", "pagado"}
+_NO = {"no", "n", "0", "false", "credito", "crédito"}
+
+
+@dataclass
+class ResultadoImportacionEntradas:
+    filas: int = 0
+    entradas: int = 0
+    lineas: int = 0
+    errores: list[ErrorFila] = field(default_factory=list)
+    segundos: float = 0.0
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.filas / self.segundos if self.segundos > 0 else 0.0
+
+
+# ----------------------------
+# Mapas en memoria (una consulta por tabla)
+# ----------------------------
+def _mapa_productos(db) -> dict[str, tuple[int, str, bool]]:
+    return {
+        codigo: (pid, nombre, bool(activo))
+        for pid, codigo, nombre, activo in db.query(
+            Product.id, Product.codigo, Product.nombre, Product.activo
+        )
+    }
+
+
+def _mapa_proveedores(db) -> dict[str, tuple[int, str, bool]]:
+    """Acepta NIT, id o nombre (sin distinguir mayúsculas)."""
+    mapa = {}
+    for sid, nombre, nit, activo in db.query(
+        Supplier.id, Supplier.nombre, Supplier.nit, Supplier.activo
+    ):
+        datos = (sid, nombre, bool(activo))
+        mapa.setdefault((nombre or "").strip().lower(), datos)
+        mapa[str(sid)] = datos
+        if nit:
+            mapa[nit.strip().lower()] = datos
+    return mapa
+
+
+# ----------------------------
+# Validación
+# ----------------------------
+def _parse_pagado(value, default: bool) -> bool:
+    if value is None or str(value).strip() == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    txt = str(value).strip().lower()
+    if txt in _SI:
+        return True
+    if txt in _NO:
+        return False
+    raise ValueError(f"Valor inválido en pagado: {value!r}")
+
+
+def _validar_linea(datos: dict, productos: dict) -> tuple[int, float, float]:
+    codigo = str(datos.get("codigo") or "").strip()
+    if not codigo:
+        raise ValueError("Código obligatorio.")
+    producto = productos.get(codigo)
+    if producto is None:
+        raise ValueError("Producto no encontrado.")
+    pid, nombre, activo = producto
+    if not activo:
+        raise ValueError(f"Producto inactivo: {nombre}.")
+
+    try:
+        cantidad = parse_numero(datos.get("cantidad"))
+        precio = parse_numero(datos.get("precio_compra"))
+    except ValueError:
+        raise ValueError("Cantidad o precio no son números.")
+    if cantidad <= 0:
+        raise ValueError("La cantidad debe ser mayor a 0.")
+    if precio < 0:
+        raise ValueError("El precio de compra no puede ser negativo.")
+    return pid, cantidad, precio
+
+
+# ----------------------------
+# Import
+# ----------------------------
+@medido
+def importar_entradas(
+    ruta,
+    pagado: bool = True,
+    metodo_pago: str = "Efectivo",
+    lote: int = LOTE_DEFAULT,
+    progreso: Callable[[int], None] | None = None,
+    *,
+    db: Session | None = None,
+) -> ResultadoImportacionEntradas:
+    """
+    Crea entradas (compras) desde CSV o XLSX, una línea por fila.
+
+    Columnas: proveedor (NIT, id o nombre), codigo, cantidad, precio_compra
+    y opcionales documento, fecha, pagado, metodo_pago. Las filas con el
+    mismo documento + proveedor forman UNA entrada; sin documento, se agrupa
+    por proveedor + fecha. `pagado` y `metodo_pago` son los valores por
+    defecto cuando el archivo no los trae.
+
+    - Productos, proveedores y días cerrados se validan contra mapas en
+      memoria (una consulta por tabla).
+    - Si una línea falla, se rechaza su entrada completa; el resto sigue.
+    - Las entradas válidas se guardan con crear_entradas_lote, una
+      transacción cada ~`lote` líneas.
+    """
+    t0 = time.perf_counter()
+    res = ResultadoImportacionEntradas()
+
+    with sesion(db) as s:
+        productos = _mapa_productos(s)
+        proveedores = _mapa_proveedores(s)
+        cerrados = dias_cerrados(db=s)
+
+    # documento -> entrada en construcción (orden del archivo)
+    docs: dict[tuple, dict] = {}
+    for n, datos in leer_filas(ruta, alias=_ALIAS):
+        res.filas += 1
+        codigo = str(datos.get("codigo") or "").strip()
+
+        prov_txt = str(datos.get("proveedor") or "").strip()
+        documento = str(datos.get("documento") or "").strip()
+        try:
+            fecha = parse_fecha(datos.get("fecha"))
+        except ValueError as e:
+            fecha = None
+            error_fecha = str(e)
+        else:
+            error_fecha = None
+
+        clave = (prov_txt.lower(), documento or None, None if documento else fecha)
+        doc = docs.get(clave)
+        if doc is None:
+            doc = docs[clave] = {
+                "fila": n,
+                "lineas": [],
+                "errores": [],
+                "fecha": fecha,
+                "pagado": pagado,
+                "metodo_pago": metodo_pago,
+            }
+            try:
+                if not prov_txt:
+                    raise ValueError("Proveedor obligatorio.")
+                proveedor = proveedores.get(prov_txt.lower())
+                if proveedor is None:
+                    raise ValueError(f"Proveedor no encontrado: {prov_txt}.")
+                sid, nombre, activo = proveedor
+                if not activo:
+                    raise ValueError(f"Proveedor inactivo: {nombre}.")
+                doc["supplier_id"] = sid
+            except ValueError as e:
+                doc["errores"].append(ErrorFila(n, codigo, str(e)))
+
+        try:
+            if error_fecha:
+                raise ValueError(error_fecha)
+            doc["pagado"] = _parse_pagado(datos.get("pagado"), doc["pagado"])
+            metodo = str(datos.get("metodo_pago") or "").strip()
+            if metodo:
+                doc["metodo_pago"] = metodo
+            doc["lineas"].append(_validar_linea(datos, productos))
+        except ValueError as e:
+            doc["errores"].append(ErrorFila(n, codigo, str(e)))
+
+    pendientes: list[dict] = []
+    lineas_pendientes = 0
+
+    def _guardar():
+        nonlocal lineas_pendientes
+        if not pendientes:
+            return
+        try:
+            ids = crear_entradas_lote(pendientes, db=db)
+        except ValueError as e:
+            # No debería pasar (ya se validó), pero si pasa no se pierde el resto.
+            for ent in pendientes:
+                res.errores.append(ErrorFila(ent["fila"], "", str(e)))
+        else:
+            res.entradas += len(ids)
+            res.lineas += lineas_pendientes
+        pendientes.clear()
+        lineas_pendientes = 0
+        if progreso:
+            progreso(res.lineas)
+
+    for doc in docs.values():
+        if not doc["errores"] and doc["pagado"]:
+            dia = doc["fecha"].date() if doc["fecha"] else date.today()
+            if dia in cerrados:
+                doc["errores"].append(
+                    ErrorFila(
+                        doc["fila"],
+                        "",
+                        f"El día {dia} está cerrado. No se pueden registrar "
+                        "compras pagadas.",
+                    )
+                )
+            elif sum(c * p for _, c, p in doc["lineas"]) <= 0:
+                doc["errores"].append(
+                    ErrorFila(doc["fila"], "", "Compra pagada con total 0.")
+                )
+
+        if doc["errores"]:
+            res.errores.extend(doc["errores"])
+            continue
+
+        pendientes.append(
+            {
+                "fila": doc["fila"],
+                "supplier_id": doc["supplier_id"],
+                "items": [
+                    {"product_id": pid, "cantidad": c, "precio_compra": p}
+                    for pid, c, p in doc["lineas"]
+                ],
+                "fecha": doc["fecha"],
+                "pagado": doc["pagado"],
+                "metodo_pago": doc["metodo_pago"],
+            }
+        )
+        lineas_pendientes += len(doc["lineas"])
+        if lineas_pendientes >= lote:
+            _guardar()
+
+    _guardar()
+
+    res.errores.sort(key=lambda e: e.fila)
+    res.segundos = time.perf_counter() - t0
+    return res
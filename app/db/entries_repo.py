@@ -1,16 +1,30 @@
 from __future__ import annotations
 
-from app.db.database import SessionLocal
-from app.db.models import Entry, EntryDetail, Product, Supplier
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import Float, Integer, insert, update, bindparam, case, cast, func
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.models import Centavos, Entry, EntryDetail, Product, Supplier
 
 from app.db.cash_repo import registrar_movimiento_en_db
+from app.db.inventory_repo import registrar_movimientos_stock
+from app.db.purchase_orders_repo import registrar_precios_compra
+from app.db.events import encolar, EntradaCreada, StockCambiado
+from app.utils.dinero import Dinero
 
 
+@medido
 def crear_entrada(
     supplier_id: int,
     items: list[dict],
     pagado: bool = True,
     metodo_pago: str = "Efectivo",
+    *,
+    db: Session | None = None,
 ) -> Entry:
     """
     items = [
@@ -18,81 +32,270 @@ def crear_entrada(
         ...
     ]
 
-    Crea entry + details, suma stock_actual a Product.
+    Crea entry + details, suma stock_actual y recalcula costo_promedio.
     Si pagado=True => registra EGRESO en caja (misma transacción).
     Respeta cierres diarios (bloquea movimientos si el día está cerrado).
     """
-    if not items:
-        raise ValueError("La entrada debe tener al menos 1 producto.")
+    entry_ids = crear_entradas_lote(
+        [
+            {
+                "supplier_id": supplier_id,
+                "items": items,
+                "pagado": pagado,
+                "metodo_pago": metodo_pago,
+            }
+        ],
+        db=db,
+    )
 
-    metodo_pago = (metodo_pago or "Efectivo").strip()
+    with sesion(db) as db:
+        return db.query(Entry).filter(Entry.id == entry_ids[0]).first()
 
-    with SessionLocal() as db:
-        supplier = db.query(Supplier).filter(Supplier.id == int(supplier_id)).first()
-        if not supplier:
-            raise ValueError("Proveedor no encontrado.")
-        if not supplier.activo:
-            raise ValueError("Proveedor inactivo. Actívalo para usarlo.")
 
-        entry = Entry(supplier_id=int(supplier_id), total=0.0)
-        total = 0.0
+@medido
+def crear_entradas_lote(
+    entradas: list[dict],
+    *,
+    db: Session | None = None,
+) -> list[int]:
+    """
+    Crea muchas entradas en UNA transacción (todas o ninguna).
 
-        try:
-            for it in items:
-                product_id = int(it.get("product_id"))
-                cantidad = float(it.get("cantidad", 0))
-                precio = float(it.get("precio_compra", 0))
-
-                if cantidad <= 0:
-                    raise ValueError("La cantidad debe ser mayor a 0.")
-                if precio < 0:
-                    raise ValueError("El precio de compra no puede ser negativo.")
-
-                product = db.query(Product).filter(Product.id == product_id).first()
-                if not product:
-                    raise ValueError(f"Producto no encontrado (id={product_id}).")
-                if not getattr(product, "activo", True):
-                    raise ValueError(
-                        f"Producto inactivo: {product.nombre}. Actívalo para usarlo."
-                    )
+    entradas = [
+        {
+            "supplier_id": 1,
+            "items": [{"product_id": 1, "cantidad": 2, "precio_compra": 3500}, ...],
+            "fecha": datetime | None,      # opcional (histórico)
+            "pagado": True,                # opcional
+            "metodo_pago": "Efectivo",     # opcional
+        },
+        ...
+    ]
+
+    - Proveedores y productos se validan contra mapas en memoria
+      (una consulta por tabla, no una por línea).
+    - Los detalles (y su kardex) se insertan con un solo executemany; el
+      historial de precios por proveedor se acumula con otro.
+    - Stock y costo_promedio se ajustan con un UPDATE por producto afectado,
+      agregando todas las líneas del lote, en un solo executemany.
+    Retorna los ids de las entradas creadas, en el mismo orden.
+    """
+    if not entradas:
+        raise ValueError("No hay entradas para guardar.")
 
-                subtotal = cantidad * precio
-                total += subtotal
+    # -------- Validación (sin tocar la base) --------
+    normalizadas = []
+    for n, ent in enumerate(entradas, 1):
+        prefijo = f"Entrada {n}: " if len(entradas) > 1 else ""
+        items = ent.get("items") or []
+        if not items:
+            raise ValueError(f"{prefijo}La entrada debe tener al menos 1 producto.")
 
-                detail = EntryDetail(
-                    product_id=product_id,
-                    cantidad=cantidad,
-                    precio_compra=precio,
-                    subtotal=subtotal,
+        lineas = []
+        for it in items:
+            cantidad = float(it.get("cantidad", 0))
+            precio = Dinero(it.get("precio_compra", 0))
+            if cantidad <= 0:
+                raise ValueError(f"{prefijo}La cantidad debe ser mayor a 0.")
+            if precio < 0:
+                raise ValueError(
+                    f"{prefijo}El precio de compra no puede ser negativo."
                 )
-                entry.details.append(detail)
+            lineas.append((int(it.get("product_id")), cantidad, precio))
+
+        normalizadas.append(
+            {
+                "supplier_id": int(ent.get("supplier_id")),
+                "lineas": lineas,
+                "fecha": ent.get("fecha"),
+                "pagado": bool(ent.get("pagado", True)),
+                "metodo_pago": (ent.get("metodo_pago") or "Efectivo").strip(),
+                "prefijo": prefijo,
+            }
+        )
+
+    with sesion(db) as db:
+        try:
+            supplier_ids = {e["supplier_id"] for e in normalizadas}
+            proveedores = {
+                s.id: s
+                for s in db.query(Supplier).filter(Supplier.id.in_(supplier_ids))
+            }
+
+            product_ids = {pid for e in normalizadas for pid, _, _ in e["lineas"]}
+            productos = {
+                pid: (nombre, activo)
+                for pid, nombre, activo in db.query(
+                    Product.id, Product.nombre, Product.activo
+                ).filter(Product.id.in_(product_ids))
+            }
 
-                # ✅ Actualiza stock
-                product.stock_actual = (
-                    float(getattr(product, "stock_actual", 0.0) or 0.0) + cantidad
+            for e in normalizadas:
+                supplier = proveedores.get(e["supplier_id"])
+                if not supplier:
+                    raise ValueError(f"{e['prefijo']}Proveedor no encontrado.")
+                if not supplier.activo:
+                    raise ValueError(
+                        f"{e['prefijo']}Proveedor inactivo. Actívalo para usarlo."
+                    )
+                for pid, _, _ in e["lineas"]:
+                    if pid not in productos:
+                        raise ValueError(
+                            f"{e['prefijo']}Producto no encontrado (id={pid})."
+                        )
+                    nombre, activo = productos[pid]
+                    if not activo:
+                        raise ValueError(
+                            f"{e['prefijo']}Producto inactivo: {nombre}. "
+                            "Actívalo para usarlo."
+                        )
+
+            # -------- Encabezados (necesitamos los ids) --------
+            # Sin fecha histórica: un solo instante local para la entrada, su
+            # kardex y su EGRESO de caja
+            ahora = datetime.now()
+            headers = []
+            for e in normalizadas:
+                e["fecha"] = e["fecha"] or ahora
+                headers.append(
+                    Entry(
+                        supplier_id=e["supplier_id"],
+                        fecha=e["fecha"],
+                        total=sum((p * c for _, c, p in e["lineas"]), Dinero()),
+                    )
                 )
+            db.add_all(headers)
+            db.flush()
 
-            entry.total = float(total)
+            # -------- Detalles: un executemany --------
+            detalles = []
+            kardex = []
+            compras = []
+            # Por (entrada, producto): el costo se mueve una vez por documento,
+            # igual que al re-aplicar el kardex (inventory_repo._por_documento)
+            delta_cant: dict[tuple[int, int], float] = defaultdict(float)
+            delta_valor: dict[tuple[int, int], Dinero] = defaultdict(Dinero)
+            for entry, e in sorted(
+                zip(headers, normalizadas), key=lambda h: (h[0].fecha, h[0].id)
+            ):
+                for pid, cantidad, precio in e["lineas"]:
+                    subtotal = precio * cantidad
+                    detalles.append(
+                        {
+                            "entry_id": entry.id,
+                            "product_id": pid,
+                            "cantidad": cantidad,
+                            "precio_compra": precio,
+                            "subtotal": subtotal,
+                        }
+                    )
+                    kardex.append(
+                        {
+                            "product_id": pid,
+                            "delta": cantidad,
+                            "origen": "ENTRADA",
+                            "documento_id": entry.id,
+                            "fecha": entry.fecha,
+                            "costo_unitario": precio,
+                        }
+                    )
+                    compras.append(
+                        {
+                            "product_id": pid,
+                            "supplier_id": entry.supplier_id,
+                            "entry_id": entry.id,
+                            "fecha": entry.fecha,
+                            "cantidad": cantidad,
+                            "precio_compra": precio,
+                            "subtotal": subtotal,
+                        }
+                    )
+                    delta_cant[entry.id, pid] += cantidad
+                    delta_valor[entry.id, pid] += subtotal
+            db.execute(insert(EntryDetail.__table__), detalles)
+            registrar_movimientos_stock(db, kardex)
+            registrar_precios_compra(db, compras)
 
-            db.add(entry)
-            db.flush()  # para obtener entry.id sin cerrar transacción
+            # -------- Stock + costo promedio ponderado: un UPDATE por lote --------
+            _aplicar_deltas_stock(db, delta_cant, delta_valor)
 
-            # ✅ Caja (misma transacción)
-            if pagado:
-                concepto = f"Compra (Entrada #{entry.id}) - {supplier.nombre}"
+            # -------- Caja (misma transacción) --------
+            for entry, e in zip(headers, normalizadas):
+                if not e["pagado"]:
+                    continue
+                supplier = proveedores[e["supplier_id"]]
                 registrar_movimiento_en_db(
                     db,
                     tipo="EGRESO",
-                    concepto=concepto,
-                    monto=float(entry.total),
+                    concepto=f"Compra (Entrada #{entry.id}) - {supplier.nombre}",
+                    monto=entry.total,
                     referencia=f"Entrada {entry.id}",
-                    observacion=f"Método: {metodo_pago}" if metodo_pago else None,
+                    observacion=(
+                        f"Método: {e['metodo_pago']}" if e["metodo_pago"] else None
+                    ),
+                    fecha=e["fecha"],
+                    metodo_pago=e["metodo_pago"],
                 )
 
+            ids = [entry.id for entry in headers]
+            encolar(db, *(EntradaCreada(i) for i in ids))
+            encolar(db, StockCambiado(tuple({pid for _e, pid in delta_cant})))
             db.commit()
-            db.refresh(entry)
-            return entry
+            return ids
 
         except Exception:
             db.rollback()
             raise
+
+
+def _aplicar_deltas_stock(
+    db,
+    delta_cant: dict[tuple[int, int], float],
+    delta_valor: dict[tuple[int, int], Dinero],
+) -> None:
+    """
+    Por cada (entrada, producto), en el orden de las claves:
+    stock_actual += cantidad
+    costo_promedio = (stock * costo + valor comprado) / (stock + cantidad)
+
+    Todo en SQL (usa los valores de la fila antes del UPDATE), así no depende
+    de un stock leído antes y posiblemente desactualizado. Si el stock previo
+    es negativo se toma como 0 para el promedio. El costo se calcula en
+    centavos y se redondea al centavo.
+    """
+    if not delta_cant:
+        return
+
+    t = Product.__table__
+    stock_previo = func.max(func.coalesce(t.c.stock_actual, 0.0), 0.0)
+    costo_previo = func.coalesce(t.c.costo_promedio, 0)
+    cant = bindparam("d_cant", type_=Float)
+    valor = bindparam("d_valor", type_=Centavos)
+
+    stmt = (
+        update(t)
+        .where(t.c.id == bindparam("p_id"))
+        .values(
+            stock_actual=func.coalesce(t.c.stock_actual, 0.0) + cant,
+            costo_promedio=case(
+                (
+                    stock_previo + cant > 0,
+                    cast(
+                        func.round(
+                            (stock_previo * costo_previo + valor)
+                            / (stock_previo + cant)
+                        ),
+                        Integer,
+                    ),
+                ),
+                else_=costo_previo,
+            ),
+        )
+    )
+    db.execute(
+        stmt,
+        [
+            {"p_id": pid, "d_cant": cant, "d_valor": delta_valor[entry_id, pid]}
+            for (entry_id, pid), cant in delta_cant.items()
+        ],
+    )
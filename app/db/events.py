@@ -0,0 +1,138 @@
+"""
+Bus de eventos en proceso (publish/subscribe).
+
+Los repos encolan eventos en la sesión con `encolar(db, ...)` y se publican
+solo cuando esa sesión hace commit; si hay rollback se descartan. Así las
+ventanas abiertas se enteran de los cambios sin recargar tablas completas.
+
+Los suscriptores corren en el hilo que hizo el commit. La UI debe pasar por
+app/ui/event_bridge.py para recibirlos en el hilo de Qt.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils.dinero import Dinero
+
+log = logging.getLogger(__name__)
+
+
+# ----------------------------
+# Eventos
+# ----------------------------
+class Evento:
+    """Base de todos los eventos (suscribirse a Evento = recibir todo)."""
+
+
+@dataclass(frozen=True)
+class StockCambiado(Evento):
+    product_ids: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class ProductoGuardado(Evento):
+    """Alta, edición o cambio de estado de un producto."""
+
+    product_id: int
+
+
+@dataclass(frozen=True)
+class ProductosImportados(Evento):
+    """Carga masiva: demasiados ids para parchar fila por fila."""
+
+    cantidad: int
+
+
+@dataclass(frozen=True)
+class ProveedorGuardado(Evento):
+    supplier_id: int
+
+
+@dataclass(frozen=True)
+class VentaCreada(Evento):
+    sale_id: int
+
+
+@dataclass(frozen=True)
+class VentaAnulada(Evento):
+    sale_id: int
+
+
+@dataclass(frozen=True)
+class EntradaCreada(Evento):
+    entry_id: int
+
+
+@dataclass(frozen=True)
+class MovimientoCajaAgregado(Evento):
+    movimiento_id: int
+    tipo: str
+    monto: Dinero
+    fecha: datetime
+
+
+@dataclass(frozen=True)
+class DiaCerrado(Evento):
+    fecha: date
+
+
+@dataclass(frozen=True)
+class DiaReabierto(Evento):
+    fecha: date
+
+
+# ----------------------------
+# Bus
+# ----------------------------
+_suscriptores: dict[type, list[Callable[[Evento], None]]] = defaultdict(list)
+
+
+def suscribir(tipo: type, callback: Callable[[Evento], None]) -> Callable[[], None]:
+    """
+    Suscribe `callback` a `tipo` (y sus subclases).
+    Retorna una función para desuscribirse.
+    """
+    _suscriptores[tipo].append(callback)
+
+    def _cancelar():
+        try:
+            _suscriptores[tipo].remove(callback)
+        except ValueError:
+            pass
+
+    return _cancelar
+
+
+def publicar(evento: Evento) -> None:
+    """Entrega el evento ya mismo. Un suscriptor que falla no afecta a los demás."""
+    for tipo in type(evento).__mro__:
+        for callback in list(_suscriptores.get(tipo, ())):
+            try:
+                callback(evento)
+            except Exception:
+                log.exception("Error en suscriptor de %s", type(evento).__name__)
+
+
+def encolar(db: Session, *eventos: Evento) -> None:
+    """Publica los eventos cuando `db` haga commit (se descartan si hay rollback)."""
+    db.info.setdefault("eventos", []).extend(eventos)
+
+
+@event.listens_for(Session, "after_commit")
+def _publicar_pendientes(db: Session):
+    pendientes = db.info.pop("eventos", None)
+    for ev in pendientes or ():
+        publicar(ev)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendientes(db: Session):
+    db.info.pop("eventos", None)
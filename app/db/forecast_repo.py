@@ -0,0 +1,378 @@
+"""
+Pronóstico de demanda por producto (unidades vendidas por día).
+
+- ventas_diarias: unidades por producto y día, desde sale_details.
+- demanda_productos: promedio móvil de VENTANA días y suavizado
+  exponencial (ALFA), guardados como estado.
+- pronostico_estado: hasta qué día está calculado.
+
+actualizar_pronostico() solo procesa los días nuevos. Todos los productos
+se avanzan a la vez, con sentencias SQL sobre conjuntos (sin un bucle
+por producto). Una anulación de un día ya procesado se descuenta en la
+misma transacción (descontar_anulacion), con el peso que tuvo su día.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import (
+    Date,
+    Float,
+    bindparam,
+    column,
+    delete,
+    func,
+    literal,
+    select,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.models import (
+    DemandaProducto,
+    Product,
+    ProductSupplierPrice,
+    PronosticoEstado,
+    Sale,
+    SaleDetail,
+    Supplier,
+    VentaDiaria,
+)
+
+VENTANA = 28  # días del promedio móvil
+ALFA = 0.2  # peso del último día en el suavizado exponencial
+
+_VD = VentaDiaria.__table__
+_DEM = DemandaProducto.__table__
+_SALE = Sale.__table__
+_SD = SaleDetail.__table__
+_PROD = Product.__table__
+_PSP = ProductSupplierPrice.__table__
+_SUP = Supplier.__table__
+
+
+@dataclass
+class PronosticoProducto:
+    product_id: int
+    codigo: str
+    nombre: str
+    stock: float
+    stock_minimo: float
+    promedio_movil: float  # unidades/día
+    suavizado: float  # unidades/día
+    supplier_id: int | None  # último proveedor que lo vendió
+    proveedor: str | None
+    sugerido: float  # cantidad a pedir
+
+    @property
+    def demanda(self) -> float:
+        """Demanda diaria para reponer: la mayor de las dos estimaciones."""
+        return max(self.promedio_movil, self.suavizado)
+
+    @property
+    def dias_cobertura(self) -> float | None:
+        """Días que alcanza el stock (None = sin demanda)."""
+        if self.demanda <= 0:
+            return None
+        return max(self.stock, 0.0) / self.demanda
+
+
+# ----------------------------
+# Actualización incremental
+# ----------------------------
+def _acumular_ventas(db, desde: date, hasta: date) -> None:
+    """ventas_diarias para los días (desde, hasta]."""
+    dia = func.date(_SALE.c.fecha)
+    q = (
+        select(dia, _SD.c.product_id, func.sum(_SD.c.cantidad))
+        .join_from(_SD, _SALE, _SALE.c.id == _SD.c.sale_id)
+        .where(
+            _SALE.c.fecha >= datetime.combine(desde + timedelta(days=1), time.min),
+            _SALE.c.fecha < datetime.combine(hasta + timedelta(days=1), time.min),
+            _SALE.c.anulada.is_(False),
+        )
+        .group_by(dia, _SD.c.product_id)
+    )
+    stmt = sqlite_insert(_VD).from_select(["dia", "product_id", "unidades"], q)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["dia", "product_id"],
+        set_={"unidades": stmt.excluded.unidades},
+    )
+    db.execute(stmt)
+
+
+def _avanzar(db, desde: date, hasta: date) -> None:
+    """
+    Lleva demanda_productos de `desde` a `hasta` en tres sentencias:
+    - suavizado *= (1 - ALFA) ** dias, para todos;
+    - suma de lo vendido en (desde, hasta], cada día con su peso
+      ALFA * (1 - ALFA) ** (hasta - dia);
+    - la ventana del promedio suma los días que entran y resta los que salen.
+    """
+    dias = (hasta - desde).days
+    db.execute(update(_DEM).values(suavizado=_DEM.c.suavizado * (1 - ALFA) ** dias))
+
+    pesos = (
+        values(column("dia", Date), column("peso", Float), name="pesos")
+        .data(
+            [
+                (desde + timedelta(days=i), ALFA * (1 - ALFA) ** (dias - i))
+                for i in range(1, dias + 1)
+            ]
+        )
+        .cte("pesos")
+    )
+    entran = select(
+        _VD.c.product_id,
+        (_VD.c.unidades * pesos.c.peso).label("suavizado"),
+        _VD.c.unidades.label("ventana"),
+    ).join_from(_VD, pesos, pesos.c.dia == _VD.c.dia)
+    salen = select(
+        _VD.c.product_id,
+        literal(0.0).label("suavizado"),
+        (-_VD.c.unidades).label("ventana"),
+    ).where(
+        _VD.c.dia > desde - timedelta(days=VENTANA),
+        _VD.c.dia <= hasta - timedelta(days=VENTANA),
+    )
+    cambios = union_all(entran, salen).subquery()
+    q = (
+        select(
+            cambios.c.product_id,
+            func.sum(cambios.c.suavizado),
+            func.sum(cambios.c.ventana),
+        )
+        .where(cambios.c.product_id.is_not(None))
+        .group_by(cambios.c.product_id)
+    )
+    stmt = sqlite_insert(_DEM).from_select(
+        ["product_id", "suavizado", "suma_ventana"], q
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={
+            "suavizado": _DEM.c.suavizado + stmt.excluded.suavizado,
+            "suma_ventana": _DEM.c.suma_ventana + stmt.excluded.suma_ventana,
+        },
+    )
+    db.execute(stmt)
+
+
+def descontar_anulacion(db, fecha: datetime, cantidades: dict[int, float]) -> None:
+    """
+    Saca de ventas_diarias y demanda_productos una venta anulada de `fecha`
+    ({product_id: unidades}) si su día ya estaba procesado; los días que
+    faltan ya la excluyen al acumular. En la transacción de `db` (no hace
+    commit).
+    """
+    estado = db.get(PronosticoEstado, 1)
+    dia = fecha.date()
+    if (
+        estado is None
+        or not cantidades
+        or not estado.desde <= dia <= estado.hasta
+        or estado.ventana != VENTANA
+        or estado.alfa != ALFA  # se rehace completo en la próxima actualización
+    ):
+        return
+
+    peso = ALFA * (1 - ALFA) ** (estado.hasta - dia).days
+    en_ventana = 1.0 if dia > estado.hasta - timedelta(days=VENTANA) else 0.0
+    filas = [{"p_id": pid, "q": float(q)} for pid, q in cantidades.items()]
+    db.execute(
+        update(_VD)
+        .where(_VD.c.dia == dia, _VD.c.product_id == bindparam("p_id"))
+        .values(unidades=_VD.c.unidades - bindparam("q")),
+        filas,
+    )
+    db.execute(
+        update(_DEM)
+        .where(_DEM.c.product_id == bindparam("p_id"))
+        .values(
+            suavizado=_DEM.c.suavizado - bindparam("q") * peso,
+            suma_ventana=_DEM.c.suma_ventana - bindparam("q") * en_ventana,
+        ),
+        filas,
+    )
+
+
+@medido
+def actualizar_pronostico(
+    hasta: date | None = None,
+    recalcular: bool = False,
+    *,
+    db: Session | None = None,
+) -> PronosticoEstado | None:
+    """
+    Avanza el pronóstico hasta `hasta` (por defecto ayer: el día de hoy
+    todavía está abierto). Solo procesa los días que faltan. Si ya está al
+    día, hace una sola lectura. Con recalcular=True, o si cambiaron VENTANA
+    o ALFA, lo rehace desde la primera venta. Retorna el estado (None = no
+    hay ventas).
+    """
+    hasta = hasta or date.today() - timedelta(days=1)
+
+    with sesion(db) as db:
+        try:
+            estado = db.get(PronosticoEstado, 1)
+            if estado is not None and (
+                recalcular or estado.ventana != VENTANA or estado.alfa != ALFA
+            ):
+                db.execute(delete(_VD))
+                db.execute(delete(_DEM))
+                db.delete(estado)
+                db.flush()
+                estado = None
+
+            if estado is None:
+                primera = db.execute(select(func.min(_SALE.c.fecha))).scalar()
+                if primera is None:
+                    db.commit()
+                    return None
+                inicio = primera.date()
+                estado = PronosticoEstado(
+                    id=1,
+                    desde=inicio,
+                    hasta=inicio - timedelta(days=1),
+                    ventana=VENTANA,
+                    alfa=ALFA,
+                )
+                db.add(estado)
+
+            if hasta > estado.hasta:
+                _acumular_ventas(db, estado.hasta, hasta)
+                _avanzar(db, estado.hasta, hasta)
+                estado.hasta = hasta
+
+            db.commit()
+            db.refresh(estado)
+            db.expunge(estado)
+            return estado
+        except Exception:
+            db.rollback()
+            raise
+
+
+# ----------------------------
+# Consultas
+# ----------------------------
+def cantidad_a_pedir(
+    stock: float,
+    stock_minimo: float,
+    demanda: float,
+    dias_cobertura: int,
+    plazo_entrega: int,
+) -> float:
+    """
+    Lo que falta para cubrir el plazo de entrega más `dias_cobertura` días
+    de demanda sin bajar del mínimo. Se redondea hacia arriba a unidades.
+    """
+    objetivo = stock_minimo + demanda * (plazo_entrega + dias_cobertura)
+    return float(max(math.ceil(objetivo - stock - 1e-9), 0))
+
+
+@medido
+def pronosticos(
+    dias_cobertura: int = 15,
+    plazo_entrega: int = 3,
+    product_ids=None,
+    actualizar: bool = True,
+    *,
+    db: Session | None = None,
+) -> list[PronosticoProducto]:
+    """
+    Demanda diaria estimada, días de cobertura y cantidad sugerida para
+    cada producto activo. Usa una sola consulta, sin recorrer sale_details.
+    """
+    if dias_cobertura < 0 or plazo_entrega < 0:
+        raise ValueError("Los días no pueden ser negativos.")
+
+    estado = actualizar_pronostico(db=db) if actualizar else None
+    if estado is None:
+        with sesion(db) as s:
+            estado = s.get(PronosticoEstado, 1)
+    dias_ventana = (
+        min(VENTANA, (estado.hasta - estado.desde).days + 1) if estado else 0
+    )
+
+    ultimo_proveedor = (
+        select(_PSP.c.supplier_id)
+        .where(_PSP.c.product_id == _PROD.c.id)
+        .order_by(_PSP.c.ultima_compra.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    q = (
+        select(
+            _PROD.c.id,
+            _PROD.c.codigo,
+            _PROD.c.nombre,
+            _PROD.c.stock_actual,
+            _PROD.c.stock_minimo,
+            _DEM.c.suma_ventana,
+            _DEM.c.suavizado,
+            ultimo_proveedor,
+        )
+        .outerjoin_from(_PROD, _DEM, _DEM.c.product_id == _PROD.c.id)
+        .where(func.coalesce(_PROD.c.activo, True).is_(True))
+    )
+    if product_ids is not None:
+        q = q.where(_PROD.c.id.in_([int(i) for i in product_ids]))
+
+    with sesion(db) as db:
+        proveedores = dict(db.execute(select(_SUP.c.id, _SUP.c.nombre)).all())
+        filas = db.execute(q).all()
+
+    resultado = []
+    for pid, codigo, nombre, stock, minimo, suma, suavizado, supplier_id in filas:
+        stock = float(stock or 0.0)
+        minimo = float(minimo or 0.0)
+        p = PronosticoProducto(
+            product_id=pid,
+            codigo=codigo,
+            nombre=nombre,
+            stock=stock,
+            stock_minimo=minimo,
+            promedio_movil=max(suma or 0.0, 0.0) / dias_ventana if dias_ventana else 0.0,
+            suavizado=max(suavizado or 0.0, 0.0),
+            supplier_id=supplier_id,
+            proveedor=proveedores.get(supplier_id),
+            sugerido=0.0,
+        )
+        p.sugerido = cantidad_a_pedir(
+            stock, minimo, p.demanda, dias_cobertura, plazo_entrega
+        )
+        resultado.append(p)
+    return resultado
+
+
+@medido
+def sugerencias_por_proveedor(
+    dias_cobertura: int = 15,
+    plazo_entrega: int = 3,
+    actualizar: bool = True,
+    *,
+    db: Session | None = None,
+) -> dict[int | None, list[PronosticoProducto]]:
+    """
+    {supplier_id: productos a pedir}, cada lista ordenada por días de
+    cobertura (lo que se agota antes primero). None = sin compras previas.
+    """
+    grupos: dict[int | None, list[PronosticoProducto]] = defaultdict(list)
+    for p in pronosticos(dias_cobertura, plazo_entrega, actualizar=actualizar, db=db):
+        if p.sugerido > 0:
+            grupos[p.supplier_id].append(p)
+    for lista in grupos.values():
+        lista.sort(
+            key=lambda p: (p.dias_cobertura is None, p.dias_cobertura or 0.0, p.codigo)
+        )
+    return dict(grupos)
@@ -1,10 +1,9 @@
-from app.db.database import engine
-from app.db.models import Base  # importa todos los modelos
+from app.db.database import init_db
 
 
 def main():
-    Base.metadata.create_all(bind=engine)
-    print("OK: Tablas creadas/verificadas.")
+    version = init_db()
+    print(f"OK: Tablas creadas/verificadas (esquema v{version}).")
 
 
 if __name__ == "__main__":
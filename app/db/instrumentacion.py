@@ -0,0 +1,401 @@
+"""
+Medición de consultas SQL y funciones de los repos.
+
+Apagada por defecto. Se prende con INVENTARIO_INSTRUMENTAR=1, con
+`python -m app.cli --perfil ...` o desde la ventana de diagnóstico
+(Ctrl+Shift+D en la ventana principal). Mientras está prendida junta:
+
+- por forma de consulta (el SQL con los parámetros ya como `?` y las
+  listas IN/VALUES colapsadas): llamadas, tiempo total/máximo,
+  histograma de latencias y filas devueltas (o afectadas, en DML). La
+  latencia es la del execute; lo que tarda leer las filas después (SQLite
+  recorre a medida que se leen) va aparte, en lectura_ms;
+- por función de repo (@medido): llamadas, tiempos, histograma, cuántas
+  consultas hizo y cuántas filas retornó;
+- consultas lentas (más de INVENTARIO_CONSULTA_LENTA_MS, por defecto
+  100 ms) con su EXPLAIN QUERY PLAN y la función de repo que la hizo:
+  quedan en consultas_lentas() y en el log (WARNING).
+
+Apagada cuesta una lectura de variable por llamada a un repo y por cursor
+abierto: los eventos de SQLAlchemy solo se registran al prenderla.
+Este módulo no importa app.db.database (database.py usa ConexionMedida).
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+
+# Límites superiores de cada balde del histograma, en ms (el último: resto)
+BALDES_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+LENTA_MS_DEFAULT = 100.0
+MAX_LENTAS = 200
+
+_activo = False
+_lock = threading.Lock()
+_local = threading.local()
+
+
+@dataclass
+class Estadistica:
+    nombre: str
+    llamadas: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    filas: int = 0
+    lectura_ms: float = 0.0
+    histograma: list[int] = field(default_factory=lambda: [0] * (len(BALDES_MS) + 1))
+
+    @property
+    def media_ms(self) -> float:
+        return self.total_ms / self.llamadas if self.llamadas else 0.0
+
+    def percentil_ms(self, p: float) -> float:
+        """Cota superior del percentil `p` (0-100) según el histograma."""
+        objetivo = self.llamadas * p / 100.0
+        acumulado = 0
+        for i, n in enumerate(self.histograma):
+            acumulado += n
+            if n and acumulado >= objetivo:
+                return BALDES_MS[i] if i < len(BALDES_MS) else self.max_ms
+        return 0.0
+
+    def sumar(self, ms: float) -> None:
+        self.llamadas += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        i = 0
+        while i < len(BALDES_MS) and ms > BALDES_MS[i]:
+            i += 1
+        self.histograma[i] += 1
+
+
+@dataclass
+class EstadisticaFuncion(Estadistica):
+    consultas: int = 0
+
+
+@dataclass
+class ConsultaLenta:
+    cuando: datetime
+    ms: float
+    forma: str
+    sql: str
+    parametros: str
+    funcion: str | None
+    plan: list[str]
+
+
+_consultas: dict[str, Estadistica] = {}
+_funciones: dict[str, EstadisticaFuncion] = {}
+_lentas: deque[ConsultaLenta] = deque(maxlen=MAX_LENTAS)
+
+
+# ----------------------------
+# Encendido
+# ----------------------------
+def activo() -> bool:
+    return _activo
+
+
+def umbral_lenta_ms() -> float:
+    try:
+        return float(os.environ.get("INVENTARIO_CONSULTA_LENTA_MS", ""))
+    except ValueError:
+        return LENTA_MS_DEFAULT
+
+
+def activar() -> None:
+    """Empieza a medir (todas las engines, también las ya creadas)."""
+    global _activo
+    if _activo:
+        return
+    event.listen(Engine, "before_cursor_execute", _antes)
+    event.listen(Engine, "after_cursor_execute", _despues)
+    _activo = True
+
+
+def desactivar() -> None:
+    """Deja de medir; lo juntado se conserva hasta reiniciar()."""
+    global _activo
+    if not _activo:
+        return
+    _activo = False
+    event.remove(Engine, "before_cursor_execute", _antes)
+    event.remove(Engine, "after_cursor_execute", _despues)
+
+
+def sql_ms_hilo() -> float:
+    """
+    ms de SQL (execute + lectura de filas) acumulados en este hilo mientras
+    la medición estuvo prendida. La diferencia entre dos lecturas separa el
+    tiempo de la base del resto (ORM, Qt); lo usa app/ui/perfil_ui.py.
+    """
+    return getattr(_local, "sql_ms", 0.0)
+
+
+def reiniciar() -> None:
+    with _lock:
+        _consultas.clear()
+        _funciones.clear()
+        _lentas.clear()
+
+
+# ----------------------------
+# Consultas
+# ----------------------------
+_RE_LISTA = re.compile(r"\?(?:\s*,\s*\?)+")
+_RE_FILAS = re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def forma_consulta(sql: str) -> str:
+    """SQL normalizado: mismos `?` para cualquier largo de IN (...) o VALUES."""
+    forma = _RE_ESPACIOS.sub(" ", sql).strip()
+    forma = _RE_LISTA.sub("?, ...", forma)
+    return _RE_FILAS.sub("(?, ...), ...", forma)
+
+
+class _CursorMedido(sqlite3.Cursor):
+    """Cuenta filas y tiempo de lectura de cada consulta (solo con medición)."""
+
+    _stat: Estadistica | None = None
+
+    def _leidas(self, n: int, t0: float) -> None:
+        if self._stat is not None:
+            ms = (time.perf_counter() - t0) * 1000.0
+            _local.sql_ms = getattr(_local, "sql_ms", 0.0) + ms
+            with _lock:
+                self._stat.filas += n
+                self._stat.lectura_ms += ms
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        fila = super().fetchone()
+        self._leidas(fila is not None, t0)
+        return fila
+
+    def fetchmany(self, *args):
+        t0 = time.perf_counter()
+        filas = super().fetchmany(*args)
+        self._leidas(len(filas), t0)
+        return filas
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        filas = super().fetchall()
+        self._leidas(len(filas), t0)
+        return filas
+
+
+class ConexionMedida(sqlite3.Connection):
+    """
+    factory= de sqlite3.connect: con la medición prendida los cursores
+    cuentan filas leídas; apagada, cursor() es el de siempre.
+    """
+
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = _CursorMedido if _activo else sqlite3.Cursor
+        return super().cursor(factory)
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_t_consultas", []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    pila = conn.info.get("_t_consultas")
+    if not pila:
+        return
+    ms = (time.perf_counter() - pila.pop()) * 1000.0
+    _local.sql_ms = getattr(_local, "sql_ms", 0.0) + ms
+    forma = forma_consulta(statement)
+    funciones = getattr(_local, "pila", None)
+
+    with _lock:
+        stat = _consultas.get(forma)
+        if stat is None:
+            stat = _consultas[forma] = Estadistica(forma)
+        stat.sumar(ms)
+        if cursor.rowcount > 0:  # DML: filas afectadas
+            stat.filas += cursor.rowcount
+        for nombre in funciones or ():
+            f = _funciones.get(nombre)
+            if f is not None:
+                f.consultas += 1
+    if isinstance(cursor, _CursorMedido):
+        cursor._stat = stat
+
+    if ms >= umbral_lenta_ms():
+        _registrar_lenta(cursor, statement, parameters, executemany, ms, forma, funciones)
+
+
+def _registrar_lenta(cursor, statement, parameters, executemany, ms, forma, funciones):
+    plan: list[str] = []
+    if not executemany and not statement.lstrip().upper().startswith("EXPLAIN"):
+        try:
+            # Cursor aparte de la misma conexión: no pasa por los eventos
+            filas = cursor.connection.execute(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            ).fetchall()
+            plan = [str(f[-1]) for f in filas]
+        except sqlite3.Error as e:
+            plan = [f"(sin plan: {e})"]
+    lenta = ConsultaLenta(
+        cuando=datetime.now(),
+        ms=ms,
+        forma=forma,
+        sql=statement,
+        parametros=repr(parameters)[:500],
+        funcion=funciones[-1] if funciones else None,
+        plan=plan,
+    )
+    with _lock:
+        _lentas.append(lenta)
+    log.warning(
+        "Consulta lenta (%.1f ms, %s): %s\n  plan: %s",
+        ms,
+        lenta.funcion or "-",
+        forma[:300],
+        " | ".join(plan) or "-",
+    )
+
+
+# ----------------------------
+# Funciones de repo
+# ----------------------------
+def medido(fn):
+    """Decorador para las funciones públicas de los repos."""
+    nombre = f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        if not _activo:
+            return fn(*args, **kwargs)
+
+        with _lock:
+            if nombre not in _funciones:
+                _funciones[nombre] = EstadisticaFuncion(nombre)
+        pila = getattr(_local, "pila", None)
+        if pila is None:
+            pila = _local.pila = []
+        pila.append(nombre)
+        t0 = time.perf_counter()
+        try:
+            resultado = fn(*args, **kwargs)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            pila.pop()
+            with _lock:
+                _funciones[nombre].sumar(ms)
+        if isinstance(resultado, (list, tuple, dict)):
+            with _lock:
+                _funciones[nombre].filas += len(resultado)
+        return resultado
+
+    return envoltura
+
+
+# ----------------------------
+# Reportes
+# ----------------------------
+def consultas() -> list[Estadistica]:
+    """Copias, de la que más tiempo suma a la que menos."""
+    with _lock:
+        return sorted(
+            (Estadistica(**asdict(s)) for s in _consultas.values()),
+            key=lambda s: -(s.total_ms + s.lectura_ms),
+        )
+
+
+def funciones() -> list[EstadisticaFuncion]:
+    with _lock:
+        return sorted(
+            (EstadisticaFuncion(**asdict(s)) for s in _funciones.values()),
+            key=lambda s: -s.total_ms,
+        )
+
+
+def consultas_lentas() -> list[ConsultaLenta]:
+    with _lock:
+        return list(_lentas)
+
+
+def reporte(top: int = 20) -> str:
+    lineas = [
+        f"{'llamadas':>9} {'total ms':>10} {'media':>8} {'p95':>8} {'máx':>8} "
+        f"{'filas':>9}  función"
+    ]
+    for s in funciones()[:top]:
+        lineas.append(
+            f"{s.llamadas:9d} {s.total_ms:10.1f} {s.media_ms:8.2f} "
+            f"{s.percentil_ms(95):8.1f} {s.max_ms:8.1f} {s.filas:9d}  "
+            f"{s.nombre} ({s.consultas} consultas)"
+        )
+    lineas.append("")
+    lineas.append(
+        f"{'llamadas':>9} {'total ms':>10} {'media':>8} {'p95':>8} {'máx':>8} "
+        f"{'filas':>9} {'lectura':>9}  consulta"
+    )
+    for s in consultas()[:top]:
+        lineas.append(
+            f"{s.llamadas:9d} {s.total_ms:10.1f} {s.media_ms:8.2f} "
+            f"{s.percentil_ms(95):8.1f} {s.max_ms:8.1f} {s.filas:9d} "
+            f"{s.lectura_ms:9.1f}  {s.nombre[:160]}"
+        )
+    lentas = consultas_lentas()
+    if lentas:
+        lineas.append("")
+        lineas.append(f"Consultas lentas (>= {umbral_lenta_ms():.0f} ms): {len(lentas)}")
+        for c in lentas[-top:]:
+            lineas.append(f"{c.ms:9.1f} ms  {c.funcion or '-'}  {c.forma[:160]}")
+            lineas.extend(f"             plan: {p}" for p in c.plan)
+    return "\n".join(lineas)
+
+
+def volcar_json(ruta: str | Path) -> Path:
+    """Todo lo juntado en JSON (para comparar corridas o adjuntar a un reporte)."""
+
+    def _stat(s: Estadistica) -> dict:
+        d = asdict(s)
+        d["media_ms"] = s.media_ms
+        d["p95_ms"] = s.percentil_ms(95)
+        return d
+
+    datos = {
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "baldes_ms": list(BALDES_MS),
+        "umbral_lenta_ms": umbral_lenta_ms(),
+        "funciones": [_stat(s) for s in funciones()],
+        "consultas": [_stat(s) for s in consultas()],
+        "lentas": [
+            {**asdict(c), "cuando": c.cuando.isoformat(timespec="seconds")}
+            for c in consultas_lentas()
+        ],
+    }
+    ruta = Path(ruta)
+    ruta.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+    return ruta
+
+
+if os.environ.get("INVENTARIO_INSTRUMENTAR") == "1":
+    activar()
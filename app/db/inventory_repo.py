@@ -0,0 +1,495 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.events import encolar, StockCambiado
+from app.db.models import InventoryMovement, Product, StockCheckpoint
+from app.utils.dinero import Dinero
+
+ORIGENES = ("ENTRADA", "VENTA", "ANULACION", "AJUSTE")
+
+_MOV = InventoryMovement.__table__
+_CP = StockCheckpoint.__table__
+_PROD = Product.__table__
+
+# Antes de cualquier fecha real (para productos sin checkpoint)
+_SIN_CHECKPOINT = datetime(1900, 1, 1)
+
+
+@dataclass
+class ValorProducto:
+    product_id: int
+    codigo: str
+    nombre: str
+    stock: float
+    costo_promedio: Dinero
+    valor: Dinero
+
+
+@dataclass
+class LineaKardex:
+    fecha: datetime | None
+    origen: str  # "SALDO" en la primera línea
+    documento_id: int | None
+    delta: float
+    costo_unitario: Dinero
+    stock: float
+    costo_promedio: Dinero
+    valor: Dinero
+
+
+@dataclass
+class DiferenciaStock:
+    product_id: int
+    codigo: str
+    nombre: str
+    stock_actual: float
+    stock_kardex: float
+
+    @property
+    def diferencia(self) -> float:
+        return self.stock_actual - self.stock_kardex
+
+
+# ----------------------------
+# Registrar (dentro de la transacción del documento)
+# ----------------------------
+def registrar_movimientos_stock(db, movimientos: list[dict]) -> None:
+    """
+    movimientos = [
+        {"product_id": 1, "delta": -2, "origen": "VENTA", "documento_id": 5,
+         "fecha": datetime, "costo_unitario": Dinero},
+        ...
+    ]
+    Un solo executemany en la transacción de `db` (no hace commit).
+    Si algún movimiento queda antes de un checkpoint existente (p. ej. carga
+    de histórico), esos checkpoints se borran: ya no cuadran.
+    """
+    if not movimientos:
+        return
+
+    for m in movimientos:
+        if m["origen"] not in ORIGENES:
+            raise ValueError(f"Origen de movimiento inválido: {m['origen']}")
+    db.execute(insert(_MOV), movimientos)
+
+    desde: dict[int, datetime] = {}
+    for m in movimientos:
+        pid, fecha = m["product_id"], m["fecha"]
+        if pid not in desde or fecha < desde[pid]:
+            desde[pid] = fecha
+    db.execute(
+        delete(_CP).where(
+            _CP.c.product_id == bindparam("p_id"), _CP.c.fecha >= bindparam("desde")
+        ),
+        [{"p_id": pid, "desde": f} for pid, f in desde.items()],
+    )
+
+
+# ----------------------------
+# Conciliación
+# ----------------------------
+@medido
+def conciliar_stock(
+    corregir: bool = False,
+    tolerancia: float = 1e-6,
+    *,
+    db: Session | None = None,
+) -> list[DiferenciaStock]:
+    """
+    Compara products.stock_actual con la suma del kardex, en UNA consulta
+    agrupada. Retorna los productos que no cuadran.
+    corregir=True => stock_actual := suma del kardex (un solo executemany).
+    """
+    kardex = (
+        select(_MOV.c.product_id, func.sum(_MOV.c.delta).label("stock"))
+        .group_by(_MOV.c.product_id)
+        .subquery()
+    )
+    stock_kardex = func.coalesce(kardex.c.stock, 0.0)
+    stock_actual = func.coalesce(_PROD.c.stock_actual, 0.0)
+
+    q = (
+        select(
+            _PROD.c.id,
+            _PROD.c.codigo,
+            _PROD.c.nombre,
+            stock_actual,
+            stock_kardex,
+        )
+        .select_from(_PROD.outerjoin(kardex, kardex.c.product_id == _PROD.c.id))
+        .where(func.abs(stock_actual - stock_kardex) > tolerancia)
+        .order_by(_PROD.c.id)
+    )
+
+    with sesion(db) as db:
+        diferencias = [DiferenciaStock(*row) for row in db.execute(q)]
+
+        if corregir and diferencias:
+            try:
+                db.execute(
+                    update(_PROD)
+                    .where(_PROD.c.id == bindparam("p_id"))
+                    .values(stock_actual=bindparam("stock")),
+                    [
+                        {"p_id": d.product_id, "stock": d.stock_kardex}
+                        for d in diferencias
+                    ],
+                )
+                encolar(db, StockCambiado(tuple(d.product_id for d in diferencias)))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+    return diferencias
+
+
+# ----------------------------
+# Stock a una fecha (checkpoint + movimientos posteriores)
+# ----------------------------
+def _snapshot_por_producto(fecha: datetime, ids=None):
+    """
+    CTE (id, codigo, nombre, fecha del último snapshot <= `fecha`).
+    Subconsulta correlacionada: una búsqueda en el índice (product_id, fecha)
+    por producto, en vez de agrupar todos los snapshots; MATERIALIZED para
+    que SQLite lo recorra primero y busque los movimientos por producto.
+    """
+    ultima = (
+        select(func.max(_CP.c.fecha))
+        .where(_CP.c.product_id == _PROD.c.id, _CP.c.fecha <= fecha)
+        .scalar_subquery()
+    )
+    q = select(_PROD.c.id, _PROD.c.codigo, _PROD.c.nombre, ultima.label("fecha"))
+    if ids is not None:
+        q = q.where(_PROD.c.id.in_(ids))
+    return q.cte("snap").prefix_with("MATERIALIZED")
+
+
+def _consulta_stock_a_fecha(fecha: datetime, product_ids=None):
+    """
+    (product_id, stock a `fecha`, stock del checkpoint usado o None).
+    Por producto: último checkpoint <= fecha y la suma de movimientos entre
+    ese checkpoint y `fecha` (búsqueda por índice product_id, fecha).
+    """
+    snap = _snapshot_por_producto(
+        fecha, None if product_ids is None else [int(i) for i in product_ids]
+    )
+    delta = (
+        select(func.coalesce(func.sum(_MOV.c.delta), 0.0))
+        .where(
+            _MOV.c.product_id == snap.c.id,
+            _MOV.c.fecha > func.coalesce(snap.c.fecha, _SIN_CHECKPOINT),
+            _MOV.c.fecha <= fecha,
+        )
+        .scalar_subquery()
+    )
+
+    return select(
+        snap.c.id, func.coalesce(_CP.c.stock, 0.0) + delta, _CP.c.stock
+    ).select_from(
+        snap.outerjoin(
+            _CP, (_CP.c.product_id == snap.c.id) & (_CP.c.fecha == snap.c.fecha)
+        )
+    )
+
+
+@medido
+def stock_a_fecha(
+    fecha: datetime,
+    product_ids=None,
+    *,
+    db: Session | None = None,
+) -> dict[int, float]:
+    """
+    {product_id: stock} al final de `fecha` (incluye movimientos <= fecha).
+    Sin product_ids => todo el catálogo.
+    """
+    with sesion(db) as db:
+        return {
+            pid: float(stock)
+            for pid, stock, _cp in db.execute(_consulta_stock_a_fecha(fecha, product_ids))
+        }
+
+
+@medido
+def guardar_checkpoints(db, fecha: datetime) -> int:
+    """
+    Snapshot de stock y valoración de cada producto a `fecha`, partiendo del
+    snapshot anterior. Solo escribe los productos que cambiaron.
+    En la transacción de `db` (no hace commit). Retorna cuántos se guardaron.
+    """
+    filas = [
+        {
+            "product_id": e.product_id,
+            "fecha": fecha,
+            "stock": e.stock,
+            "costo_promedio": e.costo_promedio,
+            "valor": e.valor,
+        }
+        for e, cambio in _estado_a_fecha(db, fecha)
+        if cambio
+    ]
+    if filas:
+        stmt = sqlite_insert(_CP)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["product_id", "fecha"],
+            set_={
+                "stock": stmt.excluded.stock,
+                "costo_promedio": stmt.excluded.costo_promedio,
+                "valor": stmt.excluded.valor,
+            },
+        )
+        db.execute(stmt, filas)
+    return len(filas)
+
+
+def crear_checkpoints(
+    fecha: datetime | None = None,
+    *,
+    db: Session | None = None,
+) -> int:
+    """
+    Snapshot de stock y valoración de cada producto a `fecha` (por defecto
+    ahora), en su propia transacción. Ver guardar_checkpoints.
+    """
+    fecha = fecha or datetime.now()
+
+    with sesion(db) as db:
+        try:
+            n = guardar_checkpoints(db, fecha)
+            db.commit()
+            return n
+        except Exception:
+            db.rollback()
+            raise
+
+
+# ----------------------------
+# Valoración y kardex (snapshot más cercano + movimientos posteriores)
+# ----------------------------
+def _redondear(x: float) -> int:
+    """Como ROUND() de SQLite: mitad lejos de cero."""
+    return int(x + 0.5) if x >= 0 else -int(-x + 0.5)
+
+
+def _aplicar(estado: list, delta: float, origen: str, valor: float) -> None:
+    """
+    estado = [stock, costo promedio en centavos]. Solo lo que entra comprado
+    (o ajustado) mueve el costo: `valor` es lo que entró, en centavos. Misma
+    fórmula y redondeo que entries_repo._aplicar_deltas_stock; ventas y
+    anulaciones salen/vuelven al costo vigente.
+    """
+    stock = estado[0]
+    if delta > 0 and origen in ("ENTRADA", "AJUSTE"):
+        previo = stock if stock > 0 else 0.0
+        estado[1] = _redondear((previo * estado[1] + valor) / (previo + delta))
+    estado[0] = stock + delta
+
+
+def _por_documento(movs):
+    """
+    movs = (product_id, fecha, origen, documento_id, delta, costo_unitario)
+    ordenados por producto, fecha e id. Junta las líneas seguidas de una
+    misma entrada y producto en una: entries_repo._aplicar_deltas_stock
+    mueve el costo una vez por (entrada, producto) con la suma de los
+    subtotales (cada uno redondeado al centavo), no línea por línea.
+    Produce (product_id, fecha, origen, documento_id, delta, valor, unitario),
+    con valor en centavos y unitario el promedio de las líneas.
+    """
+    actual = None
+    for pid, fecha, origen, documento_id, delta, unitario in movs:
+        unitario = unitario or 0
+        if origen != "ENTRADA":
+            if actual is not None:
+                yield _cerrar_grupo(actual)
+                actual = None
+            yield pid, fecha, origen, documento_id, delta, unitario * delta, unitario
+            continue
+        if actual is not None and actual[:2] == [pid, documento_id]:
+            actual[3] += delta
+            actual[4] += _redondear(unitario * delta)
+            continue
+        if actual is not None:
+            yield _cerrar_grupo(actual)
+        actual = [pid, documento_id, fecha, delta, _redondear(unitario * delta)]
+    if actual is not None:
+        yield _cerrar_grupo(actual)
+
+
+def _cerrar_grupo(grupo: list) -> tuple:
+    pid, documento_id, fecha, delta, valor = grupo
+    unitario = _redondear(valor / delta) if delta else 0
+    return pid, fecha, "ENTRADA", documento_id, delta, valor, unitario
+
+
+def _estado_a_fecha(
+    db, fecha: datetime, product_ids=None
+) -> list[tuple[ValorProducto, bool]]:
+    """
+    (stock y costo promedio de cada producto al final de `fecha`, cambió
+    respecto a su snapshot). 2 consultas: el snapshot más reciente (<= fecha)
+    de cada producto y los movimientos entre ese snapshot y `fecha`, que se
+    re-aplican en memoria por producto (en centavos enteros, sin objetos
+    por fila).
+    """
+    ids = None if product_ids is None else [int(i) for i in product_ids]
+    snap = _snapshot_por_producto(fecha, ids)
+
+    productos = db.execute(
+        select(
+            snap.c.id,
+            snap.c.codigo,
+            snap.c.nombre,
+            _CP.c.stock,
+            type_coerce(_CP.c.costo_promedio, Integer),
+        ).select_from(
+            snap.outerjoin(
+                _CP, (_CP.c.product_id == snap.c.id) & (_CP.c.fecha == snap.c.fecha)
+            )
+        )
+    ).all()
+    estados = {
+        pid: [float(stock or 0.0), int(costo or 0)]
+        for pid, _codigo, _nombre, stock, costo in productos
+    }
+
+    movs = (
+        select(
+            _MOV.c.product_id,
+            _MOV.c.fecha,
+            _MOV.c.origen,
+            _MOV.c.documento_id,
+            _MOV.c.delta,
+            type_coerce(_MOV.c.costo_unitario, Integer),
+        )
+        .select_from(
+            snap.join(
+                _MOV,
+                (_MOV.c.product_id == snap.c.id)
+                & (_MOV.c.fecha > func.coalesce(snap.c.fecha, _SIN_CHECKPOINT))
+                & (_MOV.c.fecha <= fecha),
+            )
+        )
+        .order_by(_MOV.c.product_id, _MOV.c.fecha, _MOV.c.id)
+    )
+    for pid, _fecha, origen, _doc, delta, valor, _unitario in _por_documento(
+        db.execute(movs)
+    ):
+        _aplicar(estados[pid], delta, origen, valor)
+
+    resultado = []
+    for pid, codigo, nombre, stock0, costo0 in productos:
+        stock, costo = estados[pid]
+        if stock0 is not None:
+            cambio = stock != stock0 or costo != costo0
+        else:
+            cambio = stock != 0 or costo != 0
+        valor = ValorProducto(
+            product_id=pid,
+            codigo=codigo,
+            nombre=nombre,
+            stock=stock,
+            costo_promedio=Dinero.de_centavos(costo),
+            valor=Dinero.de_centavos(_redondear(costo * stock)),
+        )
+        resultado.append((valor, cambio))
+    return resultado
+
+
+@medido
+def valoracion_a_fecha(
+    fecha: datetime,
+    product_ids=None,
+    *,
+    db: Session | None = None,
+) -> list[ValorProducto]:
+    """
+    Cantidad y valoración (costo promedio ponderado) de cada producto al
+    final de `fecha`. El total es sum(v.valor for v in ...).
+    """
+    with sesion(db) as db:
+        return [v for v, _cambio in _estado_a_fecha(db, fecha, product_ids)]
+
+
+@medido
+def kardex(
+    product_id: int,
+    desde: datetime | None = None,
+    hasta: datetime | None = None,
+    *,
+    db: Session | None = None,
+) -> list[LineaKardex]:
+    """
+    Kardex de un producto: primera línea "SALDO" (saldo inicial a `desde`),
+    luego cada movimiento de (desde, hasta] con stock, costo promedio y
+    valor acumulados (las líneas de una entrada con el mismo producto van
+    juntas, al costo promedio de ellas). Parte del snapshot más cercano anterior a `desde`.
+    """
+    product_id = int(product_id)
+    hasta = hasta or datetime.now()
+
+    with sesion(db) as db:
+        if desde is None:
+            estado = [0.0, 0]
+        else:
+            previo = _estado_a_fecha(db, desde, [product_id])
+            if not previo:
+                raise ValueError("Producto no encontrado.")
+            e, _cambio = previo[0]
+            estado = [e.stock, e.costo_promedio.centavos]
+
+        def _linea(fecha, origen, documento_id, delta, unitario):
+            stock, costo = estado
+            return LineaKardex(
+                fecha=fecha,
+                origen=origen,
+                documento_id=documento_id,
+                delta=delta,
+                costo_unitario=Dinero.de_centavos(unitario),
+                stock=stock,
+                costo_promedio=Dinero.de_centavos(costo),
+                valor=Dinero.de_centavos(_redondear(costo * stock)),
+            )
+
+        lineas = [_linea(desde, "SALDO", None, 0.0, estado[1])]
+
+        movs = db.execute(
+            select(
+                _MOV.c.product_id,
+                _MOV.c.fecha,
+                _MOV.c.origen,
+                _MOV.c.documento_id,
+                _MOV.c.delta,
+                type_coerce(_MOV.c.costo_unitario, Integer),
+            )
+            .where(
+                _MOV.c.product_id == product_id,
+                _MOV.c.fecha > (desde or _SIN_CHECKPOINT),
+                _MOV.c.fecha <= hasta,
+            )
+            .order_by(_MOV.c.fecha, _MOV.c.id)
+        )
+        # Una línea por documento: el costo promedio se mueve así (ver _por_documento)
+        for _pid, fecha, origen, documento_id, delta, valor, unitario in _por_documento(
+            movs
+        ):
+            _aplicar(estado, delta, origen, valor)
+            lineas.append(_linea(fecha, origen, documento_id, delta, unitario))
+        return lineas
@@ -0,0 +1,196 @@
+"""
+Tareas automáticas: cierre de días pasados, backups, resúmenes y
+mantenimiento de la base.
+
+Cada tarea tiene un intervalo; la última corrida (hora, duración, resultado)
+queda en tareas_programadas, así que los intervalos se respetan entre
+reinicios. Las tareas pesadas (solo_inactivo) solo corren cuando nadie está
+usando la app.
+
+Las corre app/ui/job_runner.py en segundo plano mientras la app está
+abierta, o `python -m app.cli tareas` desde un cron. Este módulo no
+depende de Qt.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from app.db.database import (
+    MEMORIA,
+    SessionLocal,
+    get_app_data_dir,
+    get_db_path,
+    get_engine,
+)
+from app.db.models import TareaProgramada
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Tarea:
+    nombre: str
+    cada: timedelta
+    fn: Callable[[], str | None]  # retorna un resumen (None = nada que hacer)
+    solo_inactivo: bool = True
+
+
+@dataclass
+class ResultadoTarea:
+    nombre: str
+    ok: bool
+    mensaje: str | None
+    duracion_ms: float
+
+
+# ----------------------------
+# Tareas
+# ----------------------------
+def _cierre_automatico() -> str | None:
+    from app.db.cash_repo import cerrar_dias_pendientes, dias_reabiertos
+
+    cierres = cerrar_dias_pendientes()
+    avisos = []
+    if len(cierres) == 1:
+        avisos.append(f"Día {cierres[0].fecha} cerrado")
+    elif cierres:
+        avisos.append(
+            f"{len(cierres)} días cerrados ({cierres[0].fecha} a {cierres[-1].fecha})"
+        )
+    # Los reabiertos no se cierran solos: que no queden olvidados
+    reabiertos = dias_reabiertos()
+    if reabiertos:
+        avisos.append(
+            f"Reabiertos sin cerrar: {', '.join(str(d) for d in reabiertos)}"
+        )
+    return " | ".join(avisos) or None
+
+
+def _backup() -> str | None:
+    from app.utils.backup import copiar_a_backup, crear_backup
+
+    ruta = get_db_path()
+    if str(ruta) != MEMORIA:
+        return f"Backup en {crear_backup(str(ruta))}"
+    # Base en memoria: se copia la del engine, a app_data/backups (no al cwd)
+    con = get_engine().raw_connection()
+    try:
+        destino = copiar_a_backup(con.driver_connection, get_app_data_dir() / "backups")
+    finally:
+        con.close()
+    return f"Backup en {destino}"
+
+
+def _resumenes() -> str | None:
+    from app.db.forecast_repo import actualizar_pronostico
+
+    estado = actualizar_pronostico()
+    return f"Pronóstico al {estado.hasta}" if estado else None
+
+
+def _optimizar() -> str | None:
+    from app.db.maintenance import optimizar
+
+    optimizar()
+    return None
+
+
+def _compactar() -> str | None:
+    from app.db.maintenance import compactar
+
+    # Solo vale la pena si hay bastante espacio libre
+    tamanos = compactar(min_libre=0.2)
+    if tamanos is None:
+        return None
+    antes, despues = tamanos
+    return f"Base compactada: {antes / 1e6:,.1f} MB -> {despues / 1e6:,.1f} MB"
+
+
+# En orden de ejecución: el backup va después del cierre
+TAREAS: list[Tarea] = [
+    Tarea("cierre_automatico", timedelta(hours=1), _cierre_automatico, solo_inactivo=False),
+    Tarea("backup", timedelta(hours=6), _backup),
+    Tarea("resumenes", timedelta(hours=1), _resumenes),
+    Tarea("optimize", timedelta(hours=6), _optimizar),
+    Tarea("vacuum", timedelta(days=7), _compactar),
+]
+
+
+# ----------------------------
+# Ejecución
+# ----------------------------
+def ultimas_ejecuciones() -> dict[str, TareaProgramada]:
+    with SessionLocal() as db:
+        filas = db.query(TareaProgramada).all()
+        for f in filas:
+            db.expunge(f)
+    return {f.nombre: f for f in filas}
+
+
+def vencidas(ahora: datetime | None = None, inactivo: bool = True) -> list[Tarea]:
+    """Tareas cuyo intervalo ya pasó (las pesadas, solo si `inactivo`)."""
+    ahora = ahora or datetime.now()
+    ultimas = ultimas_ejecuciones()
+    return [
+        t
+        for t in TAREAS
+        if (inactivo or not t.solo_inactivo)
+        and (t.nombre not in ultimas or ultimas[t.nombre].ultima_ejecucion + t.cada <= ahora)
+    ]
+
+
+def ejecutar(tarea: Tarea) -> ResultadoTarea:
+    """
+    Corre la tarea y registra el resultado. Un error no se propaga: queda
+    en tareas_programadas y en el log, y la tarea se reintenta en el
+    siguiente intervalo.
+    """
+    inicio = datetime.now()
+    t0 = time.perf_counter()
+    try:
+        mensaje, ok = tarea.fn(), True
+    except Exception as e:
+        log.exception("Falló la tarea %s", tarea.nombre)
+        mensaje, ok = f"{type(e).__name__}: {e}", False
+    ms = (time.perf_counter() - t0) * 1000.0
+
+    with SessionLocal() as db:
+        try:
+            db.merge(
+                TareaProgramada(
+                    nombre=tarea.nombre,
+                    ultima_ejecucion=inicio,
+                    duracion_ms=ms,
+                    ok=ok,
+                    mensaje=mensaje,
+                )
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    return ResultadoTarea(tarea.nombre, ok, mensaje, ms)
+
+
+def ejecutar_vencidas(
+    inactivo: Callable[[], bool] | None = None, todas: bool = False
+) -> list[ResultadoTarea]:
+    """
+    Corre en orden las tareas vencidas (todas=True: todas, vencidas o no).
+    `inactivo()` se consulta antes de cada tarea pesada: si el usuario
+    volvió a la app, esas quedan para la próxima vuelta.
+    """
+    inactivo = inactivo or (lambda: True)
+    pendientes = TAREAS if todas else vencidas(inactivo=True)
+
+    resultados = []
+    for tarea in pendientes:
+        if tarea.solo_inactivo and not todas and not inactivo():
+            continue
+        resultados.append(ejecutar(tarea))
+    return resultados
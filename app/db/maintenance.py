@@ -0,0 +1,60 @@
+"""
+Mantenimiento del archivo SQLite: estadísticas, índices y compactación.
+Lo usan la línea de comandos (app/cli.py) y las tareas automáticas
+(app/db/jobs.py).
+"""
+
+from __future__ import annotations
+
+from app.db.database import get_db_path, get_engine
+
+
+def _autocommit():
+    # VACUUM no corre dentro de una transacción
+    return get_engine().connect().execution_options(isolation_level="AUTOCOMMIT")
+
+
+def tamano_db() -> int:
+    """Bytes del archivo de la base más su WAL."""
+    ruta = get_db_path()
+    wal = ruta.with_name(ruta.name + "-wal")
+    return ruta.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def fraccion_libre() -> float:
+    """Fracción de páginas libres (lo que recuperaría un VACUUM)."""
+    with _autocommit() as conn:
+        paginas = conn.exec_driver_sql("PRAGMA page_count").scalar() or 0
+        libres = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+    return libres / paginas if paginas else 0.0
+
+
+def optimizar() -> None:
+    """PRAGMA optimize: ANALYZE solo de las tablas que lo necesitan."""
+    with _autocommit() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+def reindexar() -> None:
+    """Reconstruye todos los índices y recalcula las estadísticas."""
+    with _autocommit() as conn:
+        conn.exec_driver_sql("REINDEX")
+        conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+def compactar(min_libre: float = 0.0) -> tuple[int, int] | None:
+    """
+    VACUUM y vaciado del WAL. Con min_libre > 0 solo compacta si al menos
+    esa fracción de páginas está libre. Retorna (bytes antes, bytes después)
+    o None si no hizo falta.
+    Bloquea las escrituras mientras corre.
+    """
+    if min_libre > 0 and fraccion_libre() < min_libre:
+        return None
+
+    antes = tamano_db()
+    with _autocommit() as conn:
+        conn.exec_driver_sql("VACUUM")
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return antes, tamano_db()
@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+# progreso(etiqueta, hechos, total)
+Progreso = Callable[[str, int, int], None]
+
+# (version, descripcion, funcion) en orden de aplicación
+MIGRACIONES: list[tuple[int, str, Callable[[Connection, Progreso | None], None]]] = []
+
+LOTE_DEFAULT = 5000
+
+
+def migracion(version: int, descripcion: str):
+    """Registra un paso de migración. Las versiones deben ser crecientes."""
+
+    def deco(fn):
+        if MIGRACIONES and version <= MIGRACIONES[-1][0]:
+            raise RuntimeError(f"Versión de migración fuera de orden: {version}")
+        MIGRACIONES.append((version, descripcion, fn))
+        return fn
+
+    return deco
+
+
+def ultima_version() -> int:
+    return MIGRACIONES[-1][0] if MIGRACIONES else 0
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+def _avisar(progreso: Progreso | None, etiqueta: str, hechos: int, total: int):
+    if progreso is not None:
+        progreso(etiqueta, hechos, total)
+
+
+def column_exists(conn: Connection, table: str, col: str) -> bool:
+    rows = conn.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()
+    return any(row[1] == col for row in rows)
+
+
+def agregar_columna(conn: Connection, table: str, col: str, ddl: str) -> bool:
+    """ALTER TABLE ... ADD COLUMN solo si la columna no existe."""
+    if column_exists(conn, table, col):
+        return False
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {col} {ddl}")
+    return True
+
+
+def actualizar_en_lotes(
+    conn: Connection,
+    table: str,
+    set_sql: str,
+    where_sql: str | None = None,
+    lote: int = LOTE_DEFAULT,
+    progreso: Progreso | None = None,
+    etiqueta: str | None = None,
+    commit_por_lote: bool = True,
+) -> int:
+    """
+    UPDATE por rangos de rowid, con commit por lote.
+    Pensado para backfills: debe ser idempotente (se puede re-ejecutar
+    si el proceso se interrumpe a mitad). Si el UPDATE NO es idempotente
+    (p. ej. multiplicar), usar commit_por_lote=False: todo queda en la
+    transacción del paso y se confirma junto con su versión.
+    Retorna la cantidad de filas modificadas.
+    """
+    etiqueta = etiqueta or f"{table}: {set_sql}"
+    lo, hi = conn.exec_driver_sql(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").one()
+    if lo is None:
+        _avisar(progreso, etiqueta, 0, 0)
+        return 0
+
+    total = hi - lo + 1
+    cond = f" AND ({where_sql})" if where_sql else ""
+    sql = f"UPDATE {table} SET {set_sql} WHERE rowid BETWEEN ? AND ?{cond}"
+
+    cambiadas = 0
+    desde = lo
+    while desde <= hi:
+        hasta = min(desde + lote - 1, hi)
+        cambiadas += conn.exec_driver_sql(sql, (desde, hasta)).rowcount
+        if commit_por_lote:
+            conn.commit()
+        _avisar(progreso, etiqueta, hasta - lo + 1, total)
+        desde = hasta + 1
+
+    return cambiadas
+
+
+def crear_indices(
+    conn: Connection,
+    indices: list[tuple[str, str, str]],
+    progreso: Progreso | None = None,
+) -> None:
+    """
+    indices = [(nombre, tabla, "col1, col2"), ...]
+    Un commit por índice para no retener el lock de escritura todo el tiempo.
+    """
+    total = len(indices)
+    for i, (nombre, tabla, cols) in enumerate(indices, 1):
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({cols})")
+        conn.commit()
+        _avisar(progreso, f"Índice {nombre}", i, total)
+
+
+# ----------------------------
+# Versión
+# ----------------------------
+def version_actual(conn: Connection) -> int | None:
+    """
+    Versión del esquema (una sola lectura).
+    None => base sin tabla schema_version (nueva o anterior al versionado).
+    """
+    try:
+        v = conn.exec_driver_sql("SELECT MAX(version) FROM schema_version").scalar()
+    except Exception:
+        conn.rollback()
+        return None
+    return int(v or 0)
+
+
+def _marcar(conn: Connection, version: int, descripcion: str) -> None:
+    conn.execute(
+        text(
+            "INSERT OR REPLACE INTO schema_version (version, descripcion, aplicada_en) "
+            "VALUES (:v, :d, :en)"
+        ),
+        {"v": version, "d": descripcion, "en": datetime.now()},
+    )
+
+
+def migrar(engine: Engine, progreso: Progreso | None = None) -> int:
+    """
+    Lleva la base a la última versión:
+    - Si ya está al día: solo 1 consulta y retorna.
+    - Base nueva: create_all + marca todas las versiones (no hay datos que migrar).
+    - Base existente: create_all (tablas nuevas) + pasos pendientes en orden.
+    Retorna la versión final.
+    """
+    ultima = ultima_version()
+
+    with engine.connect() as conn:
+        actual = version_actual(conn)
+    if actual is not None and actual >= ultima:
+        return actual
+
+    # El ORM solo se importa si hay algo que crear/migrar (arranque rápido)
+    from app.db.models import Base
+
+    with engine.connect() as conn:
+        nueva = not inspect(conn).has_table("products")
+
+    Base.metadata.create_all(engine)
+
+    with engine.connect() as conn:
+        if nueva:
+            for version, descripcion, _fn in MIGRACIONES:
+                _marcar(conn, version, descripcion)
+            conn.commit()
+            return ultima
+
+        actual = actual or 0
+        for version, descripcion, fn in MIGRACIONES:
+            if version <= actual:
+                continue
+            _avisar(progreso, f"Migración {version}: {descripcion}", 0, 1)
+            fn(conn, progreso)
+            _marcar(conn, version, descripcion)
+            conn.commit()
+            _avisar(progreso, f"Migración {version}: {descripcion}", 1, 1)
+
+    return ultima
+
+
+# ----------------------------
+# Pasos
+# ----------------------------
+@migracion(1, "Columnas de costo y anulación")
+def _m001_columnas_costo_anulacion(conn: Connection, progreso: Progreso | None):
+    # Antes lo hacía app/db/migrate_costs.py a mano
+    agregar_columna(conn, "products", "costo_promedio", "REAL DEFAULT 0")
+    agregar_columna(conn, "sale_details", "costo_unitario", "REAL DEFAULT 0")
+    agregar_columna(conn, "sale_details", "utilidad", "REAL DEFAULT 0")
+    agregar_columna(conn, "sales", "anulada", "BOOLEAN DEFAULT 0")
+    agregar_columna(conn, "sales", "motivo_anulacion", "VARCHAR(255)")
+    agregar_columna(conn, "sales", "anulada_en", "DATETIME")
+    conn.commit()
+
+
+@migracion(2, "Normalizar NULL en costos y anulación")
+def _m002_normalizar_nulls(conn: Connection, progreso: Progreso | None):
+    actualizar_en_lotes(
+        conn,
+        "products",
+        "costo_promedio = 0",
+        "costo_promedio IS NULL",
+        progreso=progreso,
+        etiqueta="products.costo_promedio",
+    )
+    actualizar_en_lotes(
+        conn,
+        "sale_details",
+        "costo_unitario = COALESCE(costo_unitario, 0), utilidad = COALESCE(utilidad, 0)",
+        "costo_unitario IS NULL OR utilidad IS NULL",
+        progreso=progreso,
+        etiqueta="sale_details.costo_unitario/utilidad",
+    )
+    actualizar_en_lotes(
+        conn,
+        "sales",
+        "anulada = 0",
+        "anulada IS NULL",
+        progreso=progreso,
+        etiqueta="sales.anulada",
+    )
+
+
+@migracion(3, "Índices de consulta")
+def _m003_indices(conn: Connection, progreso: Progreso | None):
+    crear_indices(
+        conn,
+        [
+            ("ix_cash_movements_fecha", "cash_movements", "fecha"),
+            ("ix_cash_movements_tipo_fecha", "cash_movements", "tipo, fecha"),
+            ("ix_cash_movements_referencia", "cash_movements", "referencia"),
+            ("ix_sales_fecha", "sales", "fecha"),
+            ("ix_sale_details_sale_id", "sale_details", "sale_id"),
+            ("ix_sale_details_product_id", "sale_details", "product_id"),
+            ("ix_entries_fecha", "entries", "fecha"),
+            ("ix_entry_details_entry_id", "entry_details", "entry_id"),
+            ("ix_entry_details_product_id", "entry_details", "product_id"),
+        ],
+        progreso=progreso,
+    )
+
+
+# Columnas de dinero: de pesos (REAL) a centavos enteros (ver models.Centavos)
+_COLUMNAS_DINERO = {
+    "products": ("precio_venta", "costo_promedio"),
+    "entries": ("total",),
+    "entry_details": ("precio_compra", "subtotal"),
+    "cash_movements": ("monto",),
+    "cash_closures": (
+        "total_ingresos",
+        "total_egresos",
+        "saldo_inicial",
+        "saldo_final",
+    ),
+    "sales": ("total",),
+    "sale_details": ("precio_venta", "subtotal", "costo_unitario", "utilidad"),
+}
+
+
+@migracion(4, "Dinero en centavos enteros")
+def _m004_dinero_centavos(conn: Connection, progreso: Progreso | None):
+    # x100 no es idempotente: todas las tablas en una sola transacción,
+    # que migrar() confirma junto con la versión 4.
+    for tabla, columnas in _COLUMNAS_DINERO.items():
+        actualizar_en_lotes(
+            conn,
+            tabla,
+            ", ".join(f"{c} = CAST(ROUND({c} * 100) AS INTEGER)" for c in columnas),
+            progreso=progreso,
+            etiqueta=f"{tabla}: {', '.join(columnas)}",
+            commit_por_lote=False,
+        )
+
+
+def _utc_a_local(col: str) -> str:
+    """
+    Expresión SQL: `col` en hora local si la estampó el default viejo
+    (datetime.utcnow, siempre con microsegundos); las fechas cargadas a mano
+    o importadas (sin microsegundos) ya eran locales y quedan igual.
+    """
+    return (
+        f"CASE WHEN substr({col}, 21) NOT IN ('', '000000') "
+        f"THEN datetime({col}, 'localtime') || substr({col}, 20) ELSE {col} END"
+    )
+
+
+@migracion(5, "Kardex de inventario desde el histórico")
+def _m005_kardex(conn: Connection, progreso: Progreso | None):
+    # Se rehace completo en la transacción del paso (re-ejecutable).
+    # Todo en hora local, como las anulaciones (anulada_en) y la caja.
+    conn.exec_driver_sql("DELETE FROM inventory_movements")
+    conn.exec_driver_sql("DELETE FROM stock_checkpoints")
+    etiqueta = "Kardex desde entradas/ventas"
+
+    conn.exec_driver_sql(
+        "INSERT INTO inventory_movements "
+        "(product_id, fecha, delta, origen, documento_id, costo_unitario) "
+        f"SELECT d.product_id, {_utc_a_local('e.fecha')}, d.cantidad, 'ENTRADA', "
+        "e.id, d.precio_compra "
+        "FROM entry_details d JOIN entries e ON e.id = d.entry_id"
+    )
+    _avisar(progreso, etiqueta, 1, 4)
+
+    conn.exec_driver_sql(
+        "INSERT INTO inventory_movements "
+        "(product_id, fecha, delta, origen, documento_id, costo_unitario) "
+        f"SELECT d.product_id, {_utc_a_local('s.fecha')}, -d.cantidad, 'VENTA', s.id, "
+        "COALESCE(d.costo_unitario, 0) "
+        "FROM sale_details d JOIN sales s ON s.id = d.sale_id"
+    )
+    _avisar(progreso, etiqueta, 2, 4)
+
+    conn.exec_driver_sql(
+        "INSERT INTO inventory_movements "
+        "(product_id, fecha, delta, origen, documento_id, costo_unitario) "
+        f"SELECT d.product_id, COALESCE(s.anulada_en, {_utc_a_local('s.fecha')}), "
+        "d.cantidad, "
+        "'ANULACION', s.id, COALESCE(d.costo_unitario, 0) "
+        "FROM sale_details d JOIN sales s ON s.id = d.sale_id "
+        "WHERE s.anulada = 1"
+    )
+    _avisar(progreso, etiqueta, 3, 4)
+
+    # Lo que el histórico no explica (stock cargado a mano, ediciones viejas)
+    # entra como AJUSTE al inicio de la vida del producto.
+    filas = conn.exec_driver_sql(
+        "SELECT p.id, COALESCE(p.stock_actual, 0) - COALESCE(k.stock, 0), "
+        f"{_utc_a_local('p.created_at')}, k.primera, COALESCE(p.costo_promedio, 0) "
+        "FROM products p LEFT JOIN ("
+        "  SELECT product_id, SUM(delta) AS stock, MIN(fecha) AS primera "
+        "  FROM inventory_movements GROUP BY product_id"
+        ") k ON k.product_id = p.id "
+        "WHERE ABS(COALESCE(p.stock_actual, 0) - COALESCE(k.stock, 0)) > 1e-9"
+    ).fetchall()
+    ajustes = []
+    for pid, delta, creado, primera, costo in filas:
+        fechas = [f for f in (creado, primera) if f]
+        fecha = min(fechas) if fechas else "1970-01-01 00:00:00.000000"
+        ajustes.append((pid, fecha, delta, costo))
+    if ajustes:
+        conn.exec_driver_sql(
+            "INSERT INTO inventory_movements "
+            "(product_id, fecha, delta, origen, documento_id, costo_unitario) "
+            "VALUES (?, ?, ?, 'AJUSTE', NULL, ?)",
+            ajustes,
+        )
+    _avisar(progreso, etiqueta, 4, 4)
+
+
+@migracion(6, "Valoración en snapshots de stock")
+def _m006_valoracion_snapshots(conn: Connection, progreso: Progreso | None):
+    agregar_columna(conn, "stock_checkpoints", "costo_promedio", "INTEGER DEFAULT 0")
+    agregar_columna(conn, "stock_checkpoints", "valor", "INTEGER DEFAULT 0")
+    # Los snapshots sin costo no sirven para valorar: se regeneran al cerrar días
+    conn.exec_driver_sql("DELETE FROM stock_checkpoints")
+
+
+@migracion(7, "Alertas de stock bajo")
+def _m007_stock_bajo(conn: Connection, progreso: Progreso | None):
+    from app.db.models import TRIGGERS_STOCK_BAJO
+
+    # create_all ya creó la tabla (y sus triggers); IF NOT EXISTS por si acaso
+    for sql in TRIGGERS_STOCK_BAJO:
+        conn.exec_driver_sql(sql)
+    conn.exec_driver_sql("DELETE FROM stock_bajo")
+    conn.execute(
+        text(
+            "INSERT INTO stock_bajo (product_id, stock, stock_minimo, desde) "
+            "SELECT id, COALESCE(stock_actual, 0), stock_minimo, :ahora "
+            "FROM products "
+            "WHERE COALESCE(activo, 1) = 1 AND COALESCE(stock_minimo, 0) > 0 "
+            "AND COALESCE(stock_actual, 0) <= stock_minimo"
+        ),
+        {"ahora": datetime.now()},
+    )
+
+
+@migracion(8, "Pronóstico de demanda")
+def _m008_pronostico(conn: Connection, progreso: Progreso | None):
+    # Tablas nuevas (las crea create_all); el caché se arma en el primer uso
+    pass
+
+
+@migracion(9, "Precios de compra por proveedor")
+def _m009_precios_proveedor(conn: Connection, progreso: Progreso | None):
+    # Desde aquí lo mantiene entries_repo; el histórico se arma una vez
+    conn.exec_driver_sql("DELETE FROM product_supplier_prices")
+    conn.exec_driver_sql(
+        "INSERT INTO product_supplier_prices "
+        "(product_id, supplier_id, ultimo_precio, primera_compra, ultima_compra, "
+        "compras, cantidad_total, valor_total) "
+        "SELECT d.product_id, e.supplier_id, "
+        "  (SELECT d2.precio_compra FROM entry_details d2 "
+        "   JOIN entries e2 ON e2.id = d2.entry_id "
+        "   WHERE d2.product_id = d.product_id AND e2.supplier_id = e.supplier_id "
+        "   ORDER BY e2.fecha DESC, d2.id DESC LIMIT 1), "
+        "  MIN(e.fecha), MAX(e.fecha), COUNT(DISTINCT e.id), "
+        "  SUM(d.cantidad), SUM(d.subtotal) "
+        "FROM entry_details d JOIN entries e ON e.id = d.entry_id "
+        "GROUP BY d.product_id, e.supplier_id"
+    )
+    _avisar(progreso, "Precios por proveedor", 1, 1)
+
+
+@migracion(10, "Tareas programadas")
+def _m010_tareas(conn: Connection, progreso: Progreso | None):
+    # Tabla nueva (la crea create_all); se llena con la primera corrida
+    pass
+
+
+# "Método: X" o "Método: X | Motivo: ..." -> "X"
+_RESTO_METODO = "SUBSTR(observacion, INSTR(observacion, 'Método: ') + 8)"
+_METODO_DE_OBSERVACION = (
+    f"NULLIF(TRIM(CASE WHEN INSTR({_RESTO_METODO}, ' | ') > 0 "
+    f"THEN SUBSTR({_RESTO_METODO}, 1, INSTR({_RESTO_METODO}, ' | ') - 1) "
+    f"ELSE {_RESTO_METODO} END), '')"
+)
+
+
+@migracion(11, "Método de pago como columna")
+def _m011_metodo_pago(conn: Connection, progreso: Progreso | None):
+    agregar_columna(conn, "cash_movements", "metodo_pago", "VARCHAR(30)")
+    agregar_columna(conn, "sales", "metodo_pago", "VARCHAR(30)")
+    conn.commit()
+    # Idempotentes (solo tocan lo que sigue en NULL): commit por lote
+    actualizar_en_lotes(
+        conn,
+        "cash_movements",
+        f"metodo_pago = {_METODO_DE_OBSERVACION}",
+        "metodo_pago IS NULL AND observacion LIKE '%Método: %'",
+        progreso=progreso,
+        etiqueta="cash_movements.metodo_pago",
+    )
+    # La venta toma el método de su INGRESO de caja (índice por referencia)
+    actualizar_en_lotes(
+        conn,
+        "sales",
+        "metodo_pago = (SELECT c.metodo_pago FROM cash_movements c "
+        "WHERE c.referencia = 'Venta #' || sales.id AND c.tipo = 'INGRESO' "
+        "AND c.concepto = 'Venta' LIMIT 1)",
+        "metodo_pago IS NULL",
+        progreso=progreso,
+        etiqueta="sales.metodo_pago",
+    )
+    crear_indices(
+        conn,
+        [
+            ("ix_cash_movements_metodo_pago", "cash_movements", "metodo_pago"),
+            ("ix_sales_metodo_pago", "sales", "metodo_pago"),
+        ],
+        progreso=progreso,
+    )
+
+
+@migracion(12, "Versión de cierres y bloqueo de días cerrados")
+def _m012_cache_cierres(conn: Connection, progreso: Progreso | None):
+    from app.db.models import TRIGGER_DIA_CERRADO, TRIGGERS_CIERRES
+
+    # create_all ya creó cache_versiones; los triggers van sobre tablas viejas
+    for sql in (*TRIGGERS_CIERRES, TRIGGER_DIA_CERRADO):
+        conn.exec_driver_sql(sql)
+
+
+@migracion(13, "Registro de reaperturas de caja")
+def _m013_reaperturas(conn: Connection, progreso: Progreso | None):
+    # Tabla nueva (la crea create_all); se llena con cada reabrir_dia
+    pass
+
+
+# Columnas que estampaba datetime.utcnow (ver _utc_a_local)
+_FECHAS_UTC = {
+    "sales": ("fecha",),
+    "entries": ("fecha",),
+    "products": ("created_at",),
+    "product_supplier_prices": ("primera_compra", "ultima_compra"),
+}
+
+
+@migracion(14, "Ventas y entradas en hora local")
+def _m014_hora_local(conn: Connection, progreso: Progreso | None):
+    # Pasar a local no es idempotente: todo en la transacción del paso
+    for tabla, columnas in _FECHAS_UTC.items():
+        actualizar_en_lotes(
+            conn,
+            tabla,
+            ", ".join(f"{c} = {_utc_a_local(c)}" for c in columnas),
+            progreso=progreso,
+            etiqueta=f"{tabla}: {', '.join(columnas)}",
+            commit_por_lote=False,
+        )
+    # El kardex toma la fecha de su documento (ya local); las anulaciones
+    # y los ajustes ya estaban en hora local
+    for origen, tabla in (("VENTA", "sales"), ("ENTRADA", "entries")):
+        conn.exec_driver_sql(
+            "UPDATE inventory_movements SET fecha = COALESCE("
+            f"(SELECT t.fecha FROM {tabla} t WHERE t.id = inventory_movements.documento_id), "
+            f"fecha) WHERE origen = '{origen}'"
+        )
+    # Cortados con el reloj mezclado: los snapshots se regeneran al cerrar
+    # días y el pronóstico (días de venta) se rehace en el próximo uso
+    for tabla in ("stock_checkpoints", "ventas_diarias", "demanda_productos",
+                  "pronostico_estado"):
+        conn.exec_driver_sql(f"DELETE FROM {tabla}")
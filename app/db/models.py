@@ -7,13 +7,44 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Date,
+    Index,
+    DDL,
+    event,
 )
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from sqlalchemy.sql import func
 
+from app.utils.dinero import Dinero, a_centavos
+
 Base = declarative_base()
 
+# Todas las fechas van en hora local (datetime.now), como la caja y los
+# cierres: documentos, kardex y cortes de día usan el mismo reloj.
+
+
+class Centavos(TypeDecorator):
+    """
+    Dinero guardado como centavos enteros; en Python se lee como Dinero.
+    Acepta Dinero, int, float o Decimal (en pesos) al escribir.
+    SUM() sobre la columna también devuelve Dinero.
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return a_centavos(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # Columnas viejas conservan afinidad REAL: 12345.0 -> 12345
+        return Dinero.de_centavos(round(value))
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -22,12 +53,12 @@ class Product(Base):
     codigo = Column(String(50), unique=True, nullable=False)
     nombre = Column(String(150), nullable=False)
     unidad = Column(String(20), default="und")
-    precio_venta = Column(Float, default=0.0)
+    precio_venta = Column(Centavos, default=0)
     stock_minimo = Column(Float, default=0.0)
     stock_actual = Column(Float, default=0.0)  # ← NUEVO
     activo = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    costo_promedio = Column(Float, default=0.0)
+    created_at = Column(DateTime, default=datetime.now)
+    costo_promedio = Column(Centavos, default=0)
 
 
 class Supplier(Base):
@@ -50,8 +81,8 @@ class Entry(Base):
     id = Column(Integer, primary_key=True)
     supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=False)
 
-    fecha = Column(DateTime, default=datetime.utcnow)
-    total = Column(Float, default=0.0)
+    fecha = Column(DateTime, default=datetime.now, index=True)
+    total = Column(Centavos, default=0)
 
     supplier = relationship("Supplier")
     details = relationship(
@@ -63,12 +94,14 @@ class EntryDetail(Base):
     __tablename__ = "entry_details"
 
     id = Column(Integer, primary_key=True)
-    entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    entry_id = Column(Integer, ForeignKey("entries.id"), nullable=False, index=True)
+    product_id = Column(
+        Integer, ForeignKey("products.id"), nullable=False, index=True
+    )
 
     cantidad = Column(Float, nullable=False)
-    precio_compra = Column(Float, default=0.0)
-    subtotal = Column(Float, default=0.0)
+    precio_compra = Column(Centavos, default=0)
+    subtotal = Column(Centavos, default=0)
 
     entry = relationship("Entry", back_populates="details")
     product = relationship("Product")
@@ -76,6 +109,9 @@ class EntryDetail(Base):
 
 class CashMovement(Base):
     __tablename__ = "cash_movements"
+    __table_args__ = (
+        Index("ix_cash_movements_tipo_fecha", "tipo", "fecha"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -84,15 +120,18 @@ class CashMovement(Base):
 
     concepto = Column(String, nullable=False)
 
-    monto = Column(Float, nullable=False)
+    monto = Column(Centavos, nullable=False)
 
-    fecha = Column(DateTime(timezone=True), server_default=func.now())
+    fecha = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
-    referencia = Column(String, nullable=True)
+    referencia = Column(String, nullable=True, index=True)
     # ejemplo: "Venta #5" o "Compra #3"
 
     observacion = Column(String, nullable=True)
 
+    # "Efectivo", "Nequi", ... (antes solo como texto en observacion)
+    metodo_pago = Column(String(30), nullable=True, index=True)
+
 
 class CashClosure(Base):
     __tablename__ = "cash_closures"
@@ -100,21 +139,86 @@ class CashClosure(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     fecha = Column(Date, nullable=False, unique=True)  # 1 cierre por día
 
-    total_ingresos = Column(Float, default=0.0)
-    total_egresos = Column(Float, default=0.0)
-    saldo_inicial = Column(Float, default=0.0)
-    saldo_final = Column(Float, default=0.0)
+    total_ingresos = Column(Centavos, default=0)
+    total_egresos = Column(Centavos, default=0)
+    saldo_inicial = Column(Centavos, default=0)
+    saldo_final = Column(Centavos, default=0)
 
     creado_en = Column(DateTime, default=datetime.now)
     cerrado_por = Column(String(120), nullable=True)  # opcional (usuario)
 
 
+class ReaperturaCaja(Base):
+    """
+    Registro de cada día reabierto (cash_repo.reabrir_dia): copia del cierre
+    borrado y el ajuste que se corrió a los cierres posteriores.
+    """
+
+    __tablename__ = "cash_reaperturas"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    fecha = Column(Date, nullable=False, index=True)  # día reabierto
+    reabierto_en = Column(DateTime, default=datetime.now)
+    reabierto_por = Column(String(120), nullable=True)
+    motivo = Column(String, nullable=True)
+
+    # el cierre tal como estaba
+    total_ingresos = Column(Centavos, default=0)
+    total_egresos = Column(Centavos, default=0)
+    saldo_inicial = Column(Centavos, default=0)
+    saldo_final = Column(Centavos, default=0)
+    cerrado_en = Column(DateTime, nullable=True)
+    cerrado_por = Column(String(120), nullable=True)
+
+    # lo que se sumó a saldo_inicial/saldo_final de los cierres posteriores
+    ajuste = Column(Centavos, default=0)
+    cierres_ajustados = Column(Integer, default=0)
+
+
+class VersionCache(Base):
+    """
+    Contadores que suben con cada cambio de una tabla casi estática (los
+    mantienen triggers). Un proceso con esa tabla en memoria sabe si sigue
+    vigente leyendo una fila (cash_repo: días cerrados).
+    """
+
+    __tablename__ = "cache_versiones"
+
+    nombre = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+_SUBIR_VERSION_CIERRES = (
+    "INSERT INTO cache_versiones (nombre, version) VALUES ('cierres', 1) "
+    "ON CONFLICT(nombre) DO UPDATE SET version = version + 1"
+)
+TRIGGERS_CIERRES = [
+    "CREATE TRIGGER IF NOT EXISTS trg_cierres_alta "
+    f"AFTER INSERT ON cash_closures BEGIN {_SUBIR_VERSION_CIERRES}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_cierres_baja "
+    f"AFTER DELETE ON cash_closures BEGIN {_SUBIR_VERSION_CIERRES}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_cierres_cambio "
+    f"AFTER UPDATE OF fecha ON cash_closures BEGIN {_SUBIR_VERSION_CIERRES}; END",
+]
+# Último resguardo: un día cerrado por otro proceso que este aún no vio
+TRIGGER_DIA_CERRADO = (
+    "CREATE TRIGGER IF NOT EXISTS trg_caja_dia_cerrado "
+    "BEFORE INSERT ON cash_movements "
+    "WHEN EXISTS (SELECT 1 FROM cash_closures WHERE fecha = date(NEW.fecha)) "
+    "BEGIN SELECT RAISE(ABORT, 'DIA_CERRADO'); END"
+)
+
+for _sql in TRIGGERS_CIERRES:
+    event.listen(CashClosure.__table__, "after_create", DDL(_sql))
+event.listen(CashMovement.__table__, "after_create", DDL(TRIGGER_DIA_CERRADO))
+
+
 class Sale(Base):
     __tablename__ = "sales"
 
     id = Column(Integer, primary_key=True)
-    fecha = Column(DateTime, default=datetime.utcnow)
-    total = Column(Float, default=0.0)
+    fecha = Column(DateTime, default=datetime.now, index=True)
+    total = Column(Centavos, default=0)
 
     details = relationship(
         "SaleDetail", back_populates="sale", cascade="all, delete-orphan"
@@ -122,20 +226,189 @@ class Sale(Base):
     anulada = Column(Boolean, default=False)
     motivo_anulacion = Column(String(255), nullable=True)
     anulada_en = Column(DateTime, nullable=True)
+    metodo_pago = Column(String(30), nullable=True, index=True)
 
 
 class SaleDetail(Base):
     __tablename__ = "sale_details"
 
     id = Column(Integer, primary_key=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
+    product_id = Column(
+        Integer, ForeignKey("products.id"), nullable=False, index=True
+    )
 
     cantidad = Column(Float, nullable=False)
-    precio_venta = Column(Float, default=0.0)
-    subtotal = Column(Float, default=0.0)
-    costo_unitario = Column(Float, default=0.0)
-    utilidad = Column(Float, default=0.0)
+    precio_venta = Column(Centavos, default=0)
+    subtotal = Column(Centavos, default=0)
+    costo_unitario = Column(Centavos, default=0)
+    utilidad = Column(Centavos, default=0)
 
     sale = relationship("Sale", back_populates="details")
     product = relationship("Product")
+
+
+class InventoryMovement(Base):
+    """Kardex: cada cambio de stock con su documento de origen."""
+
+    __tablename__ = "inventory_movements"
+    __table_args__ = (
+        Index("ix_inventory_movements_product_fecha", "product_id", "fecha"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    fecha = Column(DateTime, default=datetime.now, nullable=False, index=True)
+
+    delta = Column(Float, nullable=False)  # + entra, - sale
+    origen = Column(String(20), nullable=False)
+    # "ENTRADA", "VENTA", "ANULACION", "AJUSTE"
+    documento_id = Column(Integer, nullable=True)  # entries.id / sales.id
+    costo_unitario = Column(Centavos, default=0)
+
+    product = relationship("Product")
+
+
+class StockCheckpoint(Base):
+    """
+    Snapshot de un producto a una fecha: stock y valoración (costo promedio).
+    Evita re-sumar todo el kardex para consultas a una fecha.
+    """
+
+    __tablename__ = "stock_checkpoints"
+    __table_args__ = (
+        Index("ux_stock_checkpoints_product_fecha", "product_id", "fecha", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    fecha = Column(DateTime, nullable=False, index=True)
+    stock = Column(Float, nullable=False, default=0.0)
+    costo_promedio = Column(Centavos, default=0)
+    valor = Column(Centavos, default=0)  # stock * costo_promedio
+
+
+class StockBajo(Base):
+    """
+    Productos activos con stock_actual <= stock_minimo (y mínimo > 0).
+    La mantienen los triggers de TRIGGERS_STOCK_BAJO sobre products: ventas,
+    entradas, importaciones y ediciones la dejan al día sin recorrer el
+    catálogo.
+    """
+
+    __tablename__ = "stock_bajo"
+
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    stock = Column(Float, nullable=False)
+    stock_minimo = Column(Float, nullable=False)
+    desde = Column(DateTime, nullable=False)  # cuándo quedó bajo el mínimo
+
+
+_ES_STOCK_BAJO = (
+    "COALESCE(NEW.activo, 1) = 1 AND COALESCE(NEW.stock_minimo, 0) > 0 "
+    "AND COALESCE(NEW.stock_actual, 0) <= NEW.stock_minimo"
+)
+_AHORA = "strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')"
+_UPSERT_STOCK_BAJO = (
+    "INSERT INTO stock_bajo (product_id, stock, stock_minimo, desde) "
+    f"VALUES (NEW.id, COALESCE(NEW.stock_actual, 0), NEW.stock_minimo, {_AHORA}) "
+    "ON CONFLICT(product_id) DO UPDATE SET "
+    "stock = excluded.stock, stock_minimo = excluded.stock_minimo"
+)
+
+# Mismo criterio que products_repo.es_stock_bajo, solo para activos.
+TRIGGERS_STOCK_BAJO = [
+    "CREATE TRIGGER IF NOT EXISTS trg_stock_bajo_alta AFTER INSERT ON products "
+    f"WHEN {_ES_STOCK_BAJO} BEGIN {_UPSERT_STOCK_BAJO}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_stock_bajo_entra "
+    "AFTER UPDATE OF stock_actual, stock_minimo, activo ON products "
+    f"WHEN {_ES_STOCK_BAJO} BEGIN {_UPSERT_STOCK_BAJO}; END",
+    "CREATE TRIGGER IF NOT EXISTS trg_stock_bajo_sale "
+    "AFTER UPDATE OF stock_actual, stock_minimo, activo ON products "
+    f"WHEN NOT ({_ES_STOCK_BAJO}) "
+    "BEGIN DELETE FROM stock_bajo WHERE product_id = NEW.id; END",
+]
+
+for _sql in TRIGGERS_STOCK_BAJO:
+    # DDL() interpola con %: escapar los del strftime
+    event.listen(StockBajo.__table__, "after_create", DDL(_sql.replace("%", "%%")))
+
+
+class ProductSupplierPrice(Base):
+    """
+    Historial de compra por producto y proveedor, acumulado por
+    entries_repo al guardar cada entrada (no se recalcula desde el detalle).
+    """
+
+    __tablename__ = "product_supplier_prices"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), primary_key=True)
+    ultimo_precio = Column(Centavos, default=0)
+    primera_compra = Column(DateTime, nullable=False)
+    ultima_compra = Column(DateTime, nullable=False)
+    compras = Column(Integer, nullable=False, default=0)  # entradas distintas
+    cantidad_total = Column(Float, nullable=False, default=0.0)
+    valor_total = Column(Centavos, default=0)  # promedio = valor / cantidad
+
+
+class VentaDiaria(Base):
+    """
+    Unidades vendidas por producto y día (ventas no anuladas).
+    Clave (dia, product_id) sin rowid: se lee y escribe por rangos de días.
+    """
+
+    __tablename__ = "ventas_diarias"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    dia = Column(Date, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    unidades = Column(Float, nullable=False, default=0.0)
+
+
+class DemandaProducto(Base):
+    """
+    Estado del pronóstico por producto al día PronosticoEstado.hasta:
+    suavizado exponencial y suma de la ventana del promedio móvil.
+    Se avanza día a día sin recalcular el histórico.
+    """
+
+    __tablename__ = "demanda_productos"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    suavizado = Column(Float, nullable=False, default=0.0)
+    suma_ventana = Column(Float, nullable=False, default=0.0)
+
+
+class PronosticoEstado(Base):
+    """Una sola fila: hasta qué día está calculado y con qué parámetros."""
+
+    __tablename__ = "pronostico_estado"
+
+    id = Column(Integer, primary_key=True)
+    desde = Column(Date, nullable=False)  # primer día con datos
+    hasta = Column(Date, nullable=False)  # último día incluido
+    ventana = Column(Integer, nullable=False)
+    alfa = Column(Float, nullable=False)
+
+
+class TareaProgramada(Base):
+    """Última corrida de cada tarea automática (app/db/jobs.py)."""
+
+    __tablename__ = "tareas_programadas"
+
+    nombre = Column(String(50), primary_key=True)
+    ultima_ejecucion = Column(DateTime, nullable=False)
+    duracion_ms = Column(Float, nullable=False, default=0.0)
+    ok = Column(Boolean, nullable=False, default=True)
+    mensaje = Column(String, nullable=True)  # resumen o error
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    descripcion = Column(String(200), nullable=False)
+    aplicada_en = Column(DateTime, default=datetime.now)
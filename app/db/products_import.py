@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import csv
+import time
+import unicodedata
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import bindparam, func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.events import encolar, ProductosImportados
+from app.db.models import Product
+from app.utils.formatters import parse_numero
+
+LOTE_DEFAULT = 5000
+
+# Encabezados aceptados (normalizados: minúsculas, sin tildes ni espacios extra)
+_ALIAS = {
+    "codigo": "codigo",
+    "cod": "codigo",
+    "sku": "codigo",
+    "nombre": "nombre",
+    "descripcion": "nombre",
+    "producto": "nombre",
+    "unidad": "unidad",
+    "und": "unidad",
+    "precio": "precio_venta",
+    "precio venta": "precio_venta",
+    "precio_venta": "precio_venta",
+    "stock minimo": "stock_minimo",
+    "stock_minimo": "stock_minimo",
+    "minimo": "stock_minimo",
+}
+
+# Columnas que el import puede actualizar en productos existentes.
+# stock_actual y costo_promedio NO: esos los mueven Entradas/Ventas.
+_ACTUALIZABLES = ("nombre", "unidad", "precio_venta", "stock_minimo")
+
+# Valor de un producto nuevo cuando la celda viene vacía (o falta la columna)
+_DEFAULTS = {"unidad": "und", "precio_venta": 0.0, "stock_minimo": 0.0}
+
+
+@dataclass
+class ErrorFila:
+    fila: int
+    codigo: str
+    mensaje: str
+
+
+@dataclass
+class ResultadoImportacion:
+    filas: int = 0
+    insertados: int = 0
+    actualizados: int = 0
+    errores: list[ErrorFila] = field(default_factory=list)
+    segundos: float = 0.0
+
+    @property
+    def filas_por_segundo(self) -> float:
+        return self.filas / self.segundos if self.segundos > 0 else 0.0
+
+
+# ----------------------------
+# Lectura (streaming)
+# ----------------------------
+def _normalizar_encabezado(h, alias: dict[str, str]) -> str | None:
+    txt = unicodedata.normalize("NFKD", str(h or "")).encode("ascii", "ignore")
+    txt = " ".join(txt.decode().strip().lower().split())
+    return alias.get(txt)
+
+
+def _leer_csv(ruta: Path, alias: dict[str, str]) -> Iterator[tuple[int, dict]]:
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+
+        reader = csv.reader(f, dialecto)
+        encabezados = [_normalizar_encabezado(h, alias) for h in next(reader, [])]
+        for n, valores in enumerate(reader, start=2):
+            if not any((v or "").strip() for v in valores):
+                continue
+            yield n, {
+                col: v for col, v in zip(encabezados, valores) if col is not None
+            }
+
+
+def _leer_xlsx(ruta: Path, alias: dict[str, str]) -> Iterator[tuple[int, dict]]:
+    from openpyxl import load_workbook
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = wb.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_encabezado(h, alias) for h in next(filas, ())]
+        for n, valores in enumerate(filas, start=2):
+            if not any(v not in (None, "") for v in valores):
+                continue
+            yield n, {
+                col: v for col, v in zip(encabezados, valores) if col is not None
+            }
+    finally:
+        wb.close()
+
+
+def leer_filas(ruta, alias: dict[str, str] | None = None) -> Iterator[tuple[int, dict]]:
+    """
+    (número de fila en el archivo, {columna: valor}) para CSV o XLSX.
+    `alias` traduce encabezados normalizados a nombres de columna; los
+    encabezados que no aparecen se ignoran.
+    """
+    ruta = Path(ruta)
+    alias = _ALIAS if alias is None else alias
+    if ruta.suffix.lower() in (".xlsx", ".xlsm"):
+        return _leer_xlsx(ruta, alias)
+    return _leer_csv(ruta, alias)
+
+
+# ----------------------------
+# Validación
+# ----------------------------
+def _vacia(valor) -> bool:
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _validar(datos: dict) -> dict:
+    codigo = str(datos.get("codigo") or "").strip()
+    nombre = str(datos.get("nombre") or "").strip()
+    if not codigo or not nombre:
+        raise ValueError("Código y Nombre son obligatorios.")
+    if len(codigo) > 50:
+        raise ValueError("Código demasiado largo (máx. 50).")
+    if len(nombre) > 150:
+        raise ValueError("Nombre demasiado largo (máx. 150).")
+
+    # Celda vacía = dato no informado (None): el producto existente lo conserva
+    fila = {"codigo": codigo, "nombre": nombre}
+
+    if "unidad" in datos:
+        fila["unidad"] = str(datos.get("unidad") or "").strip() or None
+
+    for col in ("precio_venta", "stock_minimo"):
+        if col not in datos:
+            continue
+        if _vacia(datos.get(col)):
+            fila[col] = None
+            continue
+        try:
+            valor = parse_numero(datos.get(col))
+        except ValueError:
+            raise ValueError(f"Valor inválido en {col}: {datos.get(col)!r}")
+        if valor < 0:
+            raise ValueError(f"{col} no puede ser negativo.")
+        fila[col] = valor
+
+    return fila
+
+
+# ----------------------------
+# Import
+# ----------------------------
+def _upsert_lote(db, lote: list[dict], columnas: set[str]) -> tuple[int, int]:
+    """
+    INSERT ... ON CONFLICT(codigo) DO UPDATE en un solo executemany.
+    Los nuevos toman _DEFAULTS donde la celda vino vacía; los existentes
+    conservan su valor (COALESCE del dato del archivo con el guardado).
+    """
+    codigos = [f["codigo"] for f in lote]
+    existentes = {
+        c
+        for (c,) in db.query(Product.codigo).filter(Product.codigo.in_(codigos)).all()
+    }
+
+    ahora = datetime.now()
+    params = [
+        {
+            "codigo": f["codigo"],
+            "nombre": f["nombre"],
+            **{
+                col: defecto if f.get(col) is None else f[col]
+                for col, defecto in _DEFAULTS.items()
+            },
+            **{f"archivo_{col}": f.get(col) for col in _DEFAULTS},
+            "stock_actual": 0.0,
+            "costo_promedio": 0,
+            "activo": True,
+            "created_at": ahora,
+        }
+        for f in lote
+    ]
+
+    t = Product.__table__
+    stmt = insert(t)
+    set_ = {}
+    for col in _ACTUALIZABLES:
+        if col not in columnas:
+            continue
+        if col in _DEFAULTS:
+            archivo = bindparam(f"archivo_{col}", type_=t.c[col].type)
+            set_[col] = func.coalesce(archivo, t.c[col])
+        else:
+            set_[col] = stmt.excluded[col]
+    stmt = stmt.on_conflict_do_update(index_elements=["codigo"], set_=set_)
+    db.execute(stmt, params)
+
+    actualizados = len(existentes)
+    return len(lote) - actualizados, actualizados
+
+
+@medido
+def importar_productos(
+    ruta,
+    lote: int = LOTE_DEFAULT,
+    progreso: Callable[[int], None] | None = None,
+    *,
+    db: Session | None = None,
+) -> ResultadoImportacion:
+    """
+    Crea/actualiza productos desde CSV o XLSX (columnas: codigo, nombre y
+    opcionales unidad, precio_venta, stock_minimo).
+
+    - Lee el archivo en streaming y valida por lotes.
+    - Cada lote es un solo executemany con upsert por código.
+    - Las columnas opcionales que no vienen en el archivo, o que vienen
+      con la celda vacía, no se tocan en productos existentes.
+    - Las filas inválidas no detienen el import: quedan en `errores`.
+    """
+    t0 = time.perf_counter()
+    res = ResultadoImportacion()
+    vistos: dict[str, int] = {}
+    pendientes: list[dict] = []
+    columnas: set[str] = set()
+
+    with sesion(db) as db:
+        try:
+            for n, datos in leer_filas(ruta):
+                res.filas += 1
+                columnas.update(datos.keys())
+                try:
+                    fila = _validar(datos)
+                except ValueError as e:
+                    res.errores.append(
+                        ErrorFila(n, str(datos.get("codigo") or ""), str(e))
+                    )
+                    continue
+
+                previa = vistos.get(fila["codigo"])
+                if previa is not None:
+                    res.errores.append(
+                        ErrorFila(
+                            n,
+                            fila["codigo"],
+                            f"Código repetido en el archivo (fila {previa}).",
+                        )
+                    )
+                    continue
+                vistos[fila["codigo"]] = n
+
+                pendientes.append(fila)
+                if len(pendientes) >= lote:
+                    ins, act = _upsert_lote(db, pendientes, columnas)
+                    res.insertados += ins
+                    res.actualizados += act
+                    pendientes.clear()
+                    if progreso:
+                        progreso(res.filas)
+
+            if pendientes:
+                ins, act = _upsert_lote(db, pendientes, columnas)
+                res.insertados += ins
+                res.actualizados += act
+
+            if res.insertados or res.actualizados:
+                encolar(db, ProductosImportados(res.insertados + res.actualizados))
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            raise
+
+    if progreso:
+        progreso(res.filas)
+    res.segundos = time.perf_counter() - t0
+    return res
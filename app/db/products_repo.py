@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from sqlalchemy import or_
-from app.db.database import SessionLocal
+from typing import NamedTuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+from app.db.database import sesion
+from app.db.instrumentacion import medido
 from app.db.models import Product
+from app.db.events import encolar, ProductoGuardado
+from app.utils.dinero import Dinero
 
 
 def _to_float(value, default: float = 0.0) -> float:
@@ -12,12 +18,15 @@ def _to_float(value, default: float = 0.0) -> float:
     return float(value)
 
 
+@medido
 def crear_producto(
     codigo: str,
     nombre: str,
     unidad: str = "und",
-    precio_venta: float = 0.0,
+    precio_venta: Dinero | float = 0.0,
     stock_minimo: float = 0.0,
+    *,
+    db: Session | None = None,
 ) -> Product:
     """Crea un producto. Lanza ValueError si el código ya existe."""
     codigo = (codigo or "").strip()
@@ -27,7 +36,7 @@ def crear_producto(
     if not codigo or not nombre:
         raise ValueError("Código y Nombre son obligatorios.")
 
-    precio_venta = _to_float(precio_venta, 0.0)
+    precio_venta = Dinero(precio_venta)
     stock_minimo = _to_float(stock_minimo, 0.0)
 
     if precio_venta < 0:
@@ -35,7 +44,7 @@ def crear_producto(
     if stock_minimo < 0:
         raise ValueError("El stock mínimo no puede ser negativo.")
 
-    with SessionLocal() as db:
+    with sesion(db) as db:
         existente = db.query(Product).filter(Product.codigo == codigo).first()
         if existente:
             raise ValueError(f"Ya existe un producto con código: {codigo}")
@@ -50,32 +59,53 @@ def crear_producto(
             activo=True,
         )
         db.add(p)
+        db.flush()
+        encolar(db, ProductoGuardado(p.id))
         db.commit()
         db.refresh(p)
         return p
 
 
-def obtener_producto(product_id: int) -> Product | None:
-    with SessionLocal() as db:
+@medido
+def obtener_producto(product_id: int, *, db: Session | None = None) -> Product | None:
+    with sesion(db) as db:
         return db.query(Product).filter(Product.id == int(product_id)).first()
 
 
-def obtener_producto_por_codigo(codigo: str) -> Product | None:
+@medido
+def obtener_productos(product_ids, *, db: Session | None = None) -> list[Product]:
+    """Varios productos por id en una sola consulta."""
+    ids = {int(i) for i in product_ids}
+    if not ids:
+        return []
+    with sesion(db) as db:
+        return db.query(Product).filter(Product.id.in_(ids)).all()
+
+
+@medido
+def obtener_producto_por_codigo(
+    codigo: str,
+    *,
+    db: Session | None = None,
+) -> Product | None:
     codigo = (codigo or "").strip()
     if not codigo:
         return None
-    with SessionLocal() as db:
+    with sesion(db) as db:
         return db.query(Product).filter(Product.codigo == codigo).first()
 
 
+@medido
 def listar_productos(
     texto: str = "",
     incluir_inactivos: bool = True,
+    *,
+    db: Session | None = None,
 ) -> list[Product]:
     """Lista productos con filtro por código/nombre."""
     texto = (texto or "").strip()
 
-    with SessionLocal() as db:
+    with sesion(db) as db:
         q = db.query(Product)
 
         if not incluir_inactivos:
@@ -89,13 +119,60 @@ def listar_productos(
         return q.order_by(Product.id.desc()).all()
 
 
+class FilaProducto(NamedTuple):
+    """Producto para listados y combos: solo lectura, sin sesión ni identity map."""
+
+    id: int
+    codigo: str
+    nombre: str
+    unidad: str | None
+    stock_actual: float | None
+    stock_minimo: float | None
+    precio_venta: Dinero
+    activo: bool
+
+
+_COLS_PRODUCTO = [Product.__table__.c[f] for f in FilaProducto._fields]
+
+
+@medido
+def listar_productos_filas(
+    texto: str = "",
+    incluir_inactivos: bool = True,
+    product_ids=None,
+    *,
+    db: Session | None = None,
+) -> list[FilaProducto]:
+    """
+    Como listar_productos, pero solo las columnas de las grillas en tuplas
+    (sin entidades ORM). `product_ids` limita a esos productos (para
+    refrescar filas sueltas). Para editar, obtener_producto(id).
+    """
+    texto = (texto or "").strip()
+    stmt = select(*_COLS_PRODUCTO)
+    if not incluir_inactivos:
+        stmt = stmt.where(Product.activo.is_(True))
+    if texto:
+        like = f"%{texto}%"
+        stmt = stmt.where(or_(Product.codigo.ilike(like), Product.nombre.ilike(like)))
+    if product_ids is not None:
+        stmt = stmt.where(Product.id.in_({int(i) for i in product_ids}))
+
+    stmt = stmt.order_by(Product.id.desc())
+    with sesion(db) as db:
+        return [FilaProducto._make(r) for r in db.execute(stmt)]
+
+
+@medido
 def actualizar_producto(
     product_id: int,
     codigo: str,
     nombre: str,
     unidad: str = "und",
-    precio_venta: float = 0.0,
+    precio_venta: Dinero | float = 0.0,
     stock_minimo: float = 0.0,
+    *,
+    db: Session | None = None,
 ) -> Product:
     """Edita un producto. Valida código único (excepto el mismo producto)."""
     product_id = int(product_id)
@@ -106,7 +183,7 @@ def actualizar_producto(
     if not codigo or not nombre:
         raise ValueError("Código y Nombre son obligatorios.")
 
-    precio_venta = _to_float(precio_venta, 0.0)
+    precio_venta = Dinero(precio_venta)
     stock_minimo = _to_float(stock_minimo, 0.0)
 
     if precio_venta < 0:
@@ -114,7 +191,7 @@ def actualizar_producto(
     if stock_minimo < 0:
         raise ValueError("El stock mínimo no puede ser negativo.")
 
-    with SessionLocal() as db:
+    with sesion(db) as db:
         p = db.query(Product).filter(Product.id == product_id).first()
         if not p:
             raise ValueError("Producto no encontrado.")
@@ -133,31 +210,36 @@ def actualizar_producto(
         p.precio_venta = precio_venta
         p.stock_minimo = stock_minimo
 
+        encolar(db, ProductoGuardado(p.id))
         db.commit()
         db.refresh(p)
         return p
 
 
-def cambiar_estado_producto(product_id: int) -> Product:
+@medido
+def cambiar_estado_producto(product_id: int, *, db: Session | None = None) -> Product:
     """Activa/Desactiva un producto y devuelve el producto actualizado."""
-    with SessionLocal() as db:
+    with sesion(db) as db:
         p = db.query(Product).filter(Product.id == int(product_id)).first()
         if not p:
             raise ValueError("Producto no encontrado.")
 
         p.activo = not bool(p.activo)
+        encolar(db, ProductoGuardado(p.id))
         db.commit()
         db.refresh(p)
         return p
 
 
-def desactivar_producto(product_id: int) -> None:
+@medido
+def desactivar_producto(product_id: int, *, db: Session | None = None) -> None:
     """Soft delete (compatibilidad)."""
-    with SessionLocal() as db:
+    with sesion(db) as db:
         p = db.query(Product).filter(Product.id == int(product_id)).first()
         if not p:
             raise ValueError("Producto no encontrado.")
         p.activo = False
+        encolar(db, ProductoGuardado(p.id))
         db.commit()
 
 
@@ -166,6 +248,8 @@ def es_stock_bajo(p: Product) -> bool:
     Helper para UI:
     - Solo alerta si stock_minimo > 0
     - Alerta si stock_actual <= stock_minimo
+    Para la lista completa sin recorrer el catálogo:
+    stock_alerts_repo.listar_stock_bajo() (tabla stock_bajo).
     """
     stock = float(getattr(p, "stock_actual", 0.0) or 0.0)
     minimo = float(getattr(p, "stock_minimo", 0.0) or 0.0)
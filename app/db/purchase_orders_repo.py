@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, case, func, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.forecast_repo import cantidad_a_pedir, pronosticos
+from app.db.models import ProductSupplierPrice, StockBajo, Supplier
+from app.utils.dinero import Dinero
+
+_PSP = ProductSupplierPrice.__table__
+_SUP = Supplier.__table__
+_BAJO = StockBajo.__table__
+
+
+@dataclass
+class PrecioProveedor:
+    product_id: int
+    supplier_id: int
+    proveedor: str
+    activo: bool
+    ultimo_precio: Dinero
+    precio_promedio: Dinero  # ponderado por cantidad
+    primera_compra: datetime
+    ultima_compra: datetime
+    compras: int
+
+    @property
+    def dias_entre_compras(self) -> float | None:
+        """Cada cuánto se le compra este producto (None = una sola compra)."""
+        if self.compras < 2:
+            return None
+        dias = (self.ultima_compra - self.primera_compra).total_seconds() / 86400
+        return dias / (self.compras - 1)
+
+
+@dataclass
+class LineaPedido:
+    product_id: int
+    codigo: str
+    nombre: str
+    stock: float
+    stock_minimo: float
+    demanda: float  # unidades/día
+    cantidad: float
+    precio: Dinero  # último precio con este proveedor (0 = sin historial)
+
+    @property
+    def subtotal(self) -> Dinero:
+        return self.precio * self.cantidad
+
+
+@dataclass
+class PedidoSugerido:
+    supplier_id: int | None  # None = productos sin compras previas
+    proveedor: str | None
+    lineas: list[LineaPedido] = field(default_factory=list)
+
+    @property
+    def total(self) -> Dinero:
+        return sum((l.subtotal for l in self.lineas), Dinero())
+
+
+# ----------------------------
+# Mantenimiento (dentro de la transacción de la entrada)
+# ----------------------------
+def registrar_precios_compra(db, compras: list[dict]) -> None:
+    """
+    compras = [
+        {"product_id": 1, "supplier_id": 2, "entry_id": 7, "fecha": datetime,
+         "cantidad": 3, "precio_compra": Dinero, "subtotal": Dinero},
+        ...
+    ]
+    Acumula en product_supplier_prices con un solo executemany. El último
+    precio solo se reemplaza si la compra no es más vieja que la registrada
+    (entradas cargadas con fecha histórica no lo pisan).
+    """
+    if not compras:
+        return
+
+    pares: dict[tuple[int, int], dict] = {}
+    entradas: dict[tuple[int, int], set] = defaultdict(set)
+    for c in compras:
+        clave = (c["product_id"], c["supplier_id"])
+        entradas[clave].add(c["entry_id"])
+        fila = pares.get(clave)
+        if fila is None:
+            pares[clave] = {
+                "product_id": c["product_id"],
+                "supplier_id": c["supplier_id"],
+                "ultimo_precio": c["precio_compra"],
+                "primera_compra": c["fecha"],
+                "ultima_compra": c["fecha"],
+                "cantidad_total": c["cantidad"],
+                "valor_total": c["subtotal"],
+            }
+            continue
+        if c["fecha"] >= fila["ultima_compra"]:
+            fila["ultima_compra"] = c["fecha"]
+            fila["ultimo_precio"] = c["precio_compra"]
+        fila["primera_compra"] = min(fila["primera_compra"], c["fecha"])
+        fila["cantidad_total"] += c["cantidad"]
+        fila["valor_total"] += c["subtotal"]
+    for clave, fila in pares.items():
+        fila["compras"] = len(entradas[clave])
+
+    stmt = sqlite_insert(_PSP)
+    nueva = stmt.excluded.ultima_compra >= _PSP.c.ultima_compra
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id", "supplier_id"],
+        set_={
+            "ultimo_precio": case(
+                (nueva, stmt.excluded.ultimo_precio), else_=_PSP.c.ultimo_precio
+            ),
+            "ultima_compra": func.max(_PSP.c.ultima_compra, stmt.excluded.ultima_compra),
+            "primera_compra": func.min(
+                _PSP.c.primera_compra, stmt.excluded.primera_compra
+            ),
+            "compras": _PSP.c.compras + stmt.excluded.compras,
+            "cantidad_total": _PSP.c.cantidad_total + stmt.excluded.cantidad_total,
+            "valor_total": _PSP.c.valor_total + stmt.excluded.valor_total,
+        },
+    )
+    db.execute(stmt, list(pares.values()))
+
+
+# ----------------------------
+# Consultas
+# ----------------------------
+def _consulta_precios(product_ids=None):
+    promedio = case(
+        (
+            _PSP.c.cantidad_total > 0,
+            type_coerce(_PSP.c.valor_total, Integer) / _PSP.c.cantidad_total,
+        ),
+        else_=0,
+    )
+    q = select(
+        _PSP.c.product_id,
+        _PSP.c.supplier_id,
+        _SUP.c.nombre,
+        _SUP.c.activo,
+        _PSP.c.ultimo_precio,
+        promedio,
+        _PSP.c.primera_compra,
+        _PSP.c.ultima_compra,
+        _PSP.c.compras,
+    ).join_from(_PSP, _SUP, _SUP.c.id == _PSP.c.supplier_id)
+    if product_ids is not None:
+        q = q.where(_PSP.c.product_id.in_([int(i) for i in product_ids]))
+    return q
+
+
+def _a_precio(fila) -> PrecioProveedor:
+    pid, sid, nombre, activo, ultimo, promedio, primera, ultima, compras = fila
+    return PrecioProveedor(
+        product_id=pid,
+        supplier_id=sid,
+        proveedor=nombre,
+        activo=bool(activo),
+        ultimo_precio=ultimo or Dinero(),
+        precio_promedio=Dinero.de_centavos(round(promedio or 0)),
+        primera_compra=primera,
+        ultima_compra=ultima,
+        compras=compras,
+    )
+
+
+@medido
+def precios_por_proveedor(
+    product_id: int,
+    *,
+    db: Session | None = None,
+) -> list[PrecioProveedor]:
+    """Proveedores a los que se les compró el producto, el más reciente primero."""
+    with sesion(db) as db:
+        filas = db.execute(_consulta_precios([product_id])).all()
+    return sorted(
+        (_a_precio(f) for f in filas), key=lambda p: p.ultima_compra, reverse=True
+    )
+
+
+def proveedor_preferido(
+    precios: list[PrecioProveedor], ahora: datetime, vigencia_dias: int = 180
+) -> PrecioProveedor | None:
+    """
+    Entre los proveedores activos, el de menor último precio con compras en
+    los últimos `vigencia_dias`. Si ninguno tiene compras recientes, el más
+    reciente.
+    """
+    activos = [p for p in precios if p.activo]
+    if not activos:
+        return None
+    limite = ahora - timedelta(days=vigencia_dias)
+    vigentes = [p for p in activos if p.ultima_compra >= limite]
+    if vigentes:
+        return min(vigentes, key=lambda p: (p.ultimo_precio, -p.ultima_compra.timestamp()))
+    return max(activos, key=lambda p: p.ultima_compra)
+
+
+@medido
+def generar_pedidos(
+    dias_cobertura: int = 15,
+    plazo_entrega: int = 3,
+    solo_stock_bajo: bool = True,
+    vigencia_dias: int = 180,
+    *,
+    db: Session | None = None,
+) -> list[PedidoSugerido]:
+    """
+    Borradores de pedido por proveedor para los productos bajo el mínimo
+    (o todo el catálogo activo con solo_stock_bajo=False), en una pasada:
+    demanda de forecast_repo, proveedor preferido y precio del historial.
+    Se cubre el plazo de entrega más el mayor entre `dias_cobertura` y la
+    frecuencia con que se le compra a ese proveedor.
+    """
+    ahora = datetime.now()
+
+    with sesion(db) as s:
+        ids = (
+            s.execute(select(_BAJO.c.product_id)).scalars().all()
+            if solo_stock_bajo
+            else None
+        )
+        if ids is not None and not ids:
+            return []
+        precios: dict[int, list[PrecioProveedor]] = defaultdict(list)
+        for fila in s.execute(_consulta_precios(ids)):
+            p = _a_precio(fila)
+            precios[p.product_id].append(p)
+
+    pedidos: dict[int | None, PedidoSugerido] = {}
+    for pr in pronosticos(dias_cobertura, plazo_entrega, product_ids=ids, db=db):
+        elegido = proveedor_preferido(precios.get(pr.product_id, []), ahora, vigencia_dias)
+        cobertura = dias_cobertura
+        if elegido is not None and elegido.dias_entre_compras is not None:
+            cobertura = max(cobertura, round(elegido.dias_entre_compras))
+        cantidad = cantidad_a_pedir(
+            pr.stock, pr.stock_minimo, pr.demanda, cobertura, plazo_entrega
+        )
+        if cantidad <= 0:
+            continue
+
+        clave = elegido.supplier_id if elegido else None
+        pedido = pedidos.get(clave)
+        if pedido is None:
+            pedido = pedidos[clave] = PedidoSugerido(
+                supplier_id=clave, proveedor=elegido.proveedor if elegido else None
+            )
+        pedido.lineas.append(
+            LineaPedido(
+                product_id=pr.product_id,
+                codigo=pr.codigo,
+                nombre=pr.nombre,
+                stock=pr.stock,
+                stock_minimo=pr.stock_minimo,
+                demanda=pr.demanda,
+                cantidad=cantidad,
+                precio=elegido.ultimo_precio if elegido else Dinero(),
+            )
+        )
+
+    for pedido in pedidos.values():
+        pedido.lineas.sort(key=lambda l: l.codigo)
+    return sorted(
+        pedidos.values(), key=lambda p: (p.supplier_id is None, p.proveedor or "")
+    )
@@ -1,26 +1,135 @@
 from __future__ import annotations
 
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import NamedTuple
 
-from sqlalchemy.orm import joinedload
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session, joinedload
 
-from app.db.database import SessionLocal
+from app.db.database import sesion
+from app.db.instrumentacion import medido
 from app.db.models import Sale, SaleDetail, Product, CashMovement
 from app.db.cash_repo import registrar_movimiento_en_db
+from app.db.forecast_repo import descontar_anulacion
+from app.db.inventory_repo import registrar_movimientos_stock
+from app.db.events import encolar, StockCambiado, VentaCreada, VentaAnulada
+from app.utils.dinero import Dinero
 
 
 # ----------------------------
 # Consultas
 # ----------------------------
-def listar_ventas(limit: int = 200) -> list[Sale]:
+@medido
+def listar_ventas(limit: int = 200, *, db: Session | None = None) -> list[Sale]:
     """Lista ventas recientes (incluye flags de anulación si existen en el modelo)."""
-    with SessionLocal() as db:
+    with sesion(db) as db:
         return db.query(Sale).order_by(Sale.id.desc()).limit(limit).all()
 
 
-def obtener_venta(sale_id: int) -> Sale | None:
+class FilaVenta(NamedTuple):
+    """Venta para el historial: solo lectura, sin sesión ni identity map."""
+
+    id: int
+    fecha: datetime
+    total: Dinero
+    anulada: bool
+
+
+_COLS_VENTA = [Sale.__table__.c[f] for f in FilaVenta._fields]
+
+
+@medido
+def listar_ventas_filas(
+    limit: int = 200, *, db: Session | None = None
+) -> list[FilaVenta]:
+    """Como listar_ventas, solo (id, fecha, total, anulada), sin entidades ORM."""
+    stmt = select(*_COLS_VENTA).order_by(Sale.id.desc()).limit(limit)
+    with sesion(db) as db:
+        return [FilaVenta._make(r) for r in db.execute(stmt)]
+
+
+@medido
+def listar_ventas_pagina(
+    despues_de: int | None = None,
+    limite: int = 100,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    anuladas: bool | None = None,
+    metodo_pago: str | None = None,
+    *,
+    db: Session | None = None,
+) -> list[FilaVenta]:
+    """
+    Una página del historial, de la más nueva a la más vieja. Paginación
+    por clave: `despues_de` es el id de la última venta de la página
+    anterior (None = primera página); cuesta lo mismo en cualquier página,
+    sin OFFSET. anuladas: None = todas, True = solo anuladas, False = solo
+    vigentes.
+    """
+    stmt = select(*_COLS_VENTA).where(
+        *_filtros_ventas(fecha_desde, fecha_hasta, anuladas, metodo_pago)
+    )
+    if despues_de is not None:
+        stmt = stmt.where(Sale.id < int(despues_de))
+    stmt = stmt.order_by(Sale.id.desc()).limit(limite)
+    with sesion(db) as db:
+        return [FilaVenta._make(r) for r in db.execute(stmt)]
+
+
+@dataclass
+class TotalesVentas:
+    cantidad: int
+    anuladas: int
+    bruto: Dinero
+    anulado: Dinero
+
+    @property
+    def neto(self) -> Dinero:
+        return self.bruto - self.anulado
+
+
+@medido
+def totales_ventas(
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    anuladas: bool | None = None,
+    metodo_pago: str | None = None,
+    *,
+    db: Session | None = None,
+) -> TotalesVentas:
+    """Totales de los mismos filtros que listar_ventas_pagina, en una consulta."""
+    es_anulada = Sale.anulada.is_(True)
+    stmt = select(
+        func.count(),
+        func.count(case((es_anulada, 1))),
+        func.coalesce(func.sum(Sale.total), 0),
+        func.coalesce(func.sum(case((es_anulada, Sale.total))), 0),
+    ).where(*_filtros_ventas(fecha_desde, fecha_hasta, anuladas, metodo_pago))
+    with sesion(db) as db:
+        return TotalesVentas(*db.execute(stmt).one())
+
+
+def _filtros_ventas(fecha_desde, fecha_hasta, anuladas, metodo_pago) -> list:
+    filtros = []
+    if fecha_desde:
+        filtros.append(Sale.fecha >= datetime.combine(fecha_desde, time.min))
+    if fecha_hasta:
+        filtros.append(Sale.fecha <= datetime.combine(fecha_hasta, time.max))
+
+    if anuladas is not None:
+        filtros.append(func.coalesce(Sale.anulada, False) == bool(anuladas))
+
+    metodo_pago = (metodo_pago or "").strip()
+    if metodo_pago:
+        filtros.append(Sale.metodo_pago == metodo_pago)
+    return filtros
+
+
+@medido
+def obtener_venta(sale_id: int, *, db: Session | None = None) -> Sale | None:
     """Obtiene una venta con sus detalles."""
-    with SessionLocal() as db:
+    with sesion(db) as db:
         return (
             db.query(Sale)
             .options(joinedload(Sale.details))
@@ -29,8 +138,13 @@ def obtener_venta(sale_id: int) -> Sale | None:
         )
 
 
-def obtener_venta_con_detalle(sale_id: int) -> Sale | None:
-    with SessionLocal() as db:
+@medido
+def obtener_venta_con_detalle(
+    sale_id: int,
+    *,
+    db: Session | None = None,
+) -> Sale | None:
+    with sesion(db) as db:
         sale = (
             db.query(Sale)
             .options(joinedload(Sale.details).joinedload(SaleDetail.product))
@@ -43,7 +157,13 @@ def obtener_venta_con_detalle(sale_id: int) -> Sale | None:
 # ----------------------------
 # Crear venta
 # ----------------------------
-def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
+@medido
+def crear_venta(
+    items: list[dict],
+    metodo_pago: str = "Efectivo",
+    *,
+    db: Session | None = None,
+) -> Sale:
     """
     items = [
         {"product_id": 1, "cantidad": 2, "precio_venta": 5000},
@@ -54,22 +174,26 @@ def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
     Valida stock suficiente.
     Registra movimiento en caja (INGRESO) EN LA MISMA TRANSACCIÓN.
 
-    metodo_pago: texto que se guarda en observación del movimiento de caja.
+    metodo_pago: queda en la venta y en su movimiento de caja (y como texto
+    en la observación del movimiento).
     """
     if not items:
         raise ValueError("La venta debe tener al menos 1 producto.")
 
     metodo_pago = (metodo_pago or "Efectivo").strip()
 
-    with SessionLocal() as db:
-        sale = Sale(total=0.0)
-        total = 0.0
+    with sesion(db) as db:
+        # Un solo instante para la venta, su kardex y su movimiento de caja
+        ahora = datetime.now()
+        sale = Sale(fecha=ahora, total=Dinero(), metodo_pago=metodo_pago)
+        total = Dinero()
+        costos: dict[int, Dinero] = {}
 
         try:
             for it in items:
                 product_id = int(it.get("product_id"))
                 cantidad = float(it.get("cantidad", 0))
-                precio_venta = float(it.get("precio_venta", 0))
+                precio_venta = Dinero(it.get("precio_venta", 0))
 
                 if cantidad <= 0:
                     raise ValueError("La cantidad debe ser mayor que 0.")
@@ -91,7 +215,7 @@ def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
                         f"Disponible: {stock}, requerido: {cantidad}."
                     )
 
-                subtotal = cantidad * precio_venta
+                subtotal = precio_venta * cantidad
 
                 detail = SaleDetail(
                     product_id=product_id,
@@ -104,10 +228,11 @@ def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
 
                 # Descontar stock
                 product.stock_actual = stock - cantidad
+                costos[product_id] = product.costo_promedio or Dinero()
 
                 total += subtotal
 
-            sale.total = float(total)
+            sale.total = total
 
             # Por compatibilidad si tu modelo Sale tiene campos de anulación
             if hasattr(sale, "anulada"):
@@ -120,16 +245,38 @@ def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
             db.add(sale)
             db.flush()  # para obtener sale.id
 
+            registrar_movimientos_stock(
+                db,
+                [
+                    {
+                        "product_id": d.product_id,
+                        "delta": -float(d.cantidad),
+                        "origen": "VENTA",
+                        "documento_id": sale.id,
+                        "fecha": ahora,
+                        "costo_unitario": costos[d.product_id],
+                    }
+                    for d in sale.details
+                ],
+            )
+
             # Movimiento de caja (misma transacción)
             registrar_movimiento_en_db(
                 db,
                 tipo="INGRESO",
                 concepto="Venta",
-                monto=float(sale.total),
+                monto=sale.total,
                 referencia=f"Venta #{sale.id}",
                 observacion=f"Método: {metodo_pago}" if metodo_pago else None,
+                fecha=ahora,
+                metodo_pago=metodo_pago,
             )
 
+            encolar(
+                db,
+                VentaCreada(sale.id),
+                StockCambiado(tuple({d.product_id for d in sale.details})),
+            )
             db.commit()
             db.refresh(sale)
             return sale
@@ -142,8 +289,13 @@ def crear_venta(items: list[dict], metodo_pago: str = "Efectivo") -> Sale:
 # ----------------------------
 # Anular venta
 # ----------------------------
+@medido
 def anular_venta(
-    sale_id: int, motivo: str | None = None, metodo_pago: str | None = None
+    sale_id: int,
+    motivo: str | None = None,
+    metodo_pago: str | None = None,
+    *,
+    db: Session | None = None,
 ) -> Sale:
     """
     Anula una venta:
@@ -157,7 +309,7 @@ def anular_venta(
     metodo_pago = (metodo_pago or "").strip() or None
     motivo_txt = (motivo or "").strip() or None
 
-    with SessionLocal() as db:
+    with sesion(db) as db:
         try:
             sale = (
                 db.query(Sale)
@@ -171,12 +323,34 @@ def anular_venta(
             if hasattr(sale, "anulada") and sale.anulada:
                 raise ValueError("La venta ya está anulada.")
 
+            ahora = datetime.now()
+
             # Devolver stock
+            devoluciones = []
             for d in sale.details:
                 product = db.query(Product).filter(Product.id == d.product_id).first()
                 if product:
                     stock = float(getattr(product, "stock_actual", 0.0) or 0.0)
                     product.stock_actual = stock + float(d.cantidad or 0.0)
+                    devoluciones.append(
+                        {
+                            "product_id": d.product_id,
+                            "delta": float(d.cantidad or 0.0),
+                            "origen": "ANULACION",
+                            "documento_id": sale.id,
+                            "fecha": ahora,
+                            "costo_unitario": product.costo_promedio or Dinero(),
+                        }
+                    )
+            registrar_movimientos_stock(db, devoluciones)
+
+            # Sacarla del pronóstico si su día ya estaba procesado
+            cantidades: dict[int, float] = {}
+            for d in sale.details:
+                cantidades[d.product_id] = cantidades.get(d.product_id, 0.0) + float(
+                    d.cantidad or 0.0
+                )
+            descontar_anulacion(db, sale.fecha, cantidades)
 
             # Marcar anulación si existen campos
             if hasattr(sale, "anulada"):
@@ -184,7 +358,7 @@ def anular_venta(
             if hasattr(sale, "motivo_anulacion"):
                 sale.motivo_anulacion = motivo_txt
             if hasattr(sale, "anulada_en"):
-                sale.anulada_en = datetime.now()
+                sale.anulada_en = ahora
 
             db.add(sale)
             db.flush()
@@ -200,11 +374,19 @@ def anular_venta(
                 db,
                 tipo="EGRESO",
                 concepto="Anulación de venta",
-                monto=float(sale.total or 0.0),
+                monto=sale.total,
                 referencia=f"Venta #{sale.id}",
                 observacion=obs,
+                fecha=ahora,
+                # la devolución sale por el medio indicado o, si no, por el de la venta
+                metodo_pago=metodo_pago or sale.metodo_pago,
             )
 
+            encolar(
+                db,
+                VentaAnulada(sale.id),
+                StockCambiado(tuple({d.product_id for d in sale.details})),
+            )
             db.commit()
             db.refresh(sale)
             return sale
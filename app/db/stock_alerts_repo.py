@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.database import sesion
+from app.db.instrumentacion import medido
+from app.db.models import InventoryMovement, Product, StockBajo
+
+_MOV = InventoryMovement.__table__
+_PROD = Product.__table__
+_BAJO = StockBajo.__table__
+
+
+@dataclass
+class AlertaStock:
+    product_id: int
+    codigo: str
+    nombre: str
+    unidad: str
+    stock: float
+    stock_minimo: float
+    desde: datetime
+    venta_diaria: float  # promedio de los últimos `dias_venta` días
+    sugerido: float  # cantidad a pedir
+
+    @property
+    def dias_restantes(self) -> float | None:
+        """Días que alcanza el stock al ritmo de venta actual (None = no rota)."""
+        if self.venta_diaria <= 0:
+            return None
+        return max(self.stock, 0.0) / self.venta_diaria
+
+
+def cantidad_sugerida(
+    stock: float, stock_minimo: float, venta_diaria: float, dias_cobertura: int
+) -> float:
+    """
+    Lo que falta para volver al mínimo y cubrir `dias_cobertura` días de
+    venta, redondeado hacia arriba a unidades enteras.
+    """
+    objetivo = stock_minimo + venta_diaria * dias_cobertura
+    return float(max(math.ceil(objetivo - stock - 1e-9), 0))
+
+
+@medido
+def contar_stock_bajo(*, db: Session | None = None) -> int:
+    with sesion(db) as db:
+        return db.execute(select(func.count()).select_from(_BAJO)).scalar_one()
+
+
+@medido
+def listar_stock_bajo(
+    dias_venta: int = 30,
+    dias_cobertura: int = 15,
+    ahora: datetime | None = None,
+    *,
+    db: Session | None = None,
+) -> list[AlertaStock]:
+    """
+    Productos bajo su mínimo (tabla stock_bajo, mantenida por triggers) con
+    la venta diaria reciente y la cantidad sugerida a pedir. Solo consulta
+    el kardex de los productos del conjunto (índice product_id, fecha).
+    Orden: los que se agotan antes primero; los que no rotan al final.
+    """
+    if dias_venta <= 0:
+        raise ValueError("Los días de venta deben ser mayores a 0.")
+    if dias_cobertura < 0:
+        raise ValueError("Los días a cubrir no pueden ser negativos.")
+
+    desde = (ahora or datetime.now()) - timedelta(days=dias_venta)
+    vendido = (
+        select(func.coalesce(-func.sum(_MOV.c.delta), 0.0))
+        .where(
+            _MOV.c.product_id == _BAJO.c.product_id,
+            _MOV.c.fecha >= desde,
+            _MOV.c.origen.in_(("VENTA", "ANULACION")),
+        )
+        .scalar_subquery()
+    )
+    q = select(
+        _BAJO.c.product_id,
+        _PROD.c.codigo,
+        _PROD.c.nombre,
+        _PROD.c.unidad,
+        _BAJO.c.stock,
+        _BAJO.c.stock_minimo,
+        _BAJO.c.desde,
+        vendido,
+    ).join_from(_BAJO, _PROD, _PROD.c.id == _BAJO.c.product_id)
+
+    with sesion(db) as db:
+        filas = db.execute(q).all()
+
+    alertas = []
+    for pid, codigo, nombre, unidad, stock, minimo, desde_bajo, vendidas in filas:
+        venta_diaria = max(float(vendidas or 0.0), 0.0) / dias_venta
+        alertas.append(
+            AlertaStock(
+                product_id=pid,
+                codigo=codigo,
+                nombre=nombre,
+                unidad=unidad or "und",
+                stock=float(stock),
+                stock_minimo=float(minimo),
+                desde=desde_bajo,
+                venta_diaria=venta_diaria,
+                sugerido=cantidad_sugerida(stock, minimo, venta_diaria, dias_cobertura),
+            )
+        )
+
+    alertas.sort(
+        key=lambda a: (
+            a.dias_restantes is None,
+            a.dias_restantes or 0.0,
+            a.codigo,
+        )
+    )
+    return alertas
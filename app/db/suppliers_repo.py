@@ -1,10 +1,21 @@
 from sqlalchemy import or_
-from app.db.database import SessionLocal
+from sqlalchemy.orm import Session
+from app.db.database import sesion
+from app.db.instrumentacion import medido
 from app.db.models import Supplier
-
-
-def crear_proveedor(nombre, nit=None, telefono=None, direccion=None):
-    with SessionLocal() as db:
+from app.db.events import encolar, ProveedorGuardado
+
+
+@medido
+def crear_proveedor(
+    nombre,
+    nit=None,
+    telefono=None,
+    direccion=None,
+    *,
+    db: Session | None = None,
+):
+    with sesion(db) as db:
         if nit:
             existente = db.query(Supplier).filter(Supplier.nit == nit).first()
             if existente:
@@ -18,13 +29,16 @@ def crear_proveedor(nombre, nit=None, telefono=None, direccion=None):
             activo=True,
         )
         db.add(p)
+        db.flush()
+        encolar(db, ProveedorGuardado(p.id))
         db.commit()
         db.refresh(p)
         return p
 
 
-def listar_proveedores(texto="", incluir_inactivos=True):
-    with SessionLocal() as db:
+@medido
+def listar_proveedores(texto="", incluir_inactivos=True, *, db: Session | None = None):
+    with sesion(db) as db:
         q = db.query(Supplier)
 
         if not incluir_inactivos:
@@ -42,13 +56,23 @@ def listar_proveedores(texto="", incluir_inactivos=True):
         return q.order_by(Supplier.id.desc()).all()
 
 
-def obtener_proveedor(supplier_id):
-    with SessionLocal() as db:
+@medido
+def obtener_proveedor(supplier_id, *, db: Session | None = None):
+    with sesion(db) as db:
         return db.query(Supplier).filter(Supplier.id == supplier_id).first()
 
 
-def actualizar_proveedor(supplier_id, nombre, nit=None, telefono=None, direccion=None):
-    with SessionLocal() as db:
+@medido
+def actualizar_proveedor(
+    supplier_id,
+    nombre,
+    nit=None,
+    telefono=None,
+    direccion=None,
+    *,
+    db: Session | None = None,
+):
+    with sesion(db) as db:
         p = db.query(Supplier).filter(Supplier.id == supplier_id).first()
         if not p:
             raise ValueError("Proveedor no encontrado.")
@@ -67,26 +91,31 @@ def actualizar_proveedor(supplier_id, nombre, nit=None, telefono=None, direccion
         p.telefono = telefono
         p.direccion = direccion
 
+        encolar(db, ProveedorGuardado(p.id))
         db.commit()
         db.refresh(p)
         return p
 
 
-def desactivar_proveedor(supplier_id):
-    with SessionLocal() as db:
+@medido
+def desactivar_proveedor(supplier_id, *, db: Session | None = None):
+    with sesion(db) as db:
         p = db.query(Supplier).filter(Supplier.id == supplier_id).first()
         if not p:
             raise ValueError("Proveedor no encontrado.")
 
         p.activo = False
+        encolar(db, ProveedorGuardado(p.id))
         db.commit()
 
 
-def cambiar_estado_proveedor(supplier_id: int) -> None:
-    with SessionLocal() as db:
+@medido
+def cambiar_estado_proveedor(supplier_id: int, *, db: Session | None = None) -> None:
+    with sesion(db) as db:
         p = db.query(Supplier).filter(Supplier.id == supplier_id).first()
         if not p:
             raise ValueError("Proveedor no encontrado.")
 
         p.activo = not p.activo
+        encolar(db, ProveedorGuardado(p.id))
         db.commit()
@@ -1,16 +1,69 @@
-from PySide6.QtWidgets import QApplication
-from app.ui.main_window import MainWindow
+import sys
 
-from app.db.database import init_db
+from app.utils import arranque
 
 
 def main():
+    """
+    --medir-arranque: abre la ventana principal, cierra apenas se pinta y
+    sale con código 1 si el tiempo hasta la primera ventana supera el
+    presupuesto (INVENTARIO_ARRANQUE_PRESUPUESTO_MS). Sirve como prueba de
+    regresión: QT_QPA_PLATFORM=offscreen python -m app.main --medir-arranque
+    """
+    medir = "--medir-arranque" in sys.argv[1:]
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtCore import QEvent, QObject, QTimer
+
+    arranque.marcar("import PySide6")
+
+    from app.db.database import init_db
+
     init_db()
-    app = QApplication([])
+    arranque.marcar("esquema verificado")
+
+    from app.ui import perfil_ui
+
+    if perfil_ui.habilitado():
+        # Mide también el pintado: cada evento pasa por Python
+        app = perfil_ui.AppPerfilada([])
+        perfil_ui.activar()
+    else:
+        app = QApplication([])
+    arranque.marcar("QApplication")
+
+    from app.ui.main_window import MainWindow
+
+    arranque.marcar("import MainWindow")
+
     w = MainWindow()
+
+    def _primera_ventana():
+        arranque.marcar("primera ventana pintada")
+        arranque.reportar_si_activo()
+        if medir:
+            print(
+                f"Tiempo hasta la primera ventana: {arranque.total_ms():.1f} ms "
+                f"(presupuesto {arranque.presupuesto_ms():.0f} ms)"
+            )
+            app.exit(0 if arranque.dentro_de_presupuesto() else 1)
+
+    class _PrimerPaint(QObject):
+        # Un QTimer de 0 ms al arrancar puede correr antes del primer
+        # expose/paint: la marca se toma del primer QEvent.Paint de la
+        # ventana, y se cierra después de que ese pintado termine.
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                w.removeEventFilter(self)
+                QTimer.singleShot(0, _primera_ventana)
+            return False
+
+    primer_paint = _PrimerPaint(w)
+    w.installEventFilter(primer_paint)
     w.show()
-    app.exec()
+    arranque.marcar("ventana construida")
+    return app.exec()
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
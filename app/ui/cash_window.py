@@ -19,18 +19,23 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QDate
 
 from app.db.cash_repo import (
-    listar_movimientos,
+    listar_movimientos_filas,
+    obtener_movimiento,
     obtener_saldo,
     cerrar_dia,
     esta_cerrado,
     resumen_del_dia,
     resumen_rango,
 )
+from app.db.events import MovimientoCajaAgregado, DiaCerrado, DiaReabierto
 from app.ui.cash_form import CashForm
+from app.ui import perfil_ui
+from app.ui.event_bridge import conectar
+from app.utils.dinero import Dinero
 from app.utils.formatters import fmt_fecha
 
 
-def _fmt_cop(value: float) -> str:
+def _fmt_cop(value: Dinero | float) -> str:
     try:
         s = "${:,.2f}".format(float(value or 0.0))
         return s.replace(",", "X").replace(".", ",").replace("X", ".")
@@ -146,28 +151,36 @@ class CashWindow(QWidget):
         layout.addWidget(self.table)
 
         self._movs = []
+        # Filtros y totales de la última carga (se actualizan con eventos)
+        self._filtros = None
+        self._saldo = Dinero()
+        self._ingresos = Dinero()
+        self._egresos = Dinero()
         self.cargar()
 
+        conectar(self._on_evento)
+
     # ---------------- MÉTODOS DE VENTANA ----------------
 
     def abrir_ingreso(self):
         form = CashForm(tipo="INGRESO", parent=self)
         # Si CashForm es QDialog, esto funciona perfecto:
         if hasattr(form, "exec"):
-            if form.exec():
-                self.cargar()
+            form.exec()
         else:
-            # Si CashForm fuera QWidget (raro), lo mostramos y recargamos al cerrar manualmente después
+            # Si CashForm fuera QWidget (raro), lo mostramos (la tabla se actualiza por eventos)
             form.show()
 
     def abrir_egreso(self):
         form = CashForm(tipo="EGRESO", parent=self)
         if hasattr(form, "exec"):
-            if form.exec():
-                self.cargar()
+            form.exec()
         else:
             form.show()
 
+    def refrescar(self):
+        self.cargar()
+
     def _get_filters(self):
         d1 = self.dt_desde.date().toPython()
         d2 = self.dt_hasta.date().toPython()
@@ -181,35 +194,24 @@ class CashWindow(QWidget):
 
     def cargar(self):
         try:
-            d1, d2, tipo, q = self._get_filters()
+            with perfil_ui.carga(self, "movimientos") as perfil:
+                self._cargar(perfil)
+        except Exception as e:
+            QMessageBox.warning(self, "Error", str(e))
 
-            # Estado cierre del día (solo informativo)
-            if d1 == d2 and esta_cerrado(d1):
-                self.lbl_estado.setText(f"🧾 Día {d1} CERRADO")
-            else:
-                self.lbl_estado.setText("")
+    def _cargar(self, perfil):
+        d1, d2, tipo, q = self._get_filters()
 
+        with perfil.datos():
+            cerrado = d1 == d2 and esta_cerrado(d1)
             # saldo total (global)
-            saldo = obtener_saldo()
-            self.lbl_saldo.setText(f"Saldo: {_fmt_cop(saldo)}")
-
+            self._saldo = obtener_saldo()
             # Resumen del rango (o día) según filtros
             if d1 == d2:
                 data = resumen_del_dia(d1)
-                ingresos = float(data["ingresos"] or 0.0)
-                egresos = float(data["egresos"] or 0.0)
             else:
                 data = resumen_rango(d1, d2)
-                ingresos = float(data["ingresos"] or 0.0)
-                egresos = float(data["egresos"] or 0.0)
-
-            balance = ingresos - egresos
-
-            self.lbl_resumen.setText(
-                f"Balance: {_fmt_cop(balance)}  |  Ingresos: {_fmt_cop(ingresos)}  |  Egresos: {_fmt_cop(egresos)}"
-            )
-
-            self._movs = listar_movimientos(
+            self._movs = listar_movimientos_filas(
                 limit=1000,
                 fecha_desde=d1,
                 fecha_hasta=d2,
@@ -217,6 +219,15 @@ class CashWindow(QWidget):
                 q=q,
             )
 
+        with perfil.widgets(len(self._movs)):
+            # Estado cierre del día (solo informativo)
+            self.lbl_estado.setText(f"🧾 Día {d1} CERRADO" if cerrado else "")
+
+            self._ingresos = data["ingresos"]
+            self._egresos = data["egresos"]
+            self._filtros = (d1, d2, tipo, q)
+            self._pintar_totales()
+
             was_sort = self.table.isSortingEnabled()
             self.table.setSortingEnabled(False)
             self.table.blockSignals(True)
@@ -224,30 +235,95 @@ class CashWindow(QWidget):
             self.table.setRowCount(len(self._movs))
 
             for row, m in enumerate(self._movs):
-                fecha_txt = ""
-                if getattr(m, "fecha", None):
-                    try:
-                        fecha_txt = fmt_fecha(m.fecha)
-                    except Exception:
-                        fecha_txt = str(m.fecha)
+                self._pintar_fila(row, m)
 
-                self.table.setItem(row, 0, QTableWidgetItem(str(m.id)))
-                self.table.setItem(row, 1, QTableWidgetItem(fecha_txt))
-                self.table.setItem(row, 2, QTableWidgetItem(m.tipo or ""))
-                self.table.setItem(row, 3, QTableWidgetItem(m.concepto or ""))
+            self.table.blockSignals(False)
+            self.table.setSortingEnabled(was_sort)
 
-                it_m = QTableWidgetItem(_fmt_cop(m.monto or 0.0))
-                it_m.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                self.table.setItem(row, 4, it_m)
+    def _pintar_fila(self, row: int, m) -> None:
+        fecha_txt = ""
+        if getattr(m, "fecha", None):
+            try:
+                fecha_txt = fmt_fecha(m.fecha)
+            except Exception:
+                fecha_txt = str(m.fecha)
+
+        self.table.setItem(row, 0, QTableWidgetItem(str(m.id)))
+        self.table.setItem(row, 1, QTableWidgetItem(fecha_txt))
+        self.table.setItem(row, 2, QTableWidgetItem(m.tipo or ""))
+        self.table.setItem(row, 3, QTableWidgetItem(m.concepto or ""))
+
+        it_m = QTableWidgetItem(_fmt_cop(m.monto or 0.0))
+        it_m.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.table.setItem(row, 4, it_m)
+
+        self.table.setItem(row, 5, QTableWidgetItem(m.referencia or ""))
+        self.table.setItem(row, 6, QTableWidgetItem(m.observacion or ""))
+
+    def _pintar_totales(self) -> None:
+        self.lbl_saldo.setText(f"Saldo: {_fmt_cop(self._saldo)}")
+        balance = self._ingresos - self._egresos
+        self.lbl_resumen.setText(
+            f"Balance: {_fmt_cop(balance)}  |  Ingresos: {_fmt_cop(self._ingresos)}  |  Egresos: {_fmt_cop(self._egresos)}"
+        )
 
-                self.table.setItem(row, 5, QTableWidgetItem(m.referencia or ""))
-                self.table.setItem(row, 6, QTableWidgetItem(m.observacion or ""))
+    # -------------------
+    # Eventos del bus: se agrega la fila nueva y se ajustan los totales
+    # -------------------
+    def _on_evento(self, ev):
+        if self._filtros is None:
+            return
+        d1, d2, tipo, q = self._filtros
 
-            self.table.blockSignals(False)
-            self.table.setSortingEnabled(was_sort)
+        if isinstance(ev, DiaCerrado):
+            if d1 == d2 == ev.fecha:
+                self.lbl_estado.setText(f"🧾 Día {d1} CERRADO")
+            return
+        if isinstance(ev, DiaReabierto):
+            if d1 == d2 == ev.fecha:
+                self.lbl_estado.setText("")
+            return
 
-        except Exception as e:
-            QMessageBox.warning(self, "Error", str(e))
+        if not isinstance(ev, MovimientoCajaAgregado):
+            return
+
+        signo = 1 if ev.tipo == "INGRESO" else -1
+        self._saldo += signo * ev.monto
+
+        en_rango = d1 <= ev.fecha.date() <= d2
+        if en_rango:
+            if ev.tipo == "INGRESO":
+                self._ingresos += ev.monto
+            else:
+                self._egresos += ev.monto
+        self._pintar_totales()
+
+        if not en_rango or (tipo and ev.tipo != tipo):
+            return
+
+        m = obtener_movimiento(ev.movimiento_id)
+        if m is None or not self._coincide_texto(m, q):
+            return
+
+        was_sort = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.table.blockSignals(True)
+
+        self.table.insertRow(0)
+        self._pintar_fila(0, m)
+        self._movs.insert(0, m)
+
+        self.table.blockSignals(False)
+        self.table.setSortingEnabled(was_sort)
+
+    @staticmethod
+    def _coincide_texto(m, q: str | None) -> bool:
+        if not q:
+            return True
+        q = q.lower()
+        return any(
+            q in (v or "").lower() for v in (m.concepto, m.referencia, m.observacion)
+        )
 
     # -------------------
     # Export PDF
@@ -532,15 +608,22 @@ class CashWindow(QWidget):
                 f"Ingresos: {_fmt_cop(data['ingresos'])}\n"
                 f"Egresos: {_fmt_cop(data['egresos'])}\n"
                 f"Saldo final: {_fmt_cop(data['saldo_final'])}\n\n"
-                f"¿Confirmas cerrar el día?"
             )
+            if data["por_metodo"]:
+                msg += "Por método de pago (ingresos / egresos):\n"
+                for metodo, s in data["por_metodo"].items():
+                    msg += (
+                        f"  {metodo or 'Sin método'}: {_fmt_cop(s['ingresos'])} / "
+                        f"{_fmt_cop(s['egresos'])}\n"
+                    )
+                msg += "\n"
+            msg += "¿Confirmas cerrar el día?"
             confirm = QMessageBox.question(self, "Confirmar cierre", msg)
             if confirm != QMessageBox.Yes:
                 return
 
             cerrar_dia(d, cerrado_por=None)
             QMessageBox.information(self, "OK", f"Día {d} cerrado.")
-            self.cargar()
 
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
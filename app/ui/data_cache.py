@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from app.db import events
+from app.db.products_repo import listar_productos_filas
+from app.db.suppliers_repo import listar_proveedores
+
+# Listas compartidas entre ventanas (combos de Ventas/Entradas, etc.)
+# clave de área ("productos", "proveedores") -> datos
+_cache: dict[str, list] = {}
+
+# Productos con stock cambiado desde la última lectura (se refrescan juntos)
+_stock_pendiente: set[int] = set()
+
+
+def productos_activos() -> list:
+    """Productos activos ordenados por nombre (cacheado hasta invalidar)."""
+    if "productos" not in _cache:
+        productos = listar_productos_filas("", incluir_inactivos=False)
+        productos.sort(key=lambda p: (p.nombre or "").lower())
+        _cache["productos"] = productos
+        _stock_pendiente.clear()
+    elif _stock_pendiente:
+        _aplicar_stock_pendiente(_cache["productos"])
+    return _cache["productos"]
+
+
+def buscar_producto(product_id: int):
+    """Producto activo del caché por id (None si no está)."""
+    for p in productos_activos():
+        if p.id == product_id:
+            return p
+    return None
+
+
+def proveedores_activos() -> list:
+    """Proveedores activos ordenados por nombre (cacheado hasta invalidar)."""
+    if "proveedores" not in _cache:
+        proveedores = listar_proveedores("", incluir_inactivos=False)
+        proveedores.sort(key=lambda s: (s.nombre or "").lower())
+        _cache["proveedores"] = proveedores
+    return _cache["proveedores"]
+
+
+def invalidar(*areas: str) -> None:
+    """Sin argumentos limpia todo."""
+    if not areas:
+        _cache.clear()
+        return
+    for area in areas:
+        _cache.pop(area, None)
+
+
+def _aplicar_stock_pendiente(productos: list) -> None:
+    ids = set(_stock_pendiente)
+    _stock_pendiente.clear()
+    frescos = {p.id: p for p in listar_productos_filas(product_ids=ids)}
+    for i, p in enumerate(productos):
+        nuevo = frescos.get(p.id)
+        if nuevo is not None:
+            productos[i] = nuevo
+
+
+# ----------------------------
+# Suscripciones al bus (sin consultas aquí: solo se marca qué refrescar)
+# ----------------------------
+def _on_stock(ev: events.StockCambiado) -> None:
+    if "productos" in _cache:
+        _stock_pendiente.update(ev.product_ids)
+
+
+events.suscribir(events.StockCambiado, _on_stock)
+events.suscribir(events.ProductoGuardado, lambda ev: invalidar("productos"))
+events.suscribir(events.ProductosImportados, lambda ev: invalidar("productos"))
+events.suscribir(events.ProveedorGuardado, lambda ev: invalidar("proveedores"))
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QMessageBox,
+    QPlainTextEdit,
+    QPushButton,
+    QSplitter,
+    QTableWidget,
+    QTableWidgetItem,
+    QTabWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from app.db import instrumentacion
+from app.ui import perfil_ui
+
+
+def _num(value: float, decimales: int = 2) -> QTableWidgetItem:
+    item = QTableWidgetItem(f"{value:,.{decimales}f}")
+    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return item
+
+
+def _tabla(columnas: list[str]) -> QTableWidget:
+    t = QTableWidget()
+    t.setColumnCount(len(columnas))
+    t.setHorizontalHeaderLabels(columnas)
+    t.setEditTriggers(QTableWidget.NoEditTriggers)
+    t.setSelectionBehavior(QTableWidget.SelectRows)
+    return t
+
+
+_COLUMNAS = ["Llamadas", "Total ms", "Media ms", "p95 ms", "Máx ms", "Filas"]
+
+
+class DiagnosticsWindow(QWidget):
+    """
+    Ventana oculta (Ctrl+Shift+D): tiempos por función de repo y por
+    consulta SQL, las consultas lentas con su plan (app/db/instrumentacion.py)
+    y, en la pestaña UI, bloqueos, cargas de tabla y pintado
+    (app/ui/perfil_ui.py).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Diagnóstico")
+        self.resize(1100, 600)
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        self.btn_medir = QPushButton()
+        self.btn_medir.setCheckable(True)
+        self.btn_medir.toggled.connect(self._medir)
+        top.addWidget(self.btn_medir)
+
+        btn_refrescar = QPushButton("Refrescar")
+        btn_refrescar.clicked.connect(self.cargar)
+        top.addWidget(btn_refrescar)
+
+        btn_reiniciar = QPushButton("Reiniciar")
+        btn_reiniciar.clicked.connect(self.reiniciar)
+        top.addWidget(btn_reiniciar)
+
+        btn_exportar = QPushButton("Exportar JSON")
+        btn_exportar.clicked.connect(self.exportar)
+        top.addWidget(btn_exportar)
+
+        self.btn_medir_ui = QPushButton()
+        self.btn_medir_ui.setCheckable(True)
+        self.btn_medir_ui.toggled.connect(self._medir_ui)
+        top.addWidget(self.btn_medir_ui)
+
+        self.lbl_estado = QLabel("")
+        top.addWidget(self.lbl_estado)
+        top.addStretch()
+        layout.addLayout(top)
+
+        tabs = QTabWidget()
+        self.tbl_funciones = _tabla(["Función", *_COLUMNAS, "Consultas"])
+        tabs.addTab(self.tbl_funciones, "Funciones")
+        self.tbl_consultas = _tabla(["Consulta", *_COLUMNAS, "Lectura ms"])
+        tabs.addTab(self.tbl_consultas, "Consultas")
+
+        lentas = QSplitter(Qt.Vertical)
+        self.tbl_lentas = _tabla(["Hora", "ms", "Función", "Consulta"])
+        self.tbl_lentas.itemSelectionChanged.connect(self._mostrar_lenta)
+        lentas.addWidget(self.tbl_lentas)
+        self.txt_plan = QPlainTextEdit()
+        self.txt_plan.setReadOnly(True)
+        lentas.addWidget(self.txt_plan)
+        tabs.addTab(lentas, "Lentas")
+
+        ui = QSplitter(Qt.Vertical)
+        self.tbl_ui = _tabla(
+            ["Qué", "Veces", "Total ms", "Media ms", "p95 ms", "Máx ms",
+             "SQL ms", "ORM ms", "Widgets ms", "Filas"]
+        )
+        ui.addWidget(self.tbl_ui)
+        self.tbl_ui_registros = _tabla(
+            ["Hora", "Tipo", "Ventana", "Detalle", "ms", "SQL ms", "ORM ms",
+             "Widgets ms", "Filas"]
+        )
+        ui.addWidget(self.tbl_ui_registros)
+        tabs.addTab(ui, "UI")
+        layout.addWidget(tabs)
+
+        self.btn_medir.setChecked(instrumentacion.activo())
+        self.btn_medir_ui.setChecked(perfil_ui.activo())
+        self._actualizar_boton()
+        self.cargar()
+
+    def refrescar(self):
+        self.cargar()
+
+    def _medir(self, prendido: bool):
+        if prendido:
+            instrumentacion.activar()
+        else:
+            instrumentacion.desactivar()
+        self._actualizar_boton()
+
+    def _medir_ui(self, prendido: bool):
+        if prendido:
+            perfil_ui.activar()
+        else:
+            perfil_ui.desactivar()
+        self.btn_medir.setChecked(instrumentacion.activo())
+        self._actualizar_boton()
+
+    def _actualizar_boton(self):
+        prendido = instrumentacion.activo()
+        self.btn_medir.setText("Detener medición" if prendido else "Medir")
+        self.btn_medir_ui.setText(
+            "Detener medición UI" if perfil_ui.activo() else "Medir UI"
+        )
+        self.lbl_estado.setText(
+            f"Midiendo (lentas: >= {instrumentacion.umbral_lenta_ms():.0f} ms)"
+            if prendido
+            else "Medición apagada"
+        )
+
+    @staticmethod
+    def _llenar(tabla: QTableWidget, stats, extra, decimales_extra: int = 0):
+        tabla.setRowCount(len(stats))
+        for row, s in enumerate(stats):
+            nombre = QTableWidgetItem(s.nombre[:300])
+            nombre.setToolTip(s.nombre)
+            tabla.setItem(row, 0, nombre)
+            tabla.setItem(row, 1, _num(s.llamadas, 0))
+            tabla.setItem(row, 2, _num(s.total_ms, 1))
+            tabla.setItem(row, 3, _num(s.media_ms))
+            tabla.setItem(row, 4, _num(s.percentil_ms(95), 1))
+            tabla.setItem(row, 5, _num(s.max_ms, 1))
+            tabla.setItem(row, 6, _num(s.filas, 0))
+            tabla.setItem(row, 7, _num(extra(s), decimales_extra))
+        tabla.resizeColumnsToContents()
+        tabla.setColumnWidth(0, min(tabla.columnWidth(0), 520))
+
+    def cargar(self):
+        self._llenar(
+            self.tbl_funciones, instrumentacion.funciones(), lambda s: s.consultas
+        )
+        self._llenar(
+            self.tbl_consultas, instrumentacion.consultas(), lambda s: s.lectura_ms, 1
+        )
+
+        self._lentas = list(reversed(instrumentacion.consultas_lentas()))
+        self.tbl_lentas.setRowCount(len(self._lentas))
+        for row, c in enumerate(self._lentas):
+            hora = QTableWidgetItem(c.cuando.strftime("%H:%M:%S"))
+            self.tbl_lentas.setItem(row, 0, hora)
+            self.tbl_lentas.setItem(row, 1, _num(c.ms, 1))
+            self.tbl_lentas.setItem(row, 2, QTableWidgetItem(c.funcion or "-"))
+            self.tbl_lentas.setItem(row, 3, QTableWidgetItem(c.forma[:300]))
+        self.tbl_lentas.resizeColumnsToContents()
+        self.txt_plan.clear()
+
+        resumen = perfil_ui.resumen()
+        self.tbl_ui.setRowCount(len(resumen))
+        for row, r in enumerate(resumen):
+            n = r.llamadas or 1
+            self.tbl_ui.setItem(row, 0, QTableWidgetItem(r.nombre))
+            self.tbl_ui.setItem(row, 1, _num(r.llamadas, 0))
+            self.tbl_ui.setItem(row, 2, _num(r.total_ms, 1))
+            self.tbl_ui.setItem(row, 3, _num(r.media_ms, 1))
+            self.tbl_ui.setItem(row, 4, _num(r.percentil_ms(95), 0))
+            self.tbl_ui.setItem(row, 5, _num(r.max_ms, 1))
+            self.tbl_ui.setItem(row, 6, _num(r.consulta_ms / n, 1))
+            self.tbl_ui.setItem(row, 7, _num(r.orm_ms / n, 1))
+            self.tbl_ui.setItem(row, 8, _num(r.widgets_ms / n, 1))
+            self.tbl_ui.setItem(row, 9, _num(r.filas, 0))
+        self.tbl_ui.resizeColumnsToContents()
+
+        registros = list(reversed(perfil_ui.registros()))
+        self.tbl_ui_registros.setRowCount(len(registros))
+        for row, g in enumerate(registros):
+            self.tbl_ui_registros.setItem(
+                row, 0, QTableWidgetItem(g.cuando.strftime("%H:%M:%S"))
+            )
+            self.tbl_ui_registros.setItem(row, 1, QTableWidgetItem(g.tipo))
+            self.tbl_ui_registros.setItem(row, 2, QTableWidgetItem(g.ventana))
+            self.tbl_ui_registros.setItem(row, 3, QTableWidgetItem(g.detalle))
+            self.tbl_ui_registros.setItem(row, 4, _num(g.total_ms, 1))
+            self.tbl_ui_registros.setItem(row, 5, _num(g.consulta_ms, 1))
+            self.tbl_ui_registros.setItem(row, 6, _num(g.orm_ms, 1))
+            self.tbl_ui_registros.setItem(row, 7, _num(g.widgets_ms, 1))
+            self.tbl_ui_registros.setItem(row, 8, _num(g.filas, 0))
+        self.tbl_ui_registros.resizeColumnsToContents()
+
+    def _mostrar_lenta(self):
+        row = self.tbl_lentas.currentRow()
+        if not 0 <= row < len(self._lentas):
+            return
+        c = self._lentas[row]
+        self.txt_plan.setPlainText(
+            f"{c.ms:.1f} ms en {c.funcion or '-'}\n\n{c.sql}\n\n"
+            f"Parámetros: {c.parametros}\n\nPlan:\n" + "\n".join(c.plan or ["-"])
+        )
+
+    def reiniciar(self):
+        instrumentacion.reiniciar()
+        perfil_ui.reiniciar()
+        self.cargar()
+
+    def exportar(self):
+        ruta, _ = QFileDialog.getSaveFileName(
+            self, "Exportar diagnóstico", "diagnostico.json", "JSON (*.json)"
+        )
+        if not ruta:
+            return
+        try:
+            instrumentacion.volcar_json(ruta)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"No se pudo guardar:\n{e}")
@@ -9,13 +9,13 @@ from PySide6.QtWidgets import (
     QTableWidgetItem,
     QMessageBox,
     QCheckBox,
+    QFileDialog,
+    QApplication,
 )
 from PySide6.QtCore import Qt
 
 from app.db.entries_repo import crear_entrada
-from app.db.products_repo import listar_productos
-from app.db.suppliers_repo import listar_proveedores
-from app.db.cash_repo import registrar_movimiento
+from app.ui import data_cache
 
 
 class EntriesWindow(QWidget):
@@ -41,6 +41,10 @@ class EntriesWindow(QWidget):
         btn_remove_row.clicked.connect(self.quitar_fila)
         top.addWidget(btn_remove_row)
 
+        btn_importar = QPushButton("Importar CSV/Excel")
+        btn_importar.clicked.connect(self.importar_archivo)
+        top.addWidget(btn_importar)
+
         top.addStretch()
         layout.addLayout(top)
 
@@ -91,18 +95,24 @@ class EntriesWindow(QWidget):
 
         self.table.cellChanged.connect(self.recalcular_totales)
 
+    def refrescar(self):
+        self.cargar_data()
+
     def cargar_data(self):
         # Solo activos para entradas
-        self._proveedores = [
-            s for s in listar_proveedores("", incluir_inactivos=True) if s.activo
-        ]
+        seleccionado = self.cbo_supplier.currentData()
+
+        self._proveedores = data_cache.proveedores_activos()
         self.cbo_supplier.clear()
         for s in self._proveedores:
             self.cbo_supplier.addItem(f"{s.nombre}  ({s.nit or 'sin NIT'})", s.id)
 
-        self._productos = [
-            p for p in listar_productos("", incluir_inactivos=True) if p.activo
-        ]
+        if seleccionado is not None:
+            idx = self.cbo_supplier.findData(seleccionado)
+            if idx >= 0:
+                self.cbo_supplier.setCurrentIndex(idx)
+
+        self._productos = data_cache.productos_activos()
 
     def agregar_fila(self):
         self.table.blockSignals(True)
@@ -126,6 +136,31 @@ class EntriesWindow(QWidget):
         self.table.blockSignals(False)
         self.recalcular_totales()
 
+    def cargar_pedido(self, supplier_id: int | None, lineas) -> None:
+        """
+        Reemplaza el detalle con un pedido sugerido.
+        lineas = [(product_id, cantidad, precio_compra), ...]
+        """
+        if supplier_id is not None:
+            idx = self.cbo_supplier.findData(supplier_id)
+            if idx >= 0:
+                self.cbo_supplier.setCurrentIndex(idx)
+
+        self.table.setRowCount(0)
+        for product_id, cantidad, precio in lineas:
+            self.agregar_fila()
+            row = self.table.rowCount() - 1
+            self.table.blockSignals(True)
+            cbo = self.table.cellWidget(row, 0)
+            idx = cbo.findData(product_id)
+            if idx >= 0:
+                cbo.setCurrentIndex(idx)
+            self.table.setItem(row, 1, QTableWidgetItem(f"{cantidad:g}"))
+            # Mismo formato que escribe el usuario (5.000,50): ver _parse_float
+            self.table.setItem(row, 2, QTableWidgetItem(self._fmt_money(float(precio)).lstrip("$")))
+            self.table.blockSignals(False)
+        self.recalcular_totales()
+
     def quitar_fila(self):
         row = self.table.currentRow()
         if row >= 0:
@@ -250,7 +285,8 @@ class EntriesWindow(QWidget):
             return
 
         try:
-            # 1) Crear entrada (esto suma stock y guarda detalles)
+            # Una sola transacción: detalles, stock, kardex y, si está
+            # pagada, el EGRESO en caja (no registrarlo aparte: se duplica)
             entry = crear_entrada(
                 supplier_id=supplier_id,
                 items=items,
@@ -258,24 +294,6 @@ class EntriesWindow(QWidget):
                 metodo_pago=self.cbo_metodo.currentText(),
             )
 
-            # 2) Si está pagado, registra EGRESO en Caja
-            if self.chk_pagado.isChecked():
-                metodo = self.cbo_metodo.currentText()
-                proveedor_txt = self.cbo_supplier.currentText()
-
-                concepto = f"Compra (Entrada #{entry.id})"
-                if proveedor_txt:
-                    concepto += f" - {proveedor_txt}"
-
-                registrar_movimiento(
-                    tipo="EGRESO",
-                    concepto=concepto,
-                    monto=float(entry.total or total),
-                    referencia=f"Entrada {entry.id}",
-                    observacion=f"Método: {metodo}",
-                )
-
-            # 3) UX
             msg = f"Entrada #{entry.id} guardada. Stock actualizado."
             if self.chk_pagado.isChecked():
                 msg += " Caja actualizada (EGRESO)."
@@ -292,3 +310,45 @@ class EntriesWindow(QWidget):
         self.table.setRowCount(0)
         self.agregar_fila()
         self.recalcular_totales()
+
+    def importar_archivo(self):
+        from app.db.entries_import import importar_entradas
+
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Importar entradas",
+            "",
+            "CSV o Excel (*.csv *.xlsx);;Todos (*.*)",
+        )
+        if not path:
+            return
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            # Pagado/Método de la ventana = valores por defecto del archivo
+            res = importar_entradas(
+                path,
+                pagado=self.chk_pagado.isChecked(),
+                metodo_pago=self.cbo_metodo.currentText(),
+            )
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Error", f"No se pudo importar:\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        msg = (
+            f"Filas leídas: {res.filas}\n"
+            f"Entradas creadas: {res.entradas} ({res.lineas} líneas)\n"
+            f"Con error: {len(res.errores)}\n"
+            f"Tiempo: {res.segundos:.2f} s ({res.filas_por_segundo:,.0f} filas/s)"
+        )
+        if res.errores:
+            detalle = "\n".join(
+                f"Fila {e.fila} ({e.codigo or '-'}): {e.mensaje}" for e in res.errores[:20]
+            )
+            if len(res.errores) > 20:
+                detalle += f"\n... y {len(res.errores) - 20} más"
+            msg += f"\n\n{detalle}"
+
+        QMessageBox.information(self, "Importación", msg)
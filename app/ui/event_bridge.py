@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, Qt, Signal
+
+from app.db import events
+
+
+class _Puente(QObject):
+    """Reenvía los eventos del bus como señal Qt."""
+
+    evento = Signal(object)
+
+
+_puente: _Puente | None = None
+
+
+def puente() -> _Puente:
+    global _puente
+    if _puente is None:
+        _puente = _Puente()
+        events.suscribir(events.Evento, _puente.evento.emit)
+    return _puente
+
+
+def conectar(slot) -> None:
+    """
+    Conecta `slot(evento)` a todos los eventos del bus.
+    La entrega es encolada: el slot corre en el hilo de la UI y después de
+    que el repo terminó (nunca dentro del commit).
+    """
+    puente().evento.connect(slot, Qt.QueuedConnection)
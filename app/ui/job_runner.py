@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import time
+
+from PySide6.QtCore import QObject, QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import QApplication
+
+from app.db import jobs
+from app.db.events import DiaCerrado
+from app.ui.event_bridge import conectar
+
+
+class JobRunner(QObject):
+    """
+    Corre las tareas de app/db/jobs.py mientras la app está abierta.
+
+    - Cada `intervalo_ms` revisa si hay tareas vencidas y las corre en un
+      hilo aparte (una vuelta a la vez): la UI no se bloquea.
+    - "Inactivo" = ningún evento del bus (ventas, entradas, caja...) en los
+      últimos `inactivo_seg` y sin diálogos modales abiertos. Las tareas
+      pesadas (backup, VACUUM...) solo corren así.
+    - INVENTARIO_TAREAS=0 lo desactiva.
+    """
+
+    terminado = Signal(list)  # [jobs.ResultadoTarea] de la vuelta
+
+    def __init__(self, parent=None, intervalo_ms: int = 60_000, inactivo_seg: float = 180):
+        super().__init__(parent)
+        self._inactivo_seg = inactivo_seg
+        self._ultima_actividad = time.monotonic()
+        self._corriendo = False
+        self._modal = False
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(intervalo_ms)
+        self._timer.timeout.connect(self.revisar)
+
+        conectar(self._on_evento)
+        self.terminado.connect(self._fin_vuelta)
+
+    @staticmethod
+    def habilitado() -> bool:
+        return os.environ.get("INVENTARIO_TAREAS", "1") != "0"
+
+    def iniciar(self, primera_ms: int = 5_000) -> None:
+        if not self.habilitado():
+            return
+        self._timer.start()
+        # Primera vuelta poco después del arranque (cierra los días olvidados)
+        QTimer.singleShot(primera_ms, self.revisar)
+
+    def detener(self, espera_ms: int = 30_000) -> None:
+        """Para el timer y espera a que termine la tarea en curso."""
+        self._timer.stop()
+        self._pool.waitForDone(espera_ms)
+
+    def _on_evento(self, ev):
+        # Los cierres los publica también el cierre automático: no cuentan
+        if not isinstance(ev, DiaCerrado):
+            self._ultima_actividad = time.monotonic()
+
+    def inactivo(self) -> bool:
+        # Se consulta desde el hilo de las tareas: solo lee valores simples
+        return (
+            not self._modal
+            and time.monotonic() - self._ultima_actividad >= self._inactivo_seg
+        )
+
+    def revisar(self) -> None:
+        if self._corriendo:
+            return
+        self._corriendo = True
+        self._modal = QApplication.activeModalWidget() is not None
+        self._pool.start(self._vuelta)
+
+    def _vuelta(self) -> None:
+        # Hilo del pool; la señal llega encolada al hilo de la UI
+        try:
+            resultados = jobs.ejecutar_vencidas(inactivo=self.inactivo)
+        except Exception as e:
+            resultados = [jobs.ResultadoTarea("tareas", False, str(e), 0.0)]
+        self.terminado.emit(resultados)
+
+    def _fin_vuelta(self, resultados) -> None:
+        self._corriendo = False
@@ -6,9 +6,63 @@ from PySide6.QtWidgets import (
     QPushButton,
     QMessageBox,
 )
-from app.db.database import init_db
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QKeySequence, QShortcut
+
 from app.utils.backup import crear_backup
-from app.db.database import get_app_data_dir
+from app.db.database import get_db_path
+from app.db.events import (
+    ProductoGuardado,
+    ProductosImportados,
+    ProveedorGuardado,
+    StockCambiado,
+)
+from app.db.stock_alerts_repo import contar_stock_bajo
+from app.ui.event_bridge import conectar
+from app.ui.job_runner import JobRunner
+from app.ui.window_manager import WindowManager, instalar, notificar_cambio
+
+
+def _crear_productos():
+    from app.ui.products_window import ProductsWindow
+
+    return ProductsWindow()
+
+
+def _crear_proveedores():
+    from app.ui.suppliers_window import SuppliersWindow
+
+    return SuppliersWindow()
+
+
+def _crear_entradas():
+    from app.ui.entries_window import EntriesWindow
+
+    return EntriesWindow()
+
+
+def _crear_ventas():
+    from app.ui.sales_window import SalesWindow
+
+    return SalesWindow()
+
+
+def _crear_caja():
+    from app.ui.cash_window import CashWindow
+
+    return CashWindow()
+
+
+def _crear_stock_bajo():
+    from app.ui.stock_alerts_window import StockAlertsWindow
+
+    return StockAlertsWindow()
+
+
+def _crear_diagnostico():
+    from app.ui.diagnostics_window import DiagnosticsWindow
+
+    return DiagnosticsWindow()
 
 
 class MainWindow(QMainWindow):
@@ -17,7 +71,20 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Inventario JH - Offline")
         self.resize(900, 500)
 
-        init_db()
+        # Una instancia por módulo, reutilizada entre clics
+        self.ventanas = WindowManager()
+        # Productos, Proveedores y Caja se actualizan solas con los eventos
+        self.ventanas.registrar("productos", _crear_productos)
+        self.ventanas.registrar("proveedores", _crear_proveedores)
+        self.ventanas.registrar(
+            "entradas", _crear_entradas, ("productos", "proveedores")
+        )
+        self.ventanas.registrar("ventas", _crear_ventas, ("productos",))
+        self.ventanas.registrar("caja", _crear_caja)
+        self.ventanas.registrar("stock_bajo", _crear_stock_bajo, ("productos", "stock"))
+        self.ventanas.registrar("diagnostico", _crear_diagnostico)
+        instalar(self.ventanas)
+        conectar(self._on_evento)
 
         root = QWidget()
         layout = QVBoxLayout(root)
@@ -47,51 +114,78 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(root)
 
+        # Diagnóstico (tiempos de consultas y repos): sin botón, solo atajo
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.abrir_diagnostico)
+
         # --- Botón Caja ---
         btn_caja = QPushButton("Caja")
         btn_caja.clicked.connect(self.abrir_caja)
         layout.addWidget(btn_caja)
 
+        # --- Botón Stock bajo ---
+        self.btn_stock_bajo = QPushButton()
+        self.btn_stock_bajo.clicked.connect(self.abrir_stock_bajo)
+        layout.addWidget(self.btn_stock_bajo)
+        self._actualizar_stock_bajo()
+
         # --- Botón Backup ---
         self.btn_backup = QPushButton("Crear Backup")
         self.btn_backup.clicked.connect(self.hacer_backup)
         layout.addWidget(self.btn_backup)
 
+        # Precarga de los módulos más usados cuando la ventana ya está visible
+        QTimer.singleShot(500, lambda: self.ventanas.precargar(["ventas", "productos"]))
+
+        # Cierre de días olvidados, backups y mantenimiento en segundo plano
+        self.tareas = JobRunner(self)
+        self.tareas.terminado.connect(self._on_tareas)
+        self.tareas.iniciar()
+
     # ---------------- MÉTODOS ----------------
 
     def abrir_productos(self):
-        from app.ui.products_window import ProductsWindow
-
-        self.win_productos = ProductsWindow()
-        self.win_productos.show()
+        self.ventanas.mostrar("productos")
 
     def abrir_proveedores(self):
-        from app.ui.suppliers_window import SuppliersWindow
-
-        self.win_suppliers = SuppliersWindow()
-        self.win_suppliers.show()
+        self.ventanas.mostrar("proveedores")
 
     def abrir_entradas(self):
-        from app.ui.entries_window import EntriesWindow
-
-        self.win_entries = EntriesWindow()
-        self.win_entries.show()
+        self.ventanas.mostrar("entradas")
 
     def abrir_ventas(self):
-        from app.ui.sales_window import SalesWindow
-
-        self.win_sales = SalesWindow()
-        self.win_sales.show()
+        self.ventanas.mostrar("ventas")
 
     def abrir_caja(self):
-        from app.ui.cash_window import CashWindow
+        self.ventanas.mostrar("caja")
+
+    def abrir_stock_bajo(self):
+        self.ventanas.mostrar("stock_bajo")
+
+    def abrir_diagnostico(self):
+        self.ventanas.mostrar("diagnostico")
+
+    def _actualizar_stock_bajo(self):
+        # COUNT sobre stock_bajo: solo tiene los productos bajo el mínimo
+        self.btn_stock_bajo.setText(f"Stock bajo ({contar_stock_bajo()})")
+
+    def _on_evento(self, ev):
+        if isinstance(ev, (ProductoGuardado, ProductosImportados)):
+            notificar_cambio("productos")
+            self._actualizar_stock_bajo()
+        elif isinstance(ev, StockCambiado):
+            self.ventanas.marcar_sucias("stock")
+            self._actualizar_stock_bajo()
+        elif isinstance(ev, ProveedorGuardado):
+            notificar_cambio("proveedores")
 
-        self.win_caja = CashWindow()
-        self.win_caja.show()
+    def _on_tareas(self, resultados):
+        avisos = [r.mensaje for r in resultados if r.mensaje]
+        if avisos:
+            self.statusBar().showMessage(" | ".join(avisos), 15_000)
 
     def hacer_backup(self):
         try:
-            ruta_db = get_app_data_dir() / "inventario.db"
+            ruta_db = get_db_path()
 
             ruta_backup = crear_backup(str(ruta_db))
 
@@ -109,8 +203,9 @@ class MainWindow(QMainWindow):
         Backup automático al cerrar el sistema.
         No muestra mensajes para no molestar al usuario.
         """
+        self.tareas.detener()
         try:
-            ruta_db = get_app_data_dir() / "inventario.db"
+            ruta_db = get_db_path()
             crear_backup(str(ruta_db))
         except Exception:
             pass
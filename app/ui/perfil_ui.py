@@ -0,0 +1,315 @@
+"""
+Perfilado de la interfaz: bloqueos del event loop, carga de tablas y
+pintado por ventana. Sirve para saber si un congelamiento es la base o Qt.
+
+Apagado por defecto. Se prende con INVENTARIO_PERFIL_UI=1 al arrancar o
+con "Medir UI" en la ventana de diagnóstico (Ctrl+Shift+D). Prendido
+también prende app/db/instrumentacion.py, de donde sale el tiempo de SQL.
+
+- Bloqueos: un timer late cada INTERVALO_MS; si llega más de
+  INVENTARIO_BLOQUEO_MS (100 por defecto) tarde, el hilo de la UI estuvo
+  ocupado. Se registra cuánto de ese tiempo fue SQL y qué carga de tabla
+  corrió en el medio.
+- Cargas de tabla (carga()): consulta = SQL (execute + lectura de filas),
+  orm = el resto del repo (armar objetos), widgets = llenar la tabla.
+- Pintado: lo que tarda cada ventana en repintarse (UpdateRequest). Solo
+  con INVENTARIO_PERFIL_UI=1 desde el arranque (app/main.py usa entonces
+  AppPerfilada, que pasa cada evento por Python).
+
+Todo va a un registro rotativo (registros(), reporte(), pestaña "UI" del
+diagnóstico); los bloqueos, además, al log como WARNING.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+
+from app.db import instrumentacion
+from app.db.instrumentacion import Estadistica
+
+log = logging.getLogger(__name__)
+
+INTERVALO_MS = 50
+BLOQUEO_MS_DEFAULT = 100.0
+# Un cuadro a 60 Hz: los pintados más lentos van al registro rotativo
+PINTADO_LENTO_MS = 16.0
+MAX_REGISTROS = 500
+
+_activo = False
+_instrumentacion_propia = False
+_vigia: _Vigia | None = None
+
+
+@dataclass
+class RegistroUI:
+    cuando: datetime
+    tipo: str  # "carga" | "bloqueo" | "pintado"
+    ventana: str
+    detalle: str
+    total_ms: float
+    consulta_ms: float = 0.0
+    orm_ms: float = 0.0
+    widgets_ms: float = 0.0
+    filas: int = 0
+
+
+@dataclass
+class ResumenUI(Estadistica):
+    consulta_ms: float = 0.0
+    orm_ms: float = 0.0
+    widgets_ms: float = 0.0
+
+
+_registros: deque[RegistroUI] = deque(maxlen=MAX_REGISTROS)
+_resumen: dict[tuple[str, str, str], ResumenUI] = {}
+# (ventana · detalle, fin) de la última carga: para atribuir bloqueos
+_ultima_carga: tuple[str, float] | None = None
+
+
+# ----------------------------
+# Encendido
+# ----------------------------
+def habilitado() -> bool:
+    return os.environ.get("INVENTARIO_PERFIL_UI") == "1"
+
+
+def activo() -> bool:
+    return _activo
+
+
+def umbral_bloqueo_ms() -> float:
+    try:
+        return float(os.environ.get("INVENTARIO_BLOQUEO_MS", ""))
+    except ValueError:
+        return BLOQUEO_MS_DEFAULT
+
+
+def activar() -> None:
+    """Empieza a medir. Llamar desde el hilo de la UI, con QApplication creada."""
+    global _activo, _instrumentacion_propia, _vigia
+    if _activo:
+        return
+    if not instrumentacion.activo():
+        instrumentacion.activar()
+        _instrumentacion_propia = True
+    _vigia = _Vigia(QApplication.instance())
+    _activo = True
+
+
+def desactivar() -> None:
+    global _activo, _instrumentacion_propia, _vigia
+    if not _activo:
+        return
+    _activo = False
+    if _vigia is not None:
+        _vigia.detener()
+        _vigia = None
+    if _instrumentacion_propia:
+        instrumentacion.desactivar()
+        _instrumentacion_propia = False
+
+
+def reiniciar() -> None:
+    _registros.clear()
+    _resumen.clear()
+
+
+def _registrar(reg: RegistroUI, al_registro: bool = True) -> None:
+    clave = (reg.tipo, reg.ventana, reg.detalle)
+    r = _resumen.get(clave)
+    if r is None:
+        r = _resumen[clave] = ResumenUI(" · ".join(c for c in clave if c))
+    r.sumar(reg.total_ms)
+    r.filas += reg.filas
+    r.consulta_ms += reg.consulta_ms
+    r.orm_ms += reg.orm_ms
+    r.widgets_ms += reg.widgets_ms
+    if al_registro:
+        _registros.append(reg)
+
+
+def _nombre_ventana(w) -> str:
+    if isinstance(w, QWidget):
+        return w.window().windowTitle() or type(w.window()).__name__
+    return type(w).__name__
+
+
+# ----------------------------
+# Cargas de tabla
+# ----------------------------
+class _Carga:
+    def __init__(self, ventana: str, detalle: str):
+        self.reg = RegistroUI(datetime.now(), "carga", ventana, detalle, 0.0)
+
+    @contextlib.contextmanager
+    def datos(self):
+        """La llamada al repo: se separa en SQL y lo demás (ORM)."""
+        sql0 = instrumentacion.sql_ms_hilo()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            sql = instrumentacion.sql_ms_hilo() - sql0
+            self.reg.consulta_ms += sql
+            self.reg.orm_ms += max(ms - sql, 0.0)
+
+    @contextlib.contextmanager
+    def widgets(self, filas: int = 0):
+        """Construir items y llenar la tabla."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.reg.widgets_ms += (time.perf_counter() - t0) * 1000.0
+            self.reg.filas += filas
+
+
+class _CargaNula:
+    _nada = contextlib.nullcontext()
+
+    def datos(self):
+        return self._nada
+
+    def widgets(self, filas: int = 0):
+        return self._nada
+
+
+_NULA = _CargaNula()
+
+
+@contextlib.contextmanager
+def carga(ventana: QWidget | str, detalle: str = ""):
+    """
+    with perfil_ui.carga(self, "movimientos") as c:
+        with c.datos():
+            filas = listar_...()
+        with c.widgets(len(filas)):
+            ...llenar la tabla...
+
+    Apagado no mide nada (contextos vacíos).
+    """
+    global _ultima_carga
+    if not _activo:
+        yield _NULA
+        return
+    nombre = ventana if isinstance(ventana, str) else _nombre_ventana(ventana)
+    c = _Carga(nombre, detalle)
+    t0 = time.perf_counter()
+    try:
+        yield c
+    finally:
+        fin = time.perf_counter()
+        c.reg.total_ms = (fin - t0) * 1000.0
+        _registrar(c.reg)
+        _ultima_carga = (" · ".join(x for x in (nombre, detalle) if x), fin)
+
+
+# ----------------------------
+# Bloqueos del event loop
+# ----------------------------
+class _Vigia(QObject):
+    """Timer que debería latir cada INTERVALO_MS: lo que llega tarde es bloqueo."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setInterval(INTERVALO_MS)
+        self._timer.timeout.connect(self._latido)
+        self._anterior = time.perf_counter()
+        self._sql = instrumentacion.sql_ms_hilo()
+        self._timer.start()
+
+    def detener(self) -> None:
+        self._timer.stop()
+        self.deleteLater()
+
+    def _latido(self) -> None:
+        ahora = time.perf_counter()
+        atraso = (ahora - self._anterior) * 1000.0 - INTERVALO_MS
+        sql = instrumentacion.sql_ms_hilo()
+        if atraso >= umbral_bloqueo_ms():
+            durante = ""
+            if _ultima_carga and _ultima_carga[1] >= self._anterior:
+                durante = _ultima_carga[0]
+            activa = QApplication.activeWindow()
+            reg = RegistroUI(
+                datetime.now(),
+                "bloqueo",
+                _nombre_ventana(activa) if activa else "",
+                durante,
+                atraso,
+                consulta_ms=sql - self._sql,
+            )
+            _registrar(reg)
+            log.warning(
+                "UI bloqueada %.0f ms (SQL %.0f ms)%s",
+                atraso,
+                reg.consulta_ms,
+                f", durante {durante}" if durante else "",
+            )
+        self._anterior = ahora
+        self._sql = sql
+
+
+# ----------------------------
+# Pintado
+# ----------------------------
+class AppPerfilada(QApplication):
+    """QApplication que mide el repintado de cada ventana (UpdateRequest)."""
+
+    def notify(self, receiver, event):
+        if not _activo or event.type() != QEvent.UpdateRequest:
+            return super().notify(receiver, event)
+        t0 = time.perf_counter()
+        try:
+            return super().notify(receiver, event)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            reg = RegistroUI(datetime.now(), "pintado", _nombre_ventana(receiver), "", ms)
+            _registrar(reg, al_registro=ms >= PINTADO_LENTO_MS)
+
+
+# ----------------------------
+# Reportes
+# ----------------------------
+def registros() -> list[RegistroUI]:
+    return list(_registros)
+
+
+def resumen() -> list[ResumenUI]:
+    """Por tipo · ventana · detalle, del que más tiempo suma al que menos."""
+    return sorted(_resumen.values(), key=lambda r: -r.total_ms)
+
+
+def reporte(ultimos: int = 30) -> str:
+    lineas = [
+        f"{'veces':>6} {'total ms':>10} {'media':>8} {'p95':>8} {'máx':>8} "
+        f"{'SQL':>8} {'ORM':>8} {'widgets':>8}  qué"
+    ]
+    for r in resumen():
+        n = r.llamadas or 1
+        lineas.append(
+            f"{r.llamadas:6d} {r.total_ms:10.1f} {r.media_ms:8.1f} "
+            f"{r.percentil_ms(95):8.1f} {r.max_ms:8.1f} {r.consulta_ms / n:8.1f} "
+            f"{r.orm_ms / n:8.1f} {r.widgets_ms / n:8.1f}  {r.nombre}"
+        )
+    regs = registros()[-ultimos:]
+    if regs:
+        lineas.append("")
+        for g in regs:
+            lineas.append(
+                f"{g.cuando:%H:%M:%S} {g.tipo:<8} {g.total_ms:8.1f} ms  "
+                f"SQL {g.consulta_ms:7.1f}  ORM {g.orm_ms:7.1f}  "
+                f"widgets {g.widgets_ms:7.1f}  {g.ventana} {g.detalle}".rstrip()
+            )
+    return "\n".join(lineas)
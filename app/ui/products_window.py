@@ -7,11 +7,19 @@ from PySide6.QtWidgets import (
     QTableWidgetItem,
     QLineEdit,
     QMessageBox,
+    QFileDialog,
+    QApplication,
 )
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QColor, QBrush, QFont
 
-from app.db.products_repo import listar_productos, cambiar_estado_producto
+from app.db.events import ProductoGuardado, ProductosImportados, StockCambiado
+from app.db.products_repo import (
+    listar_productos_filas,
+    cambiar_estado_producto,
+)
+from app.ui import perfil_ui
+from app.ui.event_bridge import conectar
 
 
 class ProductsWindow(QWidget):
@@ -46,6 +54,10 @@ class ProductsWindow(QWidget):
         btn_estado.clicked.connect(self.cambiar_estado_seleccionado)
         top.addWidget(btn_estado)
 
+        btn_importar = QPushButton("Importar CSV/Excel")
+        btn_importar.clicked.connect(self.importar_archivo)
+        top.addWidget(btn_importar)
+
         top.addStretch()
         layout.addLayout(top)
 
@@ -62,66 +74,111 @@ class ProductsWindow(QWidget):
         self._productos = []
         self.cargar_productos()
 
-    def showEvent(self, event):
-        super().showEvent(event)
+        conectar(self._on_evento)
+
+    def refrescar(self):
         self.cargar_productos()
 
     def cargar_productos(self):
         texto = self.txt_buscar.text().strip()
-        self._productos = listar_productos(texto=texto, incluir_inactivos=True)
+        with perfil_ui.carga(self, "productos") as perfil:
+            with perfil.datos():
+                self._productos = listar_productos_filas(
+                    texto=texto, incluir_inactivos=True
+                )
+
+            with perfil.widgets(len(self._productos)):
+                was_sorting = self.table.isSortingEnabled()
+                self.table.setSortingEnabled(False)
+                self.table.blockSignals(True)
+
+                self.table.setRowCount(len(self._productos))
+
+                for row, p in enumerate(self._productos):
+                    self._pintar_fila(row, p)
+
+                self.table.blockSignals(False)
+                self.table.resizeColumnsToContents()
+                self.table.setSortingEnabled(was_sorting)
+
+    def _pintar_fila(self, row: int, p) -> None:
+        stock = float(p.stock_actual or 0.0)
+        minimo = float(p.stock_minimo or 0.0)
+
+        es_bajo = minimo > 0 and stock <= minimo
+
+        self.table.setItem(row, 0, QTableWidgetItem(str(p.id)))
+        self.table.setItem(row, 1, QTableWidgetItem(p.codigo or ""))
+        self.table.setItem(row, 2, QTableWidgetItem(p.nombre or ""))
+        self.table.setItem(row, 3, QTableWidgetItem(p.unidad or ""))
+
+        # Stock
+        item_stock = QTableWidgetItem(f"{stock:.2f}")
+        item_stock.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+        if es_bajo:
+            font = QFont()
+            font.setBold(True)
+            item_stock.setFont(font)
+
+        self.table.setItem(row, 4, item_stock)
+
+        # Precio
+        precio_formateado = (
+            "${:,.2f}".format(float(p.precio_venta or 0.0))
+            .replace(",", "X")
+            .replace(".", ",")
+            .replace("X", ".")
+        )
+        item_precio = QTableWidgetItem(precio_formateado)
+        item_precio.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+        self.table.setItem(row, 5, item_precio)
+
+        # Activo
+        self.table.setItem(row, 6, QTableWidgetItem("Sí" if p.activo else "No"))
+
+        # 🔴 Pintar fila si stock bajo
+        if es_bajo:
+            for col in range(self.table.columnCount()):
+                item = self.table.item(row, col)
+                if item:
+                    item.setBackground(QBrush(QColor(120, 40, 40)))
+                    item.setForeground(QBrush(QColor(240, 240, 240)))
+
+    # -----------------------
+    # Eventos del bus: solo se tocan las filas afectadas
+    # -----------------------
+    def _on_evento(self, ev):
+        if isinstance(ev, StockCambiado):
+            self._actualizar_filas(ev.product_ids)
+        elif isinstance(ev, ProductoGuardado):
+            self._actualizar_filas((ev.product_id,), recargar_si_falta=True)
+        elif isinstance(ev, ProductosImportados):
+            self.cargar_productos()
+
+    def _actualizar_filas(self, product_ids, recargar_si_falta: bool = False):
+        productos = {p.id: p for p in listar_productos_filas(product_ids=product_ids)}
+        filas = {}
+        for row in range(self.table.rowCount()):
+            item = self.table.item(row, 0)
+            if item and int(item.text()) in productos:
+                filas[int(item.text())] = row
+
+        if recargar_si_falta and len(filas) < len(productos):
+            # producto nuevo: puede caer en cualquier posición/filtro
+            self.cargar_productos()
+            return
 
         was_sorting = self.table.isSortingEnabled()
         self.table.setSortingEnabled(False)
         self.table.blockSignals(True)
 
-        self.table.setRowCount(len(self._productos))
-
-        for row, p in enumerate(self._productos):
-            stock = float(p.stock_actual or 0.0)
-            minimo = float(p.stock_minimo or 0.0)
-
-            es_bajo = minimo > 0 and stock <= minimo
-
-            self.table.setItem(row, 0, QTableWidgetItem(str(p.id)))
-            self.table.setItem(row, 1, QTableWidgetItem(p.codigo or ""))
-            self.table.setItem(row, 2, QTableWidgetItem(p.nombre or ""))
-            self.table.setItem(row, 3, QTableWidgetItem(p.unidad or ""))
-
-            # Stock
-            item_stock = QTableWidgetItem(f"{stock:.2f}")
-            item_stock.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-
-            if es_bajo:
-                font = QFont()
-                font.setBold(True)
-                item_stock.setFont(font)
-
-            self.table.setItem(row, 4, item_stock)
-
-            # Precio
-            precio_formateado = (
-                "${:,.2f}".format(float(p.precio_venta or 0.0))
-                .replace(",", "X")
-                .replace(".", ",")
-                .replace("X", ".")
-            )
-            item_precio = QTableWidgetItem(precio_formateado)
-            item_precio.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            self.table.setItem(row, 5, item_precio)
-
-            # Activo
-            self.table.setItem(row, 6, QTableWidgetItem("Sí" if p.activo else "No"))
+        for pid, row in filas.items():
+            self._pintar_fila(row, productos[pid])
 
-            # 🔴 Pintar fila si stock bajo
-            if es_bajo:
-                for col in range(self.table.columnCount()):
-                    item = self.table.item(row, col)
-                    if item:
-                        item.setBackground(QBrush(QColor(120, 40, 40)))
-                        item.setForeground(QBrush(QColor(240, 240, 240)))
+        self._productos = [productos.get(p.id, p) for p in self._productos]
 
         self.table.blockSignals(False)
-        self.table.resizeColumnsToContents()
         self.table.setSortingEnabled(was_sorting)
 
     def _get_selected_product(self):
@@ -134,8 +191,7 @@ class ProductsWindow(QWidget):
         from app.ui.product_form import ProductForm
 
         dlg = ProductForm(self)
-        if dlg.exec():
-            self.cargar_productos()
+        dlg.exec()
 
     def abrir_form_editar(self):
         from app.ui.product_form import ProductForm
@@ -148,8 +204,7 @@ class ProductsWindow(QWidget):
             return
 
         dlg = ProductForm(self, product=p)
-        if dlg.exec():
-            self.cargar_productos()
+        dlg.exec()
 
     def _dbl_click_editar(self, row, col):
         self.abrir_form_editar()
@@ -177,4 +232,40 @@ class ProductsWindow(QWidget):
             QMessageBox.critical(self, "Error", f"No se pudo cambiar estado:\n{e}")
             return
 
-        self.cargar_productos()
+    def importar_archivo(self):
+        from app.db.products_import import importar_productos
+
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Importar productos",
+            "",
+            "CSV o Excel (*.csv *.xlsx);;Todos (*.*)",
+        )
+        if not path:
+            return
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            res = importar_productos(path)
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Error", f"No se pudo importar:\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+
+        msg = (
+            f"Filas leídas: {res.filas}\n"
+            f"Nuevos: {res.insertados}\n"
+            f"Actualizados: {res.actualizados}\n"
+            f"Con error: {len(res.errores)}\n"
+            f"Tiempo: {res.segundos:.2f} s ({res.filas_por_segundo:,.0f} filas/s)"
+        )
+        if res.errores:
+            detalle = "\n".join(
+                f"Fila {e.fila} ({e.codigo or '-'}): {e.mensaje}" for e in res.errores[:20]
+            )
+            if len(res.errores) > 20:
+                detalle += f"\n... y {len(res.errores) - 20} más"
+            msg += f"\n\n{detalle}"
+
+        QMessageBox.information(self, "Importación", msg)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QMessageBox,
+)
+from PySide6.QtCore import Qt
+
+from app.db.purchase_orders_repo import generar_pedidos
+from app.ui.window_manager import mostrar_ventana
+
+
+def _fmt_cop(value) -> str:
+    s = "${:,.2f}".format(float(value or 0.0))
+    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class PurchaseOrdersDialog(QDialog):
+    """
+    Borradores de pedido por proveedor para los productos bajo el mínimo.
+    "Cargar en Entradas" llena la ventana de Entradas con el pedido elegido.
+    """
+
+    def __init__(self, parent=None, dias_cobertura: int = 15):
+        super().__init__(parent)
+        self.setWindowTitle("Pedidos sugeridos")
+        self.resize(900, 550)
+
+        layout = QVBoxLayout(self)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(6)
+        self.tree.setHeaderLabels(
+            ["Proveedor / Producto", "Stock", "Venta/día", "Cantidad", "Precio", "Subtotal"]
+        )
+        layout.addWidget(self.tree)
+
+        bottom = QHBoxLayout()
+        self.lbl_total = QLabel("")
+        bottom.addWidget(self.lbl_total)
+        bottom.addStretch()
+
+        btn_cargar = QPushButton("Cargar en Entradas")
+        btn_cargar.clicked.connect(self.cargar_en_entradas)
+        bottom.addWidget(btn_cargar)
+
+        btn_cerrar = QPushButton("Cerrar")
+        btn_cerrar.clicked.connect(self.reject)
+        bottom.addWidget(btn_cerrar)
+        layout.addLayout(bottom)
+
+        self._pedidos = generar_pedidos(dias_cobertura=dias_cobertura)
+        self._pintar()
+
+    def _pintar(self):
+        self.tree.clear()
+        for i, pedido in enumerate(self._pedidos):
+            nombre = pedido.proveedor or "(sin compras previas)"
+            padre = QTreeWidgetItem(
+                [f"{nombre}  ({len(pedido.lineas)} productos)", "", "", "", "", _fmt_cop(pedido.total)]
+            )
+            padre.setData(0, Qt.UserRole, i)
+            for l in pedido.lineas:
+                hijo = QTreeWidgetItem(
+                    [
+                        f"{l.codigo} - {l.nombre}",
+                        f"{l.stock:,.2f}",
+                        f"{l.demanda:,.2f}",
+                        f"{l.cantidad:,.0f}",
+                        _fmt_cop(l.precio),
+                        _fmt_cop(l.subtotal),
+                    ]
+                )
+                hijo.setData(0, Qt.UserRole, i)
+                padre.addChild(hijo)
+            self.tree.addTopLevelItem(padre)
+        self.tree.expandAll()
+        for col in range(self.tree.columnCount()):
+            self.tree.resizeColumnToContents(col)
+        self.lbl_total.setText(f"Pedidos: {len(self._pedidos)}")
+
+    def cargar_en_entradas(self):
+        item = self.tree.currentItem()
+        if item is None:
+            QMessageBox.information(self, "Selecciona", "Selecciona un pedido primero.")
+            return
+
+        pedido = self._pedidos[item.data(0, Qt.UserRole)]
+        ventana = mostrar_ventana("entradas")
+        if ventana is None:
+            return
+        ventana.cargar_pedido(
+            pedido.supplier_id,
+            [(l.product_id, l.cantidad, l.precio) for l in pedido.lineas],
+        )
+        self.accept()
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QAbstractTableModel, QDate, QModelIndex, Qt
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -8,22 +8,159 @@ from PySide6.QtWidgets import (
     QLabel,
     QPushButton,
     QComboBox,
+    QDateEdit,
     QDoubleSpinBox,
+    QTableView,
     QTableWidget,
     QTableWidgetItem,
     QMessageBox,
 )
 
-from app.db.database import SessionLocal
-from app.db.models import Product
+from app.db.events import StockCambiado, VentaCreada, VentaAnulada
 from app.db.sales_repo import (
     crear_venta,
-    listar_ventas,
+    listar_ventas_pagina,
     obtener_venta_con_detalle,
     anular_venta,
+    totales_ventas,
 )
+from app.ui import data_cache, perfil_ui
+from app.ui.event_bridge import conectar
 from app.utils.formatters import fmt_fecha
 
+METODOS_PAGO = ["Efectivo", "Transferencia", "Nequi", "Débito", "Crédito"]
+
+
+def _fmt_money(value) -> str:
+    return (
+        "${:,.2f}".format(float(value or 0.0))
+        .replace(",", "X")
+        .replace(".", ",")
+        .replace("X", ".")
+    )
+
+
+class HistorialVentasModel(QAbstractTableModel):
+    """
+    Historial paginado y perezoso: la vista pide la página siguiente
+    (fetchMore) recién cuando se llega al final del scroll. Cada página es
+    una consulta por clave (listar_ventas_pagina), igual de barata al
+    principio que después de miles de ventas.
+    """
+
+    PAGINA = 200
+    COLUMNAS = ["ID", "Fecha", "Total"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ventas = []
+        self._filtros: dict = {}
+        self._fin = True
+
+    # --- filtros / carga ---
+    def aplicar_filtros(self, **filtros) -> None:
+        """Vacía el modelo y trae la primera página con esos filtros."""
+        self.beginResetModel()
+        self._ventas = []
+        self._filtros = filtros
+        self._fin = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._fin
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        if parent.isValid() or self._fin:
+            return
+        despues_de = self._ventas[-1].id if self._ventas else None
+        with perfil_ui.carga("Ventas", "historial") as perfil:
+            with perfil.datos():
+                pagina = listar_ventas_pagina(despues_de, self.PAGINA, **self._filtros)
+            with perfil.widgets(len(pagina)):
+                self._fin = len(pagina) < self.PAGINA
+                if pagina:
+                    n = len(self._ventas)
+                    self.beginInsertRows(QModelIndex(), n, n + len(pagina) - 1)
+                    self._ventas.extend(pagina)
+                    self.endInsertRows()
+
+    def buscar(self, sale_id: int):
+        """La venta `sale_id` con los filtros actuales (None si no entra)."""
+        fila = listar_ventas_pagina(sale_id + 1, 1, **self._filtros)
+        return fila[0] if fila and fila[0].id == sale_id else None
+
+    # --- parches por eventos ---
+    def fila_de(self, sale_id: int) -> int:
+        for row, v in enumerate(self._ventas):
+            if v.id == sale_id:
+                return row
+        return -1
+
+    def agregar_nueva(self, venta) -> None:
+        """Inserta `venta` en su lugar (por id, de la más nueva a la más vieja)."""
+        if self.fila_de(venta.id) >= 0:
+            return
+        row = next(
+            (i for i, v in enumerate(self._ventas) if v.id < venta.id),
+            len(self._ventas),
+        )
+        if row == len(self._ventas) and not self._fin:
+            return  # cae en una página que todavía no se trajo: la trae fetchMore
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._ventas.insert(row, venta)
+        self.endInsertRows()
+
+    def reemplazar(self, sale_id: int, venta) -> None:
+        """
+        Repinta la fila de `sale_id`; con venta None la quita. Si no estaba
+        (p. ej. filtro "Anuladas" y se acaba de anular), la agrega.
+        """
+        row = self.fila_de(sale_id)
+        if row < 0:
+            if venta is not None:
+                self.agregar_nueva(venta)
+            return
+        if venta is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._ventas[row]
+            self.endRemoveRows()
+            return
+        self._ventas[row] = venta
+        ultima = len(self.COLUMNAS) - 1
+        self.dataChanged.emit(self.index(row, 0), self.index(row, ultima))
+
+    def venta(self, row: int):
+        return self._ventas[row] if 0 <= row < len(self._ventas) else None
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._ventas)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNAS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        v = self._ventas[index.row()]
+        col = index.column()
+        if role == Qt.DisplayRole:
+            if col == 0:
+                return str(v.id)
+            if col == 1:
+                return fmt_fecha(v.fecha)
+            estado = " (ANULADA)" if v.anulada else ""
+            return f"{_fmt_money(v.total)}{estado}"
+        if role == Qt.TextAlignmentRole and col == 2:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
 
 class SalesWindow(QWidget):
     def __init__(self):
@@ -66,9 +203,7 @@ class SalesWindow(QWidget):
 
         pay.addWidget(QLabel("Método de pago:"))
         self.cbo_metodo = QComboBox()
-        self.cbo_metodo.addItems(
-            ["Efectivo", "Transferencia", "Nequi", "Débito", "Crédito"]
-        )
+        self.cbo_metodo.addItems(METODOS_PAGO)
         pay.addWidget(self.cbo_metodo, 1)
         pay.addStretch()
 
@@ -82,13 +217,54 @@ class SalesWindow(QWidget):
         root.addWidget(self.tbl, 1)
 
         # --- Historial de ventas ---
-        root.addWidget(QLabel("Historial (últimas ventas):"))
-
-        self.tbl_hist = QTableWidget(0, 3)
-        self.tbl_hist.setHorizontalHeaderLabels(["ID", "Fecha", "Total"])
+        filtros = QHBoxLayout()
+        root.addLayout(filtros)
+
+        # "Hasta" arranca en hoy y sigue al día mientras nadie lo cambie
+        # (la ventana queda abierta de un día para otro; ver _seguir_hoy)
+        self._hoy = QDate.currentDate()
+        filtros.addWidget(QLabel("Historial desde:"))
+        self.dt_desde = QDateEdit()
+        self.dt_desde.setCalendarPopup(True)
+        self.dt_desde.setDate(self._hoy.addDays(-30))
+        filtros.addWidget(self.dt_desde)
+
+        filtros.addWidget(QLabel("Hasta:"))
+        self.dt_hasta = QDateEdit()
+        self.dt_hasta.setCalendarPopup(True)
+        self.dt_hasta.setDate(self._hoy)
+        filtros.addWidget(self.dt_hasta)
+
+        filtros.addWidget(QLabel("Estado:"))
+        self.cbo_estado = QComboBox()
+        self.cbo_estado.addItem("Todas", None)
+        self.cbo_estado.addItem("Vigentes", False)
+        self.cbo_estado.addItem("Anuladas", True)
+        filtros.addWidget(self.cbo_estado)
+
+        filtros.addWidget(QLabel("Método:"))
+        self.cbo_filtro_metodo = QComboBox()
+        self.cbo_filtro_metodo.addItem("Todos", None)
+        for metodo in METODOS_PAGO:
+            self.cbo_filtro_metodo.addItem(metodo, metodo)
+        filtros.addWidget(self.cbo_filtro_metodo)
+
+        btn_filtrar = QPushButton("Aplicar")
+        btn_filtrar.clicked.connect(self.cargar_historial)
+        filtros.addWidget(btn_filtrar)
+        filtros.addStretch()
+
+        self.hist_model = HistorialVentasModel(self)
+        self.tbl_hist = QTableView()
+        self.tbl_hist.setModel(self.hist_model)
+        self.tbl_hist.setSelectionBehavior(QTableView.SelectRows)
+        self.tbl_hist.setSelectionMode(QTableView.SingleSelection)
         self.tbl_hist.horizontalHeader().setStretchLastSection(True)
         root.addWidget(self.tbl_hist, 1)
 
+        self.lbl_totales_hist = QLabel("")
+        root.addWidget(self.lbl_totales_hist)
+
         root.addWidget(QLabel("Detalle de la venta seleccionada:"))
 
         self.tbl_det = QTableWidget(0, 4)
@@ -98,7 +274,9 @@ class SalesWindow(QWidget):
         self.tbl_det.horizontalHeader().setStretchLastSection(True)
         root.addWidget(self.tbl_det, 1)
 
-        self.tbl_hist.itemSelectionChanged.connect(self.cargar_detalle_seleccionado)
+        self.tbl_hist.selectionModel().currentRowChanged.connect(
+            self.cargar_detalle_seleccionado
+        )
 
         # --- Footer ---
         bottom = QHBoxLayout()
@@ -127,51 +305,106 @@ class SalesWindow(QWidget):
         self.cargar_productos()
         self.cargar_historial()
 
+        conectar(self._on_evento)
+
     # -----------------------
     # Utilidades formato $
     # -----------------------
     def _fmt_money(self, value: float) -> str:
-        return (
-            "${:,.2f}".format(float(value or 0.0))
-            .replace(",", "X")
-            .replace(".", ",")
-            .replace("X", ".")
-        )
+        return _fmt_money(value)
+
+    def refrescar(self) -> None:
+        self._seguir_hoy()
+        self.cargar_productos()
+        self.cargar_historial()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        if self._seguir_hoy():
+            self.cargar_historial()
 
     # -----------------------
     # Historial / Detalle
     # -----------------------
-    def cargar_historial(self) -> None:
-        ventas = listar_ventas(200)
-        self.tbl_hist.setRowCount(0)
-
-        for s in ventas:
-            row = self.tbl_hist.rowCount()
-            self.tbl_hist.insertRow(row)
+    def _seguir_hoy(self) -> bool:
+        """
+        Si cambió el día y "hasta" seguía en el día anterior, corre el rango
+        (desde y hasta) a hoy. Si el usuario eligió otra fecha, no la toca.
+        Retorna True si lo corrió (hay que recargar el historial).
+        """
+        hoy = QDate.currentDate()
+        if hoy == self._hoy:
+            return False
+        dias, seguia = self._hoy.daysTo(hoy), self.dt_hasta.date() == self._hoy
+        self._hoy = hoy
+        if not seguia:
+            return False
+        self.dt_desde.setDate(self.dt_desde.date().addDays(dias))
+        self.dt_hasta.setDate(hoy)
+        return True
+
+    def _filtros_historial(self) -> dict:
+        d1 = self.dt_desde.date().toPython()
+        d2 = self.dt_hasta.date().toPython()
+        return {
+            "fecha_desde": min(d1, d2),
+            "fecha_hasta": max(d1, d2),
+            "anuladas": self.cbo_estado.currentData(),
+            "metodo_pago": self.cbo_filtro_metodo.currentData(),
+        }
 
-            self.tbl_hist.setItem(row, 0, QTableWidgetItem(str(s.id)))
-            self.tbl_hist.setItem(row, 1, QTableWidgetItem(fmt_fecha(s.fecha)))
+    def cargar_historial(self) -> None:
+        self.hist_model.aplicar_filtros(**self._filtros_historial())
+        self.tbl_det.setRowCount(0)
+        self._pintar_totales_historial()
+
+    def _pintar_totales_historial(self) -> None:
+        t = totales_ventas(**self._filtros_historial())
+        self.lbl_totales_hist.setText(
+            f"Ventas: {t.cantidad} (anuladas: {t.anuladas})  |  "
+            f"Bruto: {self._fmt_money(t.bruto)}  |  "
+            f"Anulado: {self._fmt_money(t.anulado)}  |  "
+            f"Neto: {self._fmt_money(t.neto)}"
+        )
 
-            estado = " (ANULADA)" if getattr(s, "anulada", False) else ""
-            self.tbl_hist.setItem(
-                row,
-                2,
-                QTableWidgetItem(f"{self._fmt_money(float(s.total or 0.0))}{estado}"),
-            )
+    def _venta_seleccionada(self):
+        return self.hist_model.venta(self.tbl_hist.currentIndex().row())
 
-        self.tbl_det.setRowCount(0)
+    # -----------------------
+    # Eventos del bus: parches puntuales en vez de recargar todo
+    # -----------------------
+    def _on_evento(self, ev) -> None:
+        if isinstance(ev, StockCambiado):
+            self._actualizar_stock_combo(ev.product_ids)
+        elif isinstance(ev, VentaCreada):
+            if self._seguir_hoy():
+                # primera venta del día: el rango ya la incluye
+                self.cargar_historial()
+                return
+            venta = self.hist_model.buscar(ev.sale_id)
+            if venta is not None:
+                self.hist_model.agregar_nueva(venta)
+                self._pintar_totales_historial()
+        elif isinstance(ev, VentaAnulada):
+            # con "Vigentes" la fila sale del historial; con "Anuladas", entra
+            self.hist_model.reemplazar(ev.sale_id, self.hist_model.buscar(ev.sale_id))
+            self._pintar_totales_historial()
+
+    def _actualizar_stock_combo(self, product_ids) -> None:
+        for pid in product_ids:
+            idx = self.cbo_producto.findData(pid)
+            p = data_cache.buscar_producto(pid)
+            if idx >= 0 and p is not None:
+                self.cbo_producto.setItemText(
+                    idx, f"{p.nombre} (Stock: {p.stock_actual})"
+                )
 
     def cargar_detalle_seleccionado(self) -> None:
-        row = self.tbl_hist.currentRow()
-        if row < 0:
-            return
-
-        sale_id_item = self.tbl_hist.item(row, 0)
-        if not sale_id_item:
+        venta = self._venta_seleccionada()
+        if venta is None:
             return
 
-        sale_id = int(sale_id_item.text())
-        sale = obtener_venta_con_detalle(sale_id)
+        sale = obtener_venta_con_detalle(venta.id)
         if not sale:
             return
 
@@ -195,15 +428,7 @@ class SalesWindow(QWidget):
     # -----------------------
     def cargar_productos(self) -> None:
         self.cbo_producto.clear()
-        with SessionLocal() as db:
-            products = (
-                db.query(Product)
-                .filter(Product.activo.is_(True))  # noqa: E712
-                .order_by(Product.nombre.asc())
-                .all()
-            )
-
-        for p in products:
+        for p in data_cache.productos_activos():
             self.cbo_producto.addItem(f"{p.nombre} (Stock: {p.stock_actual})", p.id)
 
     # -----------------------
@@ -285,24 +510,18 @@ class SalesWindow(QWidget):
             f"Venta #{sale.id} guardada.\nTotal: {self._fmt_money(float(sale.total))}\nMétodo: {metodo}",
         )
 
-        # limpiar para nueva venta
+        # limpiar para nueva venta (stock e historial llegan por eventos)
         self.items.clear()
         self.tbl.setRowCount(0)
         self.actualizar_total()
-        self.cargar_productos()  # refresca stock mostrado
-        self.cargar_historial()
 
     def anular_seleccionada(self) -> None:
-        row = self.tbl_hist.currentRow()
-        if row < 0:
+        venta = self._venta_seleccionada()
+        if venta is None:
             QMessageBox.warning(self, "Ventas", "Selecciona una venta del historial.")
             return
 
-        sale_id_item = self.tbl_hist.item(row, 0)
-        if not sale_id_item:
-            return
-
-        sale_id = int(sale_id_item.text())
+        sale_id = venta.id
 
         confirm = QMessageBox.question(
             self,
@@ -324,6 +543,4 @@ class SalesWindow(QWidget):
         QMessageBox.information(
             self, "OK", f"Venta #{sale_id} anulada. Stock devuelto y caja actualizada."
         )
-        self.cargar_historial()
-        self.cargar_productos()
         self.tbl_det.setRowCount(0)
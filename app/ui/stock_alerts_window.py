@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QSpinBox,
+)
+from PySide6.QtCore import Qt
+
+from app.db.stock_alerts_repo import listar_stock_bajo
+from app.utils.formatters import fmt_fecha
+
+
+def _num(value: float) -> QTableWidgetItem:
+    item = QTableWidgetItem(f"{value:,.2f}")
+    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return item
+
+
+class StockAlertsWindow(QWidget):
+    """Productos bajo su mínimo con la cantidad sugerida a pedir."""
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Stock bajo")
+        self.resize(950, 500)
+
+        layout = QVBoxLayout(self)
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Venta de los últimos"))
+        self.spn_dias_venta = QSpinBox()
+        self.spn_dias_venta.setRange(1, 365)
+        self.spn_dias_venta.setValue(30)
+        top.addWidget(self.spn_dias_venta)
+        top.addWidget(QLabel("días. Cubrir"))
+        self.spn_cobertura = QSpinBox()
+        self.spn_cobertura.setRange(0, 365)
+        self.spn_cobertura.setValue(15)
+        top.addWidget(self.spn_cobertura)
+        top.addWidget(QLabel("días."))
+
+        btn_refrescar = QPushButton("Refrescar")
+        btn_refrescar.clicked.connect(self.cargar)
+        top.addWidget(btn_refrescar)
+
+        btn_pedidos = QPushButton("Generar pedidos")
+        btn_pedidos.clicked.connect(self.generar_pedidos)
+        top.addWidget(btn_pedidos)
+        top.addStretch()
+        layout.addLayout(top)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(9)
+        self.table.setHorizontalHeaderLabels(
+            [
+                "Código",
+                "Nombre",
+                "Unidad",
+                "Stock",
+                "Mínimo",
+                "Venta/día",
+                "Días restantes",
+                "Sugerido",
+                "Bajo desde",
+            ]
+        )
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.lbl_total = QLabel("")
+        layout.addWidget(self.lbl_total)
+
+        self.spn_dias_venta.valueChanged.connect(self.cargar)
+        self.spn_cobertura.valueChanged.connect(self.cargar)
+
+        self.cargar()
+
+    def refrescar(self):
+        # MainWindow la marca sucia con cada cambio de stock o de productos;
+        # el conjunto es chico (solo los que están bajo el mínimo).
+        self.cargar()
+
+    def cargar(self):
+        alertas = listar_stock_bajo(
+            dias_venta=self.spn_dias_venta.value(),
+            dias_cobertura=self.spn_cobertura.value(),
+        )
+
+        self.table.setRowCount(len(alertas))
+        for row, a in enumerate(alertas):
+            self.table.setItem(row, 0, QTableWidgetItem(a.codigo))
+            self.table.setItem(row, 1, QTableWidgetItem(a.nombre))
+            self.table.setItem(row, 2, QTableWidgetItem(a.unidad))
+            self.table.setItem(row, 3, _num(a.stock))
+            self.table.setItem(row, 4, _num(a.stock_minimo))
+            self.table.setItem(row, 5, _num(a.venta_diaria))
+            dias = a.dias_restantes
+            self.table.setItem(
+                row, 6, _num(dias) if dias is not None else QTableWidgetItem("-")
+            )
+            self.table.setItem(row, 7, _num(a.sugerido))
+            self.table.setItem(row, 8, QTableWidgetItem(fmt_fecha(a.desde)))
+
+        self.table.resizeColumnsToContents()
+        self.lbl_total.setText(f"Productos bajo el mínimo: {len(alertas)}")
+
+    def generar_pedidos(self):
+        from app.ui.purchase_orders_dialog import PurchaseOrdersDialog
+
+        dlg = PurchaseOrdersDialog(self, dias_cobertura=self.spn_cobertura.value())
+        dlg.exec()
@@ -9,7 +9,9 @@ from PySide6.QtWidgets import (
     QMessageBox,
 )
 
+from app.db.events import ProveedorGuardado
 from app.db.suppliers_repo import listar_proveedores, cambiar_estado_proveedor
+from app.ui.event_bridge import conectar
 
 
 class SuppliersWindow(QWidget):
@@ -58,6 +60,15 @@ class SuppliersWindow(QWidget):
         self._proveedores = []
         self.cargar_proveedores()
 
+        conectar(self._on_evento)
+
+    def _on_evento(self, ev):
+        if isinstance(ev, ProveedorGuardado):
+            self.cargar_proveedores()
+
+    def refrescar(self):
+        self.cargar_proveedores()
+
     def cargar_proveedores(self):
         texto = self.txt_buscar.text().strip()
         self._proveedores = listar_proveedores(texto=texto, incluir_inactivos=True)
@@ -84,8 +95,7 @@ class SuppliersWindow(QWidget):
         from app.ui.supplier_form import SupplierForm
 
         dlg = SupplierForm(self)
-        if dlg.exec():
-            self.cargar_proveedores()
+        dlg.exec()
 
     def abrir_form_editar(self):
         from app.ui.supplier_form import SupplierForm
@@ -98,8 +108,7 @@ class SuppliersWindow(QWidget):
             return
 
         dlg = SupplierForm(self, supplier=p)
-        if dlg.exec():
-            self.cargar_proveedores()
+        dlg.exec()
 
     def _dbl_click_editar(self, row, col):
         self.abrir_form_editar()
@@ -126,5 +135,3 @@ class SuppliersWindow(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo cambiar estado:\n{e}")
             return
-
-        self.cargar_proveedores()
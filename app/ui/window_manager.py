@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QWidget
+
+
+class WindowManager:
+    """
+    Mantiene una sola instancia por módulo (Ventas, Caja, Productos...).
+
+    - Las ventanas se crean la primera vez que se piden (o en la precarga).
+    - Cerrar una ventana solo la oculta; al volver a abrirla se reutiliza.
+    - Cuando cambian datos de un área, las ventanas que dependen de ella
+      quedan "sucias": si están visibles se refrescan ya, si no, al mostrarse.
+    """
+
+    def __init__(self):
+        self._fabricas: dict[str, Callable[[], QWidget]] = {}
+        self._areas: dict[str, tuple[str, ...]] = {}
+        self._ventanas: dict[str, QWidget] = {}
+        self._sucias: set[str] = set()
+
+    def registrar(
+        self,
+        clave: str,
+        fabrica: Callable[[], QWidget],
+        depende_de: tuple[str, ...] = (),
+    ) -> None:
+        self._fabricas[clave] = fabrica
+        self._areas[clave] = tuple(depende_de)
+
+    def obtener(self, clave: str) -> QWidget:
+        w = self._ventanas.get(clave)
+        if w is None:
+            w = self._fabricas[clave]()
+            self._ventanas[clave] = w
+            self._sucias.discard(clave)  # recién creada = datos frescos
+        return w
+
+    def mostrar(self, clave: str) -> QWidget:
+        w = self.obtener(clave)
+        if clave in self._sucias:
+            self._refrescar(clave, w)
+
+        if w.isMinimized():
+            w.showNormal()
+        else:
+            w.show()
+        w.raise_()
+        w.activateWindow()
+        return w
+
+    def precargar(self, claves: list[str], intervalo_ms: int = 150) -> None:
+        """
+        Crea las ventanas indicadas en segundo plano, una por vuelta del
+        event loop, para no congelar la ventana principal.
+        """
+        pendientes = [c for c in claves if c not in self._ventanas]
+
+        def _siguiente():
+            if not pendientes:
+                return
+            clave = pendientes.pop(0)
+            if clave not in self._ventanas:
+                self.obtener(clave)
+            QTimer.singleShot(intervalo_ms, _siguiente)
+
+        QTimer.singleShot(intervalo_ms, _siguiente)
+
+    def marcar_sucias(self, *areas: str) -> None:
+        """Marca/refresca las ventanas que dependen de alguna de las áreas."""
+        afectadas = set(areas)
+        for clave, deps in self._areas.items():
+            if not afectadas.intersection(deps):
+                continue
+            w = self._ventanas.get(clave)
+            if w is None:
+                continue
+            if w.isVisible():
+                self._refrescar(clave, w)
+            else:
+                self._sucias.add(clave)
+
+    def _refrescar(self, clave: str, w: QWidget) -> None:
+        self._sucias.discard(clave)
+        refrescar = getattr(w, "refrescar", None)
+        if callable(refrescar):
+            refrescar()
+
+
+_actual: WindowManager | None = None
+
+
+def instalar(manager: WindowManager) -> None:
+    global _actual
+    _actual = manager
+
+
+def mostrar_ventana(clave: str) -> QWidget | None:
+    """Abre (o trae al frente) la ventana de un módulo desde otra ventana."""
+    if _actual is None:
+        return None
+    return _actual.mostrar(clave)
+
+
+def notificar_cambio(*areas: str) -> None:
+    """
+    Cambio "grueso" de datos (p. ej. alta/edición de productos): invalida el
+    caché compartido y refresca completas las ventanas que muestran esas
+    áreas. Los cambios finos (stock, ventas, caja) los aplica cada ventana
+    con los eventos del bus, fila por fila.
+    """
+    from app.ui import data_cache
+
+    data_cache.invalidar(*areas)
+    if _actual is not None:
+        _actual.marcar_sucias(*areas)
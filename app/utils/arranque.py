@@ -0,0 +1,53 @@
+"""
+Medición del arranque de la app.
+
+Se importa primero en app/main.py para tomar el tiempo base. Cada etapa se
+marca con `marcar()`; con INVENTARIO_TIEMPOS_ARRANQUE=1 se imprime en stderr
+un reporte al estilo de `python -X importtime`.
+"""
+
+import os
+import sys
+import time
+
+_T0 = time.perf_counter()
+_marcas: list[tuple[str, float]] = []
+
+# Presupuesto por defecto para "tiempo hasta la primera ventana"
+PRESUPUESTO_MS_DEFAULT = 1500.0
+
+
+def marcar(etapa: str) -> float:
+    """Registra una etapa. Retorna ms transcurridos desde el inicio."""
+    ms = (time.perf_counter() - _T0) * 1000.0
+    _marcas.append((etapa, ms))
+    return ms
+
+
+def total_ms() -> float:
+    return _marcas[-1][1] if _marcas else 0.0
+
+
+def reporte() -> str:
+    lineas = ["arranque: propio [ms] | acumulado [ms] | etapa"]
+    anterior = 0.0
+    for etapa, ms in _marcas:
+        lineas.append(f"arranque: {ms - anterior:10.1f} | {ms:14.1f} | {etapa}")
+        anterior = ms
+    return "\n".join(lineas)
+
+
+def reportar_si_activo() -> None:
+    if os.environ.get("INVENTARIO_TIEMPOS_ARRANQUE"):
+        print(reporte(), file=sys.stderr)
+
+
+def presupuesto_ms() -> float:
+    try:
+        return float(os.environ.get("INVENTARIO_ARRANQUE_PRESUPUESTO_MS", ""))
+    except ValueError:
+        return PRESUPUESTO_MS_DEFAULT
+
+
+def dentro_de_presupuesto() -> bool:
+    return total_ms() <= presupuesto_ms()
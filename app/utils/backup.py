@@ -1,4 +1,5 @@
 import shutil
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 
@@ -34,18 +35,92 @@ def crear_backup(ruta_db: str, max_backups: int = 10) -> str:
     if not ruta_db.exists():
         raise FileNotFoundError(f"No se encontró la base de datos en:\n{ruta_db}")
 
-    # Carpeta backups dentro de app_data
-    carpeta_backup = ruta_db.parent / "backups"
-    carpeta_backup.mkdir(exist_ok=True)
+    origen = sqlite3.connect(ruta_db)
+    try:
+        # Carpeta backups dentro de app_data
+        return copiar_a_backup(origen, ruta_db.parent / "backups", max_backups)
+    finally:
+        origen.close()
+
+
+def copiar_a_backup(
+    origen: sqlite3.Connection, carpeta_backup: Path, max_backups: int = 10
+) -> str:
+    """
+    Copia la base de una conexión abierta (también una en memoria) a un
+    backup nuevo en `carpeta_backup`. Retorna la ruta del backup creado.
+    """
+    carpeta_backup.mkdir(parents=True, exist_ok=True)
 
     # Nombre con fecha y hora
     fecha = datetime.now().strftime("%Y%m%d_%H%M%S")
     nombre_backup = f"inventario_backup_{fecha}.db"
     ruta_destino = carpeta_backup / nombre_backup
+    n = 1
+    while ruta_destino.exists():  # dos backups en el mismo segundo
+        ruta_destino = carpeta_backup / f"inventario_backup_{fecha}_{n}.db"
+        n += 1
 
-    shutil.copy2(ruta_db, ruta_destino)
+    # API de backup de SQLite: copia consistente aunque haya páginas en el WAL
+    # o la app esté abierta (un copy2 del archivo podía perderlas)
+    destino = sqlite3.connect(ruta_destino)
+    try:
+        origen.backup(destino)
+    finally:
+        destino.close()
 
     # Limpieza automática: conservar solo los últimos N
     _limpiar_backups(carpeta_backup, max_backups=max_backups)
 
     return str(ruta_destino)
+
+
+def listar_backups(ruta_db: str) -> list[str]:
+    """Backups de la base, el más reciente primero."""
+    carpeta_backup = Path(ruta_db).parent / "backups"
+    return [
+        str(p)
+        for p in sorted(
+            carpeta_backup.glob("inventario_backup_*.db"),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+    ]
+
+
+def restaurar_backup(ruta_backup: str, ruta_db: str) -> str | None:
+    """
+    Reemplaza la base por `ruta_backup`.
+    - Verifica antes que el backup sea una base SQLite íntegra.
+    - Respalda la base actual (si existe) para poder deshacer.
+    - Borra los -wal/-shm de la base anterior.
+    Retorna la ruta del respaldo de la base reemplazada (None si no había).
+    La app no debe estar abierta mientras se restaura.
+    """
+    ruta_backup = Path(ruta_backup)
+    ruta_db = Path(ruta_db)
+
+    if not ruta_backup.exists():
+        raise FileNotFoundError(f"No se encontró el backup en:\n{ruta_backup}")
+
+    con = sqlite3.connect(f"file:{ruta_backup.as_posix()}?mode=ro", uri=True)
+    try:
+        resultado = con.execute("PRAGMA integrity_check").fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"El archivo no es una base SQLite válida: {e}") from e
+    finally:
+        con.close()
+    if resultado != "ok":
+        raise ValueError(f"El backup está dañado: {resultado}")
+
+    # Se copia primero: el respaldo de la base actual puede rotar (borrar)
+    # justo el backup que se está restaurando
+    temporal = ruta_db.with_name(ruta_db.name + ".restaurando")
+    shutil.copy2(ruta_backup, temporal)
+
+    anterior = crear_backup(str(ruta_db)) if ruta_db.exists() else None
+
+    for sufijo in ("-wal", "-shm"):
+        Path(f"{ruta_db}{sufijo}").unlink(missing_ok=True)
+    temporal.replace(ruta_db)
+    return anterior
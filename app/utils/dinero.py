@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import math
+import operator
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from fractions import Fraction
+from numbers import Real
+
+
+def a_centavos(value) -> int:
+    """
+    Pesos (int/float/Decimal/str/Dinero) -> centavos enteros, redondeando
+    a la mitad hacia arriba. None/"" => 0. Lanza ValueError si no es un número.
+    """
+    if value is None or value == "":
+        return 0
+    if isinstance(value, Dinero):
+        return value.centavos
+    if isinstance(value, int):  # incluye bool
+        return int(value) * 100
+    if isinstance(value, float):
+        # repr(float) evita arrastrar el error binario (0.1 -> "0.1")
+        value = Decimal(repr(value))
+    else:
+        try:
+            value = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"Monto inválido: {value!r}")
+    return int((value * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+class Dinero:
+    """
+    Monto en pesos guardado como centavos enteros (sumas exactas).
+
+    Se comporta como número donde el código ya esperaba float:
+    float(d), f"{d:,.2f}", comparaciones, `d or 0.0`, sum([...]).
+    Las comparaciones con otros números son exactas (Dinero(0.1) != 0.1,
+    porque el float 0.1 no vale justo 10 centavos): para comparar un monto
+    float, pasarlo antes por Dinero().
+    Sumar/restar otro número lo toma como pesos; multiplicar/dividir por
+    una cantidad redondea al centavo.
+    """
+
+    __slots__ = ("centavos",)
+
+    def __init__(self, pesos=0):
+        self.centavos = a_centavos(pesos)
+
+    @classmethod
+    def de_centavos(cls, centavos: int) -> Dinero:
+        d = cls.__new__(cls)
+        d.centavos = int(centavos)
+        return d
+
+    # ----------------------------
+    # Conversión
+    # ----------------------------
+    @property
+    def pesos(self) -> Decimal:
+        return Decimal(self.centavos).scaleb(-2)
+
+    def __float__(self) -> float:
+        return self.centavos / 100
+
+    def __int__(self) -> int:
+        return int(self.centavos / 100)
+
+    def __bool__(self) -> bool:
+        return self.centavos != 0
+
+    def __format__(self, spec: str) -> str:
+        return format(self.pesos if not spec else float(self), spec)
+
+    def __str__(self) -> str:
+        return str(self.pesos)
+
+    def __repr__(self) -> str:
+        return f"Dinero('{self.pesos}')"
+
+    # ----------------------------
+    # Aritmética
+    # ----------------------------
+    def __add__(self, other):
+        if not isinstance(other, (Dinero, Real, Decimal)):
+            return NotImplemented
+        return Dinero.de_centavos(self.centavos + a_centavos(other))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if not isinstance(other, (Dinero, Real, Decimal)):
+            return NotImplemented
+        return Dinero.de_centavos(self.centavos - a_centavos(other))
+
+    def __rsub__(self, other):
+        if not isinstance(other, (Real, Decimal)):
+            return NotImplemented
+        return Dinero.de_centavos(a_centavos(other) - self.centavos)
+
+    def __mul__(self, factor):
+        if isinstance(factor, int):
+            return Dinero.de_centavos(self.centavos * factor)
+        if isinstance(factor, Dinero) or not isinstance(factor, (Real, Decimal)):
+            return NotImplemented
+        if isinstance(factor, float) and factor.is_integer():
+            return Dinero.de_centavos(self.centavos * int(factor))
+        exacto = Fraction(self.centavos) * _fraccion(factor)
+        return Dinero.de_centavos(_redondear(exacto))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dinero):
+            return self.centavos / other.centavos
+        if not isinstance(other, (Real, Decimal)):
+            return NotImplemented
+        exacto = Fraction(self.centavos) / _fraccion(other)
+        return Dinero.de_centavos(_redondear(exacto))
+
+    def __neg__(self):
+        return Dinero.de_centavos(-self.centavos)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Dinero.de_centavos(abs(self.centavos))
+
+    # ----------------------------
+    # Comparación
+    # ----------------------------
+    def _comparar(self, other, op):
+        """
+        Compara valores exactos: un float vale lo que vale en binario (0.1 no
+        es 10 centavos), así == es transitivo y cuadra con __hash__.
+        """
+        if isinstance(other, Dinero):
+            return op(self.centavos, other.centavos)
+        if not isinstance(other, (Real, Decimal)):
+            return NotImplemented
+        if not math.isfinite(other):  # inf / nan: como float
+            return op(float(self), float(other))
+        return op(Fraction(self.centavos, 100), Fraction(other))
+
+    def __eq__(self, other):
+        return self._comparar(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._comparar(other, operator.lt)
+
+    def __le__(self, other):
+        return self._comparar(other, operator.le)
+
+    def __gt__(self, other):
+        return self._comparar(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._comparar(other, operator.ge)
+
+    def __hash__(self):
+        # Igual que el hash de un número con el mismo valor (Dinero(5) == 5)
+        return hash(Fraction(self.centavos, 100))
+
+
+def _fraccion(x) -> Fraction:
+    return Fraction(Decimal(repr(x))) if isinstance(x, float) else Fraction(x)
+
+
+def _redondear(x: Fraction) -> int:
+    """Mitad hacia arriba (en valor absoluto), como a_centavos."""
+    n = int(abs(x) + Fraction(1, 2))
+    return n if x >= 0 else -n
@@ -16,3 +16,53 @@ def fmt_fecha(dt) -> str:
         return str(dt)
     except Exception:
         return str(dt)
+
+
+def parse_numero(value) -> float:
+    """
+    Acepta números de Excel o texto tipo 5000 / 5000.5 / 5.000 / 5.000,50 / $5.000,50.
+    Vacío => 0. Lanza ValueError si no es un número.
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    raw = str(value).strip().replace("$", "").replace(" ", "")
+    if not raw:
+        return 0.0
+    if "," in raw:
+        raw = raw.replace(".", "").replace(",", ".")
+    elif raw.count(".") > 1 or (raw.count(".") == 1 and len(raw.split(".")[1]) == 3):
+        raw = raw.replace(".", "")  # separador de miles
+    return float(raw)
+
+
+def parse_fecha(value) -> datetime | None:
+    """
+    Acepta datetime/date (Excel) o texto AAAA-MM-DD / DD/MM/AAAA, con hora
+    opcional HH:MM[:SS]. Vacío => None. Lanza ValueError si no se entiende.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+
+    raw = str(value).strip()
+    if not raw:
+        return None
+    for fmt in (
+        "%Y-%m-%d %H:%M:%S",
+        "%Y-%m-%d %H:%M",
+        "%Y-%m-%d",
+        "%d/%m/%Y %H:%M:%S",
+        "%d/%m/%Y %H:%M",
+        "%d/%m/%Y",
+    ):
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha inválida: {raw!r}")
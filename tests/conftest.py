@@ -0,0 +1,36 @@
+"""
+Pruebas: python -m pytest (desde la raíz del proyecto).
+
+Cada prueba trabaja sobre su propia base (archivo en tmp_path), nunca
+sobre app_data/inventario.db.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from app.db import database  # noqa: E402
+
+
+@pytest.fixture
+def base_vacia(tmp_path):
+    """Ruta de una base aún sin esquema, ya configurada como la del proceso."""
+    ruta = tmp_path / "inventario.db"
+    database.configurar_db(ruta)
+    yield ruta
+    # a memoria, no a None: None crearía app_data/ en el proyecto
+    database.configurar_db(database.MEMORIA)
+
+
+@pytest.fixture
+def base(base_vacia):
+    """Base nueva con el esquema al día."""
+    database.init_db()
+    return base_vacia
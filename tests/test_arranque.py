@@ -0,0 +1,64 @@
+"""
+Regresión del tiempo de arranque: python -m app.main --medir-arranque en
+un proceso aparte (Qt offscreen) tiene que llegar a la primera ventana
+dentro del presupuesto (INVENTARIO_ARRANQUE_PRESUPUESTO_MS, por defecto
+arranque.PRESUPUESTO_MS_DEFAULT).
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+pytest.importorskip("PySide6.QtWidgets")
+
+
+def _arrancar(
+    base, presupuesto_ms: float | None = None, etapas: bool = False
+) -> subprocess.CompletedProcess:
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", INVENTARIO_DB=str(base))
+    env.pop("INVENTARIO_TIEMPOS_ARRANQUE", None)
+    if etapas:
+        env["INVENTARIO_TIEMPOS_ARRANQUE"] = "1"
+    if presupuesto_ms is not None:
+        env["INVENTARIO_ARRANQUE_PRESUPUESTO_MS"] = str(presupuesto_ms)
+    return subprocess.run(
+        [sys.executable, "-m", "app.main", "--medir-arranque"],
+        cwd=RAIZ,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def test_arranque_dentro_del_presupuesto(tmp_path):
+    base = tmp_path / "inventario.db"
+    # Primera corrida: crea el esquema y los .pyc (no es el caso a medir)
+    _arrancar(base, presupuesto_ms=10**9)
+
+    r = _arrancar(base)
+    assert "Tiempo hasta la primera ventana" in r.stdout, r.stderr
+    assert r.returncode == 0, f"Arranque fuera de presupuesto: {r.stdout.strip()}"
+
+
+def test_presupuesto_excedido_sale_con_error(tmp_path):
+    r = _arrancar(tmp_path / "inventario.db", presupuesto_ms=1)
+    assert r.returncode == 1, r.stdout + r.stderr
+
+
+def test_marca_despues_del_primer_paint(tmp_path):
+    r = _arrancar(tmp_path / "inventario.db", presupuesto_ms=10**9, etapas=True)
+    etapas = [
+        linea.rsplit("|", 1)[-1].strip()
+        for linea in (r.stdout + r.stderr).splitlines()
+        if linea.startswith("arranque:") and "|" in linea
+    ]
+    # la marca sale del primer QEvent.Paint de la ventana ya mostrada
+    assert etapas[-2:] == ["ventana construida", "primera ventana pintada"], r.stderr
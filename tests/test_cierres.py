@@ -0,0 +1,146 @@
+"""
+Cierre de caja: snapshot de stock/valoración en la misma transacción,
+días reabiertos y el cierre/backup automáticos de app/db/jobs.py.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from app.utils.dinero import Dinero
+
+DIA = date(2026, 1, 5)
+
+
+def _entrada_de_noche(cantidad: float = 4) -> int:
+    from app.db.entries_repo import crear_entradas_lote
+    from app.db.products_repo import crear_producto
+    from app.db.suppliers_repo import crear_proveedor
+
+    p = crear_producto("A1", "Arroz", "kg", 2500, 5)
+    s = crear_proveedor("Granos SAS")
+    crear_entradas_lote(
+        [
+            {
+                "supplier_id": s.id,
+                "items": [{"product_id": p.id, "cantidad": cantidad, "precio_compra": 1500}],
+                "fecha": datetime.combine(DIA, time(21, 30)),
+            }
+        ]
+    )
+    return p.id
+
+
+def _snapshots(fecha: datetime) -> dict:
+    from sqlalchemy import select
+
+    from app.db.database import SessionLocal
+    from app.db.models import StockCheckpoint
+
+    with SessionLocal() as db:
+        return dict(
+            db.execute(
+                select(StockCheckpoint.product_id, StockCheckpoint.stock).where(
+                    StockCheckpoint.fecha == fecha
+                )
+            ).all()
+        )
+
+
+def test_snapshot_del_cierre_incluye_la_noche(base):
+    from app.db.cash_repo import cerrar_dia
+    from app.db.inventory_repo import valoracion_a_fecha
+
+    pid = _entrada_de_noche()
+    cerrar_dia(DIA)
+
+    fin_del_dia = datetime.combine(DIA, time.max)
+    assert _snapshots(fin_del_dia) == {pid: 4}
+    (v,) = valoracion_a_fecha(fin_del_dia, [pid])
+    assert (v.stock, v.valor) == (4, Dinero(6000))
+
+
+def test_falla_del_snapshot_no_deja_el_dia_cerrado(base, monkeypatch):
+    from app.db import cash_repo
+
+    _entrada_de_noche()
+
+    def fallar(db, fecha):
+        raise RuntimeError("disco lleno")
+
+    monkeypatch.setattr(cash_repo, "guardar_checkpoints", fallar)
+    with pytest.raises(RuntimeError):
+        cash_repo.cerrar_dia(DIA)
+    assert not cash_repo.esta_cerrado(DIA)
+    assert _snapshots(datetime.combine(DIA, time.max)) == {}
+
+
+def test_reabiertos_no_se_cierran_solos_pero_se_avisan(base):
+    from app.db import jobs
+    from app.db.cash_repo import (
+        cerrar_dia,
+        dias_pendientes,
+        dias_reabiertos,
+        reabrir_dia,
+        registrar_movimiento,
+    )
+
+    for i in range(3):
+        registrar_movimiento(
+            "INGRESO", "venta", 1000, fecha=datetime.combine(DIA + timedelta(days=i), time(9))
+        )
+    hasta = DIA + timedelta(days=2)
+    cerrar_dia(DIA)
+    reabrir_dia(DIA, motivo="faltó una venta")
+    assert dias_reabiertos(hasta) == [DIA]
+    assert dias_pendientes(hasta) == [DIA + timedelta(days=1), hasta]
+
+    mensaje = jobs._cierre_automatico()
+    assert f"Reabiertos sin cerrar: {DIA}" in mensaje
+
+    # Vuelto a cerrar deja de estar reabierto; reabierto otra vez, vuelve
+    cerrar_dia(DIA)
+    assert dias_reabiertos(hasta) == []
+    reabrir_dia(DIA)
+    assert dias_reabiertos(hasta) == [DIA]
+    assert dias_pendientes(hasta) == []
+
+
+def test_backup_de_base_en_memoria_va_a_app_data(tmp_path, monkeypatch):
+    from app.db import database, jobs
+
+    app_data = tmp_path / "app_data"
+    trabajo = tmp_path / "cwd"
+    app_data.mkdir()
+    trabajo.mkdir()
+    monkeypatch.setattr(jobs, "get_app_data_dir", lambda: app_data)
+    monkeypatch.chdir(trabajo)
+
+    database.configurar_db(database.MEMORIA)
+    database.init_db()
+    from app.db.products_repo import crear_producto
+
+    crear_producto("A1", "Arroz")
+    mensaje = jobs._backup()
+
+    (copia,) = (app_data / "backups").glob("inventario_backup_*.db")
+    assert str(copia) in mensaje
+    assert list(trabajo.iterdir()) == []
+    con = sqlite3.connect(copia)
+    try:
+        assert con.execute("SELECT codigo FROM products").fetchall() == [("A1",)]
+    finally:
+        con.close()
+
+
+def test_cerrar_dia_cerrado_en_paralelo(base, monkeypatch):
+    from app.db import cash_repo
+
+    cash_repo.cerrar_dia(DIA)
+    # El cache todavía no lo veía cerrado cuando lo cerró el otro proceso
+    monkeypatch.setattr(cash_repo, "esta_cerrado", lambda d, db=None: False)
+    with pytest.raises(ValueError, match="ya está cerrado"):
+        cash_repo.cerrar_dia(DIA)
@@ -0,0 +1,183 @@
+"""
+Equivalencia de Dinero (centavos enteros) con los montos float de antes:
+ida y vuelta, redondeo, sumas, e igualdad/hash. Montos aleatorios con
+semilla fija.
+"""
+
+from __future__ import annotations
+
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+from app.utils.dinero import Dinero, a_centavos
+
+SEMILLAS = range(1, 6)
+N = 2000
+
+
+def _montos(semilla: int, n: int = N) -> list[Decimal]:
+    """Pesos con centavos, de chicos a millones (como una caja real)."""
+    rnd = random.Random(semilla)
+    return [
+        Decimal(rnd.choice((rnd.randint(0, 99_999), rnd.randint(100_000, 99_999_999))))
+        + Decimal(rnd.randint(0, 99)) / 100
+        for _ in range(n)
+    ]
+
+
+def _centavos_exactos(pesos: Decimal) -> int:
+    return int((pesos * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+# ----------------------------
+# Ida y vuelta
+# ----------------------------
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_ida_y_vuelta(semilla):
+    for m in _montos(semilla):
+        d = Dinero(m)
+        assert d.centavos == _centavos_exactos(m)
+        assert d.pesos == m
+        # el float que guardaba la app vuelve al mismo monto
+        assert Dinero(float(m)) == d
+        assert Dinero(float(d)) == d
+        assert Dinero(str(d)) == d
+        assert Dinero.de_centavos(d.centavos) == d
+        assert float(d) == float(m)
+
+
+def test_ida_y_vuelta_por_la_base(base):
+    from sqlalchemy import func, select
+
+    from app.db.cash_repo import registrar_movimiento
+    from app.db.database import SessionLocal
+    from app.db.models import CashMovement
+
+    montos = _montos(7, 300)
+    ids = [registrar_movimiento("INGRESO", "prueba", m).id for m in montos]
+    with SessionLocal() as db:
+        leidos = dict(
+            db.execute(select(CashMovement.id, CashMovement.monto)).all()
+        )
+        suma = db.execute(select(func.sum(CashMovement.monto))).scalar()
+    assert [leidos[i] for i in ids] == [Dinero(m) for m in montos]
+    assert isinstance(suma, Dinero)
+    assert suma.pesos == sum(montos)
+
+
+# ----------------------------
+# Redondeo
+# ----------------------------
+@pytest.mark.parametrize(
+    "valor, centavos",
+    [
+        (0.1, 10),
+        (0.125, 13),  # round(0.125, 2) en float da 0.12
+        (2.675, 268),  # round(2.675, 2) en float da 2.67
+        (-2.675, -268),  # mitad lejos de cero, simétrico
+        (1.005, 101),
+        (12502.5, 1250250),
+        ("1234.565", 123457),
+        (Decimal("0.005"), 1),
+        (7, 700),
+        (None, 0),
+        ("", 0),
+    ],
+)
+def test_redondeo_mitad_hacia_arriba(valor, centavos):
+    assert a_centavos(valor) == centavos
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_redondeo_igual_a_la_migracion(semilla):
+    # La migración 4 hizo CAST(ROUND(x * 100) AS INTEGER) sobre los REAL
+    # guardados: para montos con centavos da lo mismo que a_centavos.
+    for m in _montos(semilla):
+        x = float(m)
+        assert a_centavos(x) == int(round(x * 100))
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_precio_por_cantidad(semilla):
+    rnd = random.Random(semilla)
+    for m in _montos(semilla, 500):
+        cantidad = rnd.choice((rnd.randint(1, 50), round(rnd.uniform(0.01, 20), 3)))
+        esperado = _centavos_exactos(m * Decimal(repr(cantidad)))
+        assert (Dinero(m) * cantidad).centavos == esperado
+        # el subtotal float de antes, redondeado al centavo, queda a 1 centavo
+        assert abs(round(float(m) * cantidad * 100) - esperado) <= 1
+
+
+# ----------------------------
+# Sumas
+# ----------------------------
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_suma_exacta_en_cualquier_orden(semilla):
+    montos = _montos(semilla)
+    exacto = sum(montos, Decimal(0))
+    dineros = [Dinero(m) for m in montos]
+
+    suma = sum(dineros, Dinero())
+    assert suma.pesos == exacto
+    random.Random(semilla).shuffle(dineros)
+    assert sum(dineros, Dinero()) == suma
+    assert sum(reversed(dineros)) == suma  # sum() arranca en 0 (int)
+
+    # float: la suma de antes se desvía, pero a menos de un centavo
+    suma_float = sum(float(m) for m in montos)
+    assert abs(Decimal(repr(suma_float)) - exacto) < Decimal("0.01")
+    assert Dinero(round(suma_float, 2)) == suma
+
+
+def test_saldo_restando_egresos():
+    ingresos = [Dinero("0.10")] * 10
+    egresos = [Dinero("0.30"), Dinero("0.70")]
+    saldo = sum(ingresos) - sum(egresos)
+    assert saldo == 0
+    assert not saldo
+    # con float: 0.1 * 10 - 1.0 no da exactamente 0
+    assert sum([0.1] * 10) - (0.3 + 0.7) != 0
+
+
+# ----------------------------
+# Igualdad y hash
+# ----------------------------
+def test_igualdad_con_float_es_exacta_y_cuadra_con_hash():
+    # 0.1 en binario no es 10 centavos: si fueran iguales, el hash no cuadraría
+    assert Dinero(0.1) != 0.1
+    assert len({Dinero(0.1), 0.1}) == 2
+    assert Dinero(0.1) not in {0.1: 1}
+    assert Dinero(0.1) == Dinero(0.1) == Decimal("0.1")
+    assert {Dinero("0.1"): 1}[Decimal("0.1")] == 1
+
+    # con valores exactos sí son el mismo número (igualdad y hash)
+    for d, x in ((Dinero(5), 5), (Dinero(2.5), 2.5), (Dinero("0.25"), 0.25)):
+        assert d == x and hash(d) == hash(x)
+        assert {x: 1}[d] == 1
+
+
+def test_igualdad_transitiva():
+    # antes: Dinero(1.005) == 1.005 y Dinero(1.005) == 1.01, pero 1.005 != 1.01
+    d = Dinero(1.005)
+    assert d == Dinero("1.01")
+    assert d != 1.005
+    assert d == Decimal("1.01")
+    assert not (d == 1.005 and d == 1.01)
+    assert sorted([1.005, d, 1.0]) == [1.0, 1.005, d]
+
+
+@pytest.mark.parametrize("semilla", SEMILLAS)
+def test_hash_igual_si_son_iguales(semilla):
+    for m in _montos(semilla, 500):
+        d = Dinero(m)
+        for x in (m, float(m), int(m), d.pesos):
+            if d == x:
+                assert hash(d) == hash(x)
+        assert d == Dinero(float(m))  # por Dinero() el float sí da el monto
+
+
+def test_comparar_con_infinito_y_nan():
+    inf = float("inf")
+    assert Dinero(10**9) < inf and not Dinero(0) == float("nan")
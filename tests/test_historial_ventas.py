@@ -0,0 +1,97 @@
+"""
+Historial de ventas: con la ventana abierta de un día para otro "hasta"
+sigue al día y las ventas nuevas aparecen; los eventos del bus parchan
+las filas según el filtro.
+"""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+pytest.importorskip("PySide6.QtWidgets")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QDate  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+
+class _Reloj:
+    hoy = QDate.currentDate()
+
+    @classmethod
+    def currentDate(cls):
+        return cls.hoy
+
+
+@pytest.fixture
+def ventana(base, monkeypatch):
+    from app.ui import sales_window
+
+    app = QApplication.instance() or QApplication([])
+    _Reloj.hoy = QDate.currentDate().addDays(-1)
+    monkeypatch.setattr(sales_window, "QDate", _Reloj)
+    w = sales_window.SalesWindow()
+    yield w
+    w.close()
+    w.deleteLater()
+    app.processEvents()
+
+
+def _vender(n: int = 1) -> list[int]:
+    from app.db.entries_repo import crear_entrada
+    from app.db.products_repo import crear_producto
+    from app.db.sales_repo import crear_venta
+    from app.db.suppliers_repo import crear_proveedor
+
+    p = crear_producto("A1", "Arroz", "kg", 2500, 5)
+    s = crear_proveedor("Granos SAS")
+    crear_entrada(s.id, [{"product_id": p.id, "cantidad": 10, "precio_compra": 1500}])
+    return [
+        crear_venta([{"product_id": p.id, "cantidad": 1, "precio_venta": 2500}]).id
+        for _ in range(n)
+    ]
+
+
+def test_venta_despues_de_medianoche_aparece(ventana):
+    from app.db.events import VentaCreada
+
+    ayer = _Reloj.hoy
+    _Reloj.hoy = QDate.currentDate()
+    (sale_id,) = _vender()
+    ventana._on_evento(VentaCreada(sale_id))
+
+    assert ventana.dt_hasta.date() == _Reloj.hoy
+    assert ventana.dt_desde.date() == ayer.addDays(-29)
+    assert ventana.hist_model.venta(0).id == sale_id
+
+
+def test_hasta_elegido_por_el_usuario_no_se_mueve(ventana):
+    elegido = _Reloj.hoy.addDays(-5)
+    ventana.dt_hasta.setDate(elegido)
+    _Reloj.hoy = QDate.currentDate()
+    ventana.show()
+    assert ventana.dt_hasta.date() == elegido
+
+
+def test_anulada_entra_con_filtro_anuladas(ventana):
+    from app.db.events import VentaAnulada
+    from app.db.sales_repo import anular_venta
+
+    _Reloj.hoy = QDate.currentDate()
+    ventana.refrescar()
+    ventana.cbo_estado.setCurrentIndex(ventana.cbo_estado.findText("Anuladas"))
+    ventana.cargar_historial()
+    primera, segunda, tercera = _vender(3)
+    assert ventana.hist_model.rowCount() == 0
+
+    for sale_id in (primera, tercera, segunda):
+        anular_venta(sale_id)
+        ventana._on_evento(VentaAnulada(sale_id))
+
+    modelo = ventana.hist_model
+    assert [modelo.venta(i).id for i in range(modelo.rowCount())] == [
+        tercera, segunda, primera
+    ]
+    assert ventana.lbl_totales_hist.text().startswith("Ventas: 3 (anuladas: 3)")
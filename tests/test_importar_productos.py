@@ -0,0 +1,50 @@
+"""Import de productos: una celda vacía no pisa lo guardado."""
+
+from __future__ import annotations
+
+from app.utils.dinero import Dinero
+
+
+def _csv(ruta, texto: str):
+    ruta.write_text(texto, encoding="utf-8")
+    return ruta
+
+
+def test_celdas_vacias_conservan_valores(base, tmp_path):
+    from app.db.products_import import importar_productos
+    from app.db.products_repo import crear_producto, obtener_producto_por_codigo
+
+    crear_producto("A1", "Arroz", "kg", 2500, 5)
+    crear_producto("B1", "Frijol", "lb", 4000, 8)
+
+    res = importar_productos(
+        _csv(
+            tmp_path / "parcial.csv",
+            "codigo,nombre,unidad,precio,stock minimo\n"
+            "A1,Arroz blanco,,,7\n"  # solo cambia nombre y mínimo
+            "B1,Frijol,,4100.50,\n"  # solo cambia precio
+            "C1,Lenteja,,,\n",  # nuevo: valores por defecto
+        )
+    )
+    assert res.errores == []
+    assert (res.insertados, res.actualizados) == (1, 2)
+
+    a = obtener_producto_por_codigo("A1")
+    assert (a.nombre, a.unidad, a.precio_venta, a.stock_minimo) == (
+        "Arroz blanco", "kg", Dinero(2500), 7
+    )
+    b = obtener_producto_por_codigo("B1")
+    assert (b.unidad, b.precio_venta, b.stock_minimo) == ("lb", Dinero("4100.50"), 8)
+    c = obtener_producto_por_codigo("C1")
+    assert (c.unidad, c.precio_venta, c.stock_minimo) == ("und", Dinero(0), 0)
+
+
+def test_columna_ausente_no_se_toca(base, tmp_path):
+    from app.db.products_import import importar_productos
+    from app.db.products_repo import crear_producto, obtener_producto_por_codigo
+
+    crear_producto("A1", "Arroz", "kg", 2500, 5)
+    importar_productos(_csv(tmp_path / "precios.csv", "codigo;nombre;precio\nA1;Arroz;2600\n"))
+
+    a = obtener_producto_por_codigo("A1")
+    assert (a.unidad, a.precio_venta, a.stock_minimo) == ("kg", Dinero(2600), 5)
@@ -0,0 +1,293 @@
+"""
+Actualización de bases viejas con migrar(): el esquema de antes de los
+costos, el del commit base (dinero en pesos REAL) y una base en la
+versión 3 (antes de pasar a centavos).
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+
+import pytest
+
+from app.db import database
+from app.db.migrations import MIGRACIONES, _marcar, ultima_version
+
+# Esquema anterior a app/db/migrate_costs.py (sin costos, anulación ni cierres)
+_SIN_COSTOS = """
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY, codigo VARCHAR(50) NOT NULL UNIQUE,
+    nombre VARCHAR(150) NOT NULL, unidad VARCHAR(20), precio_venta FLOAT,
+    stock_minimo FLOAT, stock_actual FLOAT, activo BOOLEAN, created_at DATETIME
+);
+CREATE TABLE suppliers (
+    id INTEGER PRIMARY KEY, nombre VARCHAR(150) NOT NULL, nit VARCHAR(50) UNIQUE,
+    telefono VARCHAR(50), direccion VARCHAR(200), activo BOOLEAN
+);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY, supplier_id INTEGER NOT NULL REFERENCES suppliers(id),
+    fecha DATETIME, total FLOAT
+);
+CREATE TABLE entry_details (
+    id INTEGER PRIMARY KEY, entry_id INTEGER NOT NULL REFERENCES entries(id),
+    product_id INTEGER NOT NULL REFERENCES products(id), cantidad FLOAT NOT NULL,
+    precio_compra FLOAT, subtotal FLOAT
+);
+CREATE TABLE cash_movements (
+    id INTEGER PRIMARY KEY, tipo VARCHAR NOT NULL, concepto VARCHAR NOT NULL,
+    monto FLOAT NOT NULL, fecha DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    referencia VARCHAR, observacion VARCHAR
+);
+CREATE TABLE sales (id INTEGER PRIMARY KEY, fecha DATETIME, total FLOAT);
+CREATE TABLE sale_details (
+    id INTEGER PRIMARY KEY, sale_id INTEGER NOT NULL REFERENCES sales(id),
+    product_id INTEGER NOT NULL REFERENCES products(id), cantidad FLOAT NOT NULL,
+    precio_venta FLOAT, subtotal FLOAT
+);
+"""
+
+# Lo que agregaba el commit base (models.py + migrate_costs.py)
+_BASE = """
+ALTER TABLE products ADD COLUMN costo_promedio FLOAT;
+ALTER TABLE sale_details ADD COLUMN costo_unitario FLOAT;
+ALTER TABLE sale_details ADD COLUMN utilidad FLOAT;
+ALTER TABLE sales ADD COLUMN anulada BOOLEAN;
+ALTER TABLE sales ADD COLUMN motivo_anulacion VARCHAR(255);
+ALTER TABLE sales ADD COLUMN anulada_en DATETIME;
+CREATE TABLE cash_closures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, fecha DATE NOT NULL UNIQUE,
+    total_ingresos FLOAT, total_egresos FLOAT, saldo_inicial FLOAT,
+    saldo_final FLOAT, creado_en DATETIME, cerrado_por VARCHAR(120)
+);
+"""
+
+_SCHEMA_VERSION = """
+CREATE TABLE schema_version (
+    version INTEGER NOT NULL PRIMARY KEY, descripcion VARCHAR(200) NOT NULL,
+    aplicada_en DATETIME
+);
+"""
+
+
+def _insertar(con: sqlite3.Connection, tabla: str, **valores) -> None:
+    cols = ", ".join(valores)
+    marcas = ", ".join("?" for _ in valores)
+    con.execute(f"INSERT INTO {tabla} ({cols}) VALUES ({marcas})", tuple(valores.values()))
+
+
+def _datos(con: sqlite3.Connection, con_anulacion: bool) -> None:
+    """
+    Arroz: entra 15, se venden 5 -> stock 10 (mínimo 5).
+    Frijol: entra 5, stock cargado a mano en 3 (mínimo 5: stock bajo).
+    Montos en pesos con centavos, como los guardaba la app.
+    """
+    _insertar(con, "products", codigo="A1", nombre="Arroz", unidad="und",
+              precio_venta=2500.5, stock_minimo=5, stock_actual=10, activo=1,
+              created_at="2026-01-01 10:00:00.000000")
+    _insertar(con, "products", codigo="B1", nombre="Frijol", unidad="und",
+              precio_venta=4000, stock_minimo=5, stock_actual=3, activo=1,
+              created_at="2026-01-01 10:00:00.000000")
+    _insertar(con, "suppliers", nombre="Prov", nit="900", activo=1)
+
+    _insertar(con, "entries", supplier_id=1, fecha="2026-01-02 09:00:00.000000",
+              total=30000)
+    _insertar(con, "entry_details", entry_id=1, product_id=1, cantidad=15,
+              precio_compra=1500, subtotal=22500)
+    _insertar(con, "entry_details", entry_id=1, product_id=2, cantidad=5,
+              precio_compra=1500, subtotal=7500)
+
+    _insertar(con, "cash_movements", tipo="INGRESO", concepto="Apertura de caja",
+              monto=50000, fecha="2026-01-01 08:00:00.000000", referencia="Inicial")
+    _insertar(con, "cash_movements", tipo="EGRESO",
+              concepto="Compra (Entrada #1) - Prov", monto=30000,
+              fecha="2026-01-02 09:00:00.000000", referencia="Entrada 1",
+              observacion="Método: Efectivo")
+
+    _insertar(con, "sales", fecha="2026-01-03 11:00:00.000000", total=12502.5)
+    _insertar(con, "sale_details", sale_id=1, product_id=1, cantidad=5,
+              precio_venta=2500.5, subtotal=12502.5)
+    _insertar(con, "cash_movements", tipo="INGRESO", concepto="Venta",
+              monto=12502.5, fecha="2026-01-03 11:00:00.000000",
+              referencia="Venta #1", observacion="Método: Nequi")
+
+    if con_anulacion:
+        _insertar(con, "sales", fecha="2026-01-04 11:00:00.000000", total=4000,
+                  anulada=1, motivo_anulacion="error",
+                  anulada_en="2026-01-04 12:00:00.000000")
+        _insertar(con, "sale_details", sale_id=2, product_id=2, cantidad=1,
+                  precio_venta=4000, subtotal=4000, costo_unitario=1500,
+                  utilidad=2500)
+        _insertar(con, "cash_movements", tipo="INGRESO", concepto="Venta",
+                  monto=4000, fecha="2026-01-04 11:00:00.000000",
+                  referencia="Venta #2", observacion="Método: Efectivo")
+        _insertar(con, "cash_movements", tipo="EGRESO",
+                  concepto="Anulación de venta", monto=4000,
+                  fecha="2026-01-04 12:00:00.000000", referencia="Venta #2",
+                  observacion="Método: Daviplata | Motivo: error")
+        _insertar(con, "cash_closures", fecha="2026-01-01", total_ingresos=50000,
+                  total_egresos=0, saldo_inicial=0, saldo_final=50000,
+                  creado_en="2026-01-01 20:00:00.000000")
+
+
+def _crear_historica(ruta, esquema: str) -> None:
+    con = sqlite3.connect(ruta)
+    con.executescript(_SIN_COSTOS)
+    if esquema != "sin_costos":
+        con.executescript(_BASE)
+    _datos(con, con_anulacion=esquema != "sin_costos")
+    con.commit()
+    con.close()
+
+    if esquema == "v3":
+        # Como la dejaba la app con los tres primeros pasos aplicados
+        engine = database.crear_engine(ruta)
+        with engine.connect() as conn:
+            conn.exec_driver_sql(_SCHEMA_VERSION)
+            for version, descripcion, fn in MIGRACIONES[:3]:
+                fn(conn, None)
+                _marcar(conn, version, descripcion)
+            conn.commit()
+        engine.dispose()
+
+
+@pytest.mark.parametrize("esquema", ["sin_costos", "base", "v3"])
+def test_migrar_base_historica(base_vacia, esquema):
+    _crear_historica(base_vacia, esquema)
+    anulacion = esquema != "sin_costos"
+
+    assert database.init_db() == ultima_version()
+
+    from app.db.cash_repo import obtener_saldo
+    from app.db.inventory_repo import conciliar_stock
+
+    con = sqlite3.connect(base_vacia)
+    try:
+        versiones = [v for (v,) in con.execute("SELECT version FROM schema_version")]
+        assert versiones == [v for v, _d, _fn in MIGRACIONES]
+
+        # Dinero en centavos enteros (x100 una sola vez; las columnas viejas
+        # son FLOAT, SQLite guarda 250050.0)
+        assert con.execute(
+            "SELECT precio_venta FROM products WHERE codigo = 'A1'"
+        ).fetchone() == (250050,)
+        assert con.execute("SELECT total FROM sales WHERE id = 1").fetchone() == (1250250,)
+        assert con.execute(
+            "SELECT precio_compra, subtotal FROM entry_details WHERE id = 1"
+        ).fetchone() == (150000, 2250000)
+        assert con.execute(
+            "SELECT monto FROM cash_movements WHERE referencia = 'Venta #1'"
+        ).fetchone() == (1250250,)
+        if anulacion:
+            assert con.execute(
+                "SELECT saldo_final FROM cash_closures WHERE fecha = '2026-01-01'"
+            ).fetchone() == (5000000,)
+
+        # Kardex: cada documento y lo que el histórico no explica como AJUSTE
+        origenes = dict(
+            con.execute(
+                "SELECT origen, COUNT(*) FROM inventory_movements GROUP BY origen"
+            ).fetchall()
+        )
+        assert origenes["ENTRADA"] == 2
+        assert origenes["VENTA"] == (2 if anulacion else 1)
+        assert origenes.get("ANULACION", 0) == (1 if anulacion else 0)
+        assert origenes["AJUSTE"] == 1  # Frijol: entraron 5, hay 3
+        assert conciliar_stock() == []
+
+        # Método de pago desde la observación
+        metodos = dict(
+            con.execute(
+                "SELECT referencia || ' ' || tipo, metodo_pago FROM cash_movements "
+                "WHERE referencia LIKE 'Venta #%' OR referencia LIKE 'Entrada %'"
+            ).fetchall()
+        )
+        assert metodos["Venta #1 INGRESO"] == "Nequi"
+        assert metodos["Entrada 1 EGRESO"] == "Efectivo"
+        ventas = dict(con.execute("SELECT id, metodo_pago FROM sales").fetchall())
+        assert ventas[1] == "Nequi"
+        if anulacion:
+            assert metodos["Venta #2 EGRESO"] == "Daviplata"
+            assert ventas[2] == "Efectivo"
+
+        # Stock bajo: solo Frijol (3 <= 5)
+        assert con.execute(
+            "SELECT p.codigo FROM stock_bajo s JOIN products p ON p.id = s.product_id"
+        ).fetchall() == [("B1",)]
+
+        triggers = {
+            n for (n,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        }
+        assert {"trg_stock_bajo_entra", "trg_caja_dia_cerrado"} <= triggers
+    finally:
+        con.close()
+
+    ingresos = 50000 + 12502.5 + (4000 if anulacion else 0)
+    egresos = 30000 + (4000 if anulacion else 0)
+    assert obtener_saldo() == ingresos - egresos
+
+    # Ya al día: otra pasada no cambia nada
+    database.configurar_db(base_vacia)
+    assert database.init_db() == ultima_version()
+
+
+def test_migrar_fechas_utc_a_hora_local(base_vacia, monkeypatch):
+    """
+    Ventas y entradas que estampó datetime.utcnow (con microsegundos) pasan
+    a hora local, y su kardex con ellas; lo importado con fecha (sin
+    microsegundos) y lo que ya era local no se toca.
+    """
+    monkeypatch.setenv("TZ", "America/Bogota")  # UTC-5, sin horario de verano
+    time.tzset()
+    try:
+        _crear_historica(base_vacia, "base")
+        con = sqlite3.connect(base_vacia)
+        # Venta de las 21:30 del 4 de enero en Bogotá, guardada en UTC
+        _insertar(con, "sales", fecha="2026-01-05 02:30:00.123456", total=2500.5,
+                  anulada=0)
+        _insertar(con, "sale_details", sale_id=3, product_id=1, cantidad=1,
+                  precio_venta=2500.5, subtotal=2500.5)
+        con.execute("UPDATE products SET stock_actual = 9 WHERE codigo = 'A1'")
+        # Entrada de la app (UTC) e importada con fecha (local)
+        _insertar(con, "entries", supplier_id=1, fecha="2026-01-06 01:00:00.500000",
+                  total=1500)
+        _insertar(con, "entry_details", entry_id=2, product_id=1, cantidad=1,
+                  precio_compra=1500, subtotal=1500)
+        _insertar(con, "entries", supplier_id=1, fecha="2026-01-07 00:00:00.000000",
+                  total=1500)
+        _insertar(con, "entry_details", entry_id=3, product_id=1, cantidad=1,
+                  precio_compra=1500, subtotal=1500)
+        con.execute("UPDATE products SET stock_actual = 11 WHERE codigo = 'A1'")
+        con.commit()
+        con.close()
+
+        database.init_db()
+        from app.db.inventory_repo import conciliar_stock
+
+        con = sqlite3.connect(base_vacia)
+        try:
+            ventas = dict(con.execute("SELECT id, fecha FROM sales").fetchall())
+            assert ventas[3] == "2026-01-04 21:30:00.123456"
+            assert ventas[1] == "2026-01-03 11:00:00.000000"
+            entradas = dict(con.execute("SELECT id, fecha FROM entries").fetchall())
+            assert entradas[2] == "2026-01-05 20:00:00.500000"
+            assert entradas[3] == "2026-01-07 00:00:00.000000"
+
+            # El kardex va con su documento; la anulación sigue después de la venta
+            kardex = {
+                (origen, doc): fecha
+                for origen, doc, fecha in con.execute(
+                    "SELECT origen, documento_id, fecha FROM inventory_movements "
+                    "WHERE origen <> 'AJUSTE'"
+                )
+            }
+            assert kardex[("VENTA", 3)] == ventas[3]
+            assert kardex[("ENTRADA", 2)] == entradas[2]
+            assert kardex[("ENTRADA", 3)] == entradas[3]
+            assert kardex[("VENTA", 2)] < kardex[("ANULACION", 2)]
+        finally:
+            con.close()
+        assert conciliar_stock() == []
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,83 @@
+"""Pronóstico incremental: una anulación de un día ya procesado se descuenta."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+
+def _vender(pid: int, cantidad: float, dias_atras: int) -> int:
+    from app.db.database import SessionLocal
+    from app.db.models import Sale
+    from app.db.sales_repo import crear_venta
+
+    venta = crear_venta([{"product_id": pid, "cantidad": cantidad, "precio_venta": 2500}])
+    # crear_venta estampa ahora; el pronóstico solo mira sales.fecha
+    with SessionLocal() as db:
+        db.execute(
+            update(Sale)
+            .where(Sale.id == venta.id)
+            .values(fecha=datetime.now() - timedelta(days=dias_atras))
+        )
+        db.commit()
+    return venta.id
+
+
+def _estado() -> tuple[dict, dict]:
+    from app.db.database import SessionLocal
+    from app.db.models import DemandaProducto, VentaDiaria
+
+    with SessionLocal() as db:
+        diarias = {
+            (d, p): u
+            for d, p, u in db.execute(
+                select(VentaDiaria.dia, VentaDiaria.product_id, VentaDiaria.unidades)
+            )
+            if u
+        }
+        demanda = {
+            p: (pytest.approx(s), pytest.approx(v))
+            for p, s, v in db.execute(
+                select(
+                    DemandaProducto.product_id,
+                    DemandaProducto.suavizado,
+                    DemandaProducto.suma_ventana,
+                )
+            )
+        }
+    return diarias, demanda
+
+
+def test_anulacion_de_dia_procesado_igual_a_recalcular(base):
+    from app.db.entries_repo import crear_entrada
+    from app.db.forecast_repo import VENTANA, actualizar_pronostico
+    from app.db.products_repo import crear_producto
+    from app.db.sales_repo import anular_venta
+    from app.db.suppliers_repo import crear_proveedor
+
+    a = crear_producto("A1", "Arroz", "kg", 2500, 5)
+    b = crear_producto("B1", "Frijol", "lb", 4000, 5)
+    s = crear_proveedor("Granos SAS")
+    crear_entrada(
+        s.id,
+        [
+            {"product_id": a.id, "cantidad": 100, "precio_compra": 1500},
+            {"product_id": b.id, "cantidad": 100, "precio_compra": 3000},
+        ],
+    )
+    _vender(a.id, 3, VENTANA + 5)  # fuera de la ventana
+    vieja = _vender(a.id, 2, VENTANA + 5)
+    reciente = _vender(a.id, 4, 3)
+    _vender(b.id, 1, 3)
+    _vender(a.id, 1, 1)
+
+    hasta = date.today() - timedelta(days=1)
+    actualizar_pronostico(hasta)
+    anular_venta(vieja)
+    anular_venta(reciente)
+    incremental = _estado()
+
+    actualizar_pronostico(hasta, recalcular=True)
+    assert incremental == _estado()
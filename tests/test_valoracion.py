@@ -0,0 +1,80 @@
+"""
+Valoración y kardex re-aplicados desde inventory_movements: el costo
+promedio tiene que dar lo mismo que products.costo_promedio.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.utils.dinero import Dinero
+
+
+def _producto_y_proveedor():
+    from app.db.products_repo import crear_producto
+    from app.db.suppliers_repo import crear_proveedor
+
+    return crear_producto("A1", "Arroz", "kg", 2500, 5), crear_proveedor("Granos SAS")
+
+
+def _comparar(pid: int) -> Dinero:
+    from app.db.inventory_repo import kardex, valoracion_a_fecha
+    from app.db.products_repo import obtener_producto
+
+    p = obtener_producto(pid)
+    (v,) = valoracion_a_fecha(datetime.now() + timedelta(seconds=1), [pid])
+    assert (v.stock, v.costo_promedio) == (p.stock_actual, p.costo_promedio)
+    assert kardex(pid)[-1].costo_promedio == p.costo_promedio
+    return p.costo_promedio
+
+
+def test_entrada_con_lineas_repetidas(base):
+    from app.db.entries_repo import crear_entrada
+    from app.db.inventory_repo import kardex
+
+    p, s = _producto_y_proveedor()
+    crear_entrada(s.id, [{"product_id": p.id, "cantidad": 3, "precio_compra": "10.00"}])
+    crear_entrada(
+        s.id,
+        [
+            {"product_id": p.id, "cantidad": 1, "precio_compra": "10.01"},
+            {"product_id": p.id, "cantidad": 1, "precio_compra": "10.02"},
+        ],
+    )
+    # (3 * 10.00 + 10.01 + 10.02) / 5 = 10.006; línea por línea daba 10.00
+    assert _comparar(p.id) == Dinero("10.01")
+    ultima = kardex(p.id)[-1]
+    assert (ultima.origen, ultima.delta, ultima.stock) == ("ENTRADA", 2, 5)
+
+
+def test_lote_con_varias_entradas_del_mismo_producto(base):
+    from app.db.entries_repo import crear_entradas_lote
+
+    p, s = _producto_y_proveedor()
+    ayer = datetime.now() - timedelta(days=1)
+    crear_entradas_lote(
+        [
+            {
+                "supplier_id": s.id,
+                "items": [{"product_id": p.id, "cantidad": 3, "precio_compra": "10.00"}],
+                "fecha": ayer + timedelta(hours=1),
+            },
+            {  # más vieja, pero después en el lote
+                "supplier_id": s.id,
+                "items": [
+                    {"product_id": p.id, "cantidad": 1, "precio_compra": "10.01"},
+                    {"product_id": p.id, "cantidad": 2, "precio_compra": "7.77"},
+                ],
+                "fecha": ayer,
+            },
+            {
+                "supplier_id": s.id,
+                "items": [
+                    {"product_id": p.id, "cantidad": 1, "precio_compra": "10.01"},
+                    {"product_id": p.id, "cantidad": 1, "precio_compra": "10.02"},
+                ],
+                "fecha": ayer + timedelta(hours=2),
+            },
+        ]
+    )
+    _comparar(p.id)